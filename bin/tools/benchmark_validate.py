@@ -0,0 +1,173 @@
+#! /usr/bin/env python3
+"""Benchmark the validation of agent data by the ingester."""
+
+# Standard imports
+import sys
+import os
+import argparse
+import timeit
+
+# Try to create a working PYTHONPATH
+script_directory = os.path.dirname(os.path.realpath(__file__))
+bin_directory = os.path.abspath(os.path.join(script_directory, os.pardir))
+root_directory = os.path.abspath(os.path.join(bin_directory, os.pardir))
+if script_directory.endswith('/infoset-ng/bin/tools') is True:
+    sys.path.append(root_directory)
+else:
+    print(
+        'This script is not installed in the "infoset-ng/bin/tools" '
+        'directory. Please fix.')
+    sys.exit(2)
+
+# Infoset-ng imports
+try:
+    from infoset.cache import validate
+    from infoset.utils import payload as agent_payload
+except:
+    print('You need to set your PYTHONPATH to include the infoset library')
+    sys.exit(2)
+
+
+def payload(datapoints, labels):
+    """Create agent data for benchmarking.
+
+    Args:
+        datapoints: Number of datapoints
+        labels: Number of agent labels
+
+    Returns:
+        data: Agent data
+
+    """
+    # Initialize key variables
+    data = {
+        'timestamp': 1481561700,
+        'id_agent': 'benchmark_id_agent',
+        'agent': 'benchmark_agent',
+        'devicename': 'benchmark_devicename',
+        'timeseries': {},
+        'timefixed': {}
+    }
+    per_label = max(1, datapoints // labels)
+
+    # Create the data, with a tenth of it being timefixed
+    for label in range(labels):
+        data_type = 'timefixed' if label % 10 == 9 else 'timeseries'
+        data[data_type][('label_%s') % (label)] = {
+            'base_type': 1,
+            'description': ('Label %s') % (label),
+            'data': [
+                [index, index * 1.5, ('source_%s') % (index)]
+                for index in range(per_label)]
+        }
+
+    # Return
+    return data
+
+
+def legacy(data):
+    """Validate data the way it was done before _CheckPayload.
+
+    The old validators checked the main keys, then walked the agent labels
+    once for their keys and the number of values of each datapoint, and
+    again for the numeric timeseries values. Only the work done for valid
+    data, which is what is measured, is repeated here.
+
+    Args:
+        data: Agent data
+
+    Returns:
+        valid: True if valid
+
+    """
+    # Initialize key variables
+    valid = False
+    main_keys = [
+        ('timestamp', int), ('id_agent', str), ('agent', str),
+        ('devicename', str)]
+    data_types = [
+        data_type for data_type in ['timeseries', 'timefixed']
+        if data_type in data]
+
+    # Check the main keys
+    for key, key_type in main_keys:
+        if isinstance(data.get(key), key_type) is False:
+            return valid
+    if bool(data_types) is False:
+        return valid
+
+    # Check the agent label keys and the datapoints
+    for data_type in data_types:
+        for _, agent_items in sorted(data[data_type].items()):
+            for key in ['base_type', 'description', 'data']:
+                if key not in agent_items:
+                    return valid
+            for datapoint in agent_items['data']:
+                if len(datapoint) != 3:
+                    return valid
+
+    # Check that the timeseries values are numeric
+    try:
+        for _, agent_items in sorted(data.get('timeseries', {}).items()):
+            float(agent_items['base_type'])
+            for datapoint in agent_items['data']:
+                float(datapoint[1])
+    except (TypeError, ValueError):
+        return valid
+
+    # Return
+    valid = True
+    return valid
+
+
+def main():
+    """Compare the cost of validating 10,000 datapoints.
+
+    Args:
+        None
+
+    Returns:
+        None
+
+    """
+    # Get the CLI arguments
+    parser = argparse.ArgumentParser(
+        description='Benchmark the validation of agent data.')
+    parser.add_argument(
+        '--datapoints', type=int, default=100000,
+        help='Number of datapoints in the agent data.')
+    parser.add_argument(
+        '--labels', type=int, default=100,
+        help='Number of agent labels in the agent data.')
+    parser.add_argument(
+        '--repeat', type=int, default=5,
+        help='Number of times to repeat each measurement.')
+    args = parser.parse_args()
+
+    # Create the data
+    data = payload(args.datapoints, args.labels)
+    count = sum(
+        len(label_dict['data'])
+        for data_type in ['timeseries', 'timefixed']
+        for label_dict in data[data_type].values())
+
+    columnar = agent_payload.columnar(data)
+
+    # Time each validator
+    validators = [
+        ('Legacy validators', legacy, data),
+        ('_CheckPayload', lambda item: validate._CheckPayload(item).valid(),
+         data),
+        ('payload_ok', validate.payload_ok, data),
+        ('payload_ok (version 2)', validate.payload_ok, columnar)]
+    print(('Validating %s datapoints in %s agent labels') % (
+        count, args.labels))
+    for name, function, item in validators:
+        seconds = min(timeit.repeat(
+            lambda: function(item), number=1, repeat=args.repeat))
+        print(('%-30s %10.3f ms per 10k datapoints') % (
+            name, seconds * 1000 * 10000 / count))
+
+
+if __name__ == '__main__':
+    main()
@@ -17,9 +17,10 @@ import sys
 import time
 import argparse
 from collections import defaultdict
-from copy import deepcopy
 import json
+import threading
 import multiprocessing
+from concurrent.futures import ThreadPoolExecutor
 
 # pip3 libraries
 import requests
@@ -30,10 +31,21 @@ from gunicorn.six import iteritems
 from infoset.utils import log
 from infoset.utils import general
 from infoset.utils import daemon
+from infoset.utils import spool
+from infoset.utils import delta
+from infoset.utils import aggregate
+from infoset.utils import payload
+from infoset.utils import compression
 from infoset.utils import configuration
 from infoset.utils.daemon import Daemon
 from infoset.api import API
 
+# HTTP status codes of servers asking for data to be posted again later
+_RETRY_LATER = [429, 503]
+
+# HTTP status codes of servers without the bulk route
+_NO_BULK = [404, 405]
+
 
 class Agent(object):
     """Agent class for daemons."""
@@ -203,6 +215,7 @@ class AgentReferenceSample(object):
 
         """
         # Initialize key variables
+        self.config = config
         self.data = defaultdict(lambda: defaultdict(dict))
         agent_name = config.agent_name()
         id_agent = get_id_agent(config)
@@ -228,6 +241,38 @@ class AgentReferenceSample(object):
         if os.path.exists(self.cache_dir) is False:
             os.mkdir(self.cache_dir)
 
+        # Build the data to post without copying it
+        self.payload = payload.Payload()
+        self.payload_version = config.agent_payload_version()
+
+        # Number of posts from one keyframe to the next. Posts in between
+        # only have the datapoints that changed
+        self.keyframe_interval = config.agent_keyframe_interval()
+
+        # Summarize samples taken more often than the interval, and only
+        # post the summary
+        self.aggregate = config.agent_aggregate()
+        self.statistics = config.agent_aggregate_statistics()
+
+        # True if the server couldn't accept the last post
+        self.retry_later = False
+
+        # Compress posts and cache files
+        self.encoding = compression.content_encoding(
+            config.agent_compression())
+
+        # Number of cache files posted together, and of devices purged at
+        # once, when purging the cache
+        self.bulk_size = config.agent_bulk_size()
+        self.purge_threads = config.agent_purge_threads()
+
+        # Reuse connections to the server
+        self.session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(
+            pool_maxsize=self.purge_threads)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
     def name(self):
         """Return the name of the agent.
 
@@ -253,28 +298,23 @@ class AgentReferenceSample(object):
             None
 
         """
-        # Initialize data
-        data = deepcopy(data_in)
-
         # Validate base_type
-        if len(data) != 1 or isinstance(data, defaultdict) is False:
-            log_message = ('Agent data "%s" is invalid') % (data)
+        if len(data_in) != 1 or isinstance(data_in, defaultdict) is False:
+            log_message = ('Agent data "%s" is invalid') % (data_in)
             log.log2die(1025, log_message)
 
         ######################################################################
         # Get a description to use for label value. You could do a lookup in
         # a table based on the spoken language of the environment based on the
-        # label and assign the translated result to data[label]['description']
+        # label and use the translated result as the description
         ######################################################################
-        for label in data.keys():
-            data[label]['description'] = label
-            break
+        for label, label_dict in data_in.items():
+            columns = self.payload.label(
+                label, label_dict['base_type'], label)
 
-        # Add data to appropriate self.data key
-        if data[label]['base_type'] is not None:
-            self.data['timeseries'].update(data)
-        else:
-            self.data['timefixed'].update(data)
+            # Add data
+            for (index, value, source) in label_dict['data']:
+                self.payload.append(columns, index, value, source)
 
     def populate_single(self, label, value, base_type=None, source=None):
         """Populate a single value in the agent.
@@ -289,13 +329,9 @@ class AgentReferenceSample(object):
             None
 
         """
-        # Initialize key variables
-        data = defaultdict(lambda: defaultdict(dict))
-        data[label]['base_type'] = base_type
-        data[label]['data'] = [[0, value, source]]
-
         # Update
-        self.populate(data)
+        columns = self.payload.label(label, base_type, label)
+        self.payload.append(columns, 0, value, source)
 
     def populate_named_tuple(self, named_tuple, prefix='', base_type=1):
         """Post system data to the central server.
@@ -316,15 +352,9 @@ class AgentReferenceSample(object):
             # for use by self.populate_dict
             new_label = ('%s_%s') % (prefix, label)
 
-            # Initialize data
-            data = defaultdict(lambda: defaultdict(dict))
-
-            # Add data
-            data[new_label]['data'] = [[0, value, None]]
-            data[new_label]['base_type'] = base_type
-
             # Update
-            self.populate(data)
+            columns = self.payload.label(new_label, base_type, new_label)
+            self.payload.append(columns, 0, value, None)
 
     def populate_dict(self, data_in, prefix='', base_type=1):
         """Populate agent with data that's a dict keyed by [label][source].
@@ -338,29 +368,15 @@ class AgentReferenceSample(object):
             None
 
         """
-        # Initialize data
-        data_input = deepcopy(data_in)
-
         # Iterate over labels
-        for label in data_input.keys():
-            # Initialize tuple list to use by agent.populate
-            value_sources = []
+        for label, sources in data_in.items():
             new_label = ('%s_%s') % (prefix, label)
+            columns = self.payload.label(new_label, base_type, new_label)
 
-            # Initialize data
-            data = defaultdict(lambda: defaultdict(dict))
-            data[new_label]['base_type'] = base_type
-
-            # Append to tuple list
+            # Add data
             # (Sorting is important to keep consistent ordering)
-            for source, value in sorted(data_input[label].items()):
-                value_sources.append(
-                    [source, value, source]
-                )
-            data[new_label]['data'] = value_sources
-
-            # Update
-            self.populate(data)
+            for source, value in sorted(sources.items()):
+                self.payload.append(columns, source, value, source)
 
     def polled_data(self):
         """Return that that should be posted.
@@ -369,52 +385,54 @@ class AgentReferenceSample(object):
             None
 
         Returns:
-            None
+            data: Data in the configured agent_payload_version format
 
         """
         # Return
-        return self.data
+        data = self.payload.data(self.data, self.payload_version)
+        return data
 
     def post(self, save=True, data=None):
         """Post data to central server.
 
         Args:
-            save: When True, save data to cache directory if postinf fails
-            data: Data to post. If None, then uses self.data
+            save: When True, save data to cache directory if the server
+                can't accept it
+            data: Data to post. If None, then uses polled_data(). It is
+                only posted when its interval is over if agent_aggregate is
+                True
 
         Returns:
-            success: "True: if successful
+            success: "True: if successful, or if the data is held until the
+                end of its interval
 
         """
         # Initialize key variables
-        success = False
-        response = False
-        timestamp = self.data['timestamp']
         id_agent = self.data['id_agent']
 
-        # Create data to post
+        # Post data. The server may be too busy to accept it
         if data is None:
-            data = self.data
-
-        # Post data save to cache if this fails
-        try:
-            result = requests.post(self.url, json=data)
-            response = True
-        except:
-            if save is True:
-                # Create a unique very long filename to reduce risk of
-                devicehash = general.hashstring(self.data['devicename'], sha=1)
-                filename = ('%s/%s_%s_%s.json') % (
-                    self.cache_dir, timestamp, id_agent, devicehash)
-
-                # Save data
-                with open(filename, 'w') as f_handle:
-                    json.dump(data, f_handle)
+            data = self.polled_data()
+            if self.aggregate is True:
+                data = aggregate.aggregator(
+                    id_agent, self.data['devicename'],
+                    self.statistics).add(data)
+                if data is None:
+                    return True
+            if self.keyframe_interval > 0:
+                status_code = self._post_delta(data)
+            else:
+                status_code = self._post(self.url, data)
+        else:
+            status_code = self._post(self.url, data)
+        success = status_code == 200
+        self.retry_later = (
+            status_code is None or status_code in _RETRY_LATER)
 
-        # Define success
-        if response is True:
-            if result.status_code == 200:
-                success = True
+        # Spool the data if it must be posted again later
+        if self.retry_later is True and save is True:
+            devicehash = general.hashstring(self.data['devicename'], sha=1)
+            spool.spool(self.config, id_agent, devicehash).append(data)
 
         # Log message
         if success is True:
@@ -438,49 +456,386 @@ class AgentReferenceSample(object):
             None
 
         Returns:
-            success: "True: if successful
+            None
+
+        """
+        # Purge
+        _Purge(self).purge()
+
+    def _post_delta(self, data):
+        """Post the datapoints that changed since the last post.
+
+        A keyframe is posted instead when due, or straight away if the
+        server asks for one.
+
+        Args:
+            data: Complete data to post
+
+        Returns:
+            status_code: HTTP status code, None if the server was unreachable
 
         """
         # Initialize key variables
-        id_agent = self.data['id_agent']
+        sender = delta.sender(
+            self.data['id_agent'], self.data['devicename'],
+            self.keyframe_interval)
+
+        # Post
+        (body, headers) = sender.prepare(data)
+        status_code = self._post(self.url, body, headers)
+        if status_code == delta.RESEND:
+            sender.posted(data, headers, False)
+            (body, headers) = sender.prepare(data, keyframe=True)
+            status_code = self._post(self.url, body, headers)
+        sender.posted(data, headers, status_code == 200)
+
+        # Return
+        return status_code
+
+    def _post(self, url, data, extra_headers=None):
+        """Post data, compressing it if configured.
+
+        Args:
+            url: URL
+            data: Data to post
+            extra_headers: Dict of additional HTTP headers
+
+        Returns:
+            status_code: HTTP status code, None if the server was unreachable
+
+        """
+        # Initialize key variables
+        status_code = None
+        headers = {'Content-Type': 'application/json'}
+        if extra_headers is not None:
+            headers.update(extra_headers)
+        if self.encoding != 'identity':
+            headers['Content-Encoding'] = self.encoding
+        body = compression.compress(json.dumps(data).encode(), self.encoding)
+
+        # Post data
+        try:
+            result = self.session.post(url, data=body, headers=headers)
+            status_code = result.status_code
+        except:
+            pass
+
+        # Return
+        return status_code
+
+
+class _Purge(object):
+    """Post the spooled data and cache files of an agent to the server.
+
+    Data is posted in bulk, oldest first. The data of each device is posted
+    by a single thread so that the server receives it in timestamp order,
+    while agent_purge_threads devices are purged at once.
+
+    Spool segments are read sequentially, and the offset of the last record
+    posted is recorded in the index of the spool. Cache files written by
+    older agents are posted first. The timestamp of the last file posted
+    for each device is checkpointed before the files are deleted, so they
+    aren't posted again if purging is interrupted. Unreadable files are
+    moved to the "quarantine" sub-directory of the cache directory.
+
+    """
+
+    def __init__(self, agent):
+        """Method initializing the class.
+
+        Args:
+            agent: AgentReferenceSample object
+
+        Returns:
+            None
+
+        """
+        # Initialize key variables
+        self.agent = agent
+        self.id_agent = agent.data['id_agent']
+        self.quarantine_dir = os.path.join(agent.cache_dir, 'quarantine')
+        self.checkpoint_file = os.path.join(
+            agent.cache_dir, ('.purge_%s.json') % (self.id_agent))
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+        # Read the checkpoint
+        try:
+            self.checkpoint = compression.read_json(self.checkpoint_file)
+        except:
+            self.checkpoint = {}
+
+    def purge(self):
+        """Post the cache files.
+
+        Args:
+            None
+
+        Returns:
+            None
+
+        """
+        # Initialize key variables
+        devices = self._devices()
+        if bool(devices) is False:
+            return
 
-        # Add files in cache directory to list
-        filenames = [filename for filename in os.listdir(
-            self.cache_dir) if os.path.isfile(
-                os.path.join(self.cache_dir, filename))]
+        # Purge the devices
+        workers = min(len(devices), self.agent.purge_threads)
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for _ in executor.map(self._purge_device, devices.items()):
+                pass
 
-        # Read cache file
-        for filename in filenames:
-            # Only post files for our own UID value
-            if id_agent not in filename:
+    def _devices(self):
+        """Get the cache files of the agent.
+
+        Args:
+            None
+
+        Returns:
+            devices: Dict of lists of (timestamp, filepath) tuples sorted by
+                timestamp, keyed by the device part of the filename
+
+        """
+        # Initialize key variables
+        devices = {}
+
+        # Cache filenames are "<timestamp>_<id_agent>_<device>.json", and
+        # those of spool segments "<timestamp>_<id_agent>_<device>.seg"
+        for entry in os.scandir(self.agent.cache_dir):
+            if entry.is_file() is False:
+                continue
+            parts = compression.uncompressed_name(entry.name).split('_', 2)
+            if len(parts) != 3 or parts[1] != self.id_agent:
+                continue
+            try:
+                timestamp = int(parts[0])
+            except ValueError:
                 continue
+            device = os.path.splitext(parts[2])[0]
+            devices.setdefault(device, []).append((timestamp, entry.path))
+
+        # Return
+        for files in devices.values():
+            files.sort()
+        return devices
+
+    def _purge_device(self, item):
+        """Post the cache files of a device.
+
+        Args:
+            item: Tuple of the device and its list of (timestamp, filepath)
+
+        Returns:
+            None
+
+        """
+        # Initialize key variables
+        (device, files) = item
+
+        # Initialize key variables
+        segments = [
+            filepath for (_, filepath) in files
+            if filepath.endswith(spool.SUFFIX) is True]
+        files = [
+            (timestamp, filepath) for (timestamp, filepath) in files
+            if filepath.endswith(spool.SUFFIX) is False]
+
+        # Delete files posted before purging was interrupted
+        last = self.checkpoint.get(device)
+        if last is not None:
+            self._delete([
+                filepath for (timestamp, filepath) in files
+                if timestamp <= last])
+            files = [
+                (timestamp, filepath) for (timestamp, filepath) in files
+                if timestamp > last]
+
+        # Post the files in batches. Stop at the first failure so that the
+        # rest aren't posted out of order
+        for start in range(0, len(files), self.agent.bulk_size):
+            if self._stop.is_set() is True:
+                return
+            batch = []
+            for (timestamp, filepath) in files[
+                    start:start + self.agent.bulk_size]:
+                data = self._read(filepath)
+                if data is not None:
+                    batch.append((timestamp, filepath, data))
+            if bool(batch) is True and self._post(device, batch) is False:
+                return
+
+        # Post the spool segments
+        for filepath in segments:
+            if self._purge_segment(device, filepath) is False:
+                return
+
+    def _purge_segment(self, device, filepath):
+        """Post the records of a spool segment of a device.
 
-            # Get the full filepath for the cache file and post
-            filepath = os.path.join(self.cache_dir, filename)
-            with open(filepath, 'r') as f_handle:
-                try:
-                    data = json.load(f_handle)
-                except:
-                    # Log removal
-                    log_message = (
-                        'Error reading previously cached agent data file %s '
-                        'for agent %s. May be corrupted.'
-                        '') % (filepath, self.name())
-                    log.log2die(1064, log_message)
-
-            # Post file
-            success = self.post(save=False, data=data)
-
-            # Delete file if successful
-            if success is True:
-                os.remove(filepath)
-
-                # Log removal
-                log_message = (
-                    'Purging cache file %s after successfully '
-                    'contacting server %s'
-                    '') % (filepath, self.url)
-                log.log2info(1029, log_message)
+        Args:
+            device: Device part of the filenames
+            filepath: Segment file
+
+        Returns:
+            success: True if all records were posted
+
+        """
+        # Initialize key variables
+        segment = spool.spool(self.agent.config, self.id_agent, device)
+        records = segment.read(filepath)
+
+        # Post the records in batches, recording how far the segment has
+        # been posted after each
+        for start in range(0, len(records), self.agent.bulk_size):
+            if self._stop.is_set() is True:
+                return False
+            batch = [
+                (offset, data) for (offset, data) in records[
+                    start:start + self.agent.bulk_size] if data is not None]
+            count = self._send([data for (_, data) in batch])
+            if count < len(batch):
+                if bool(count) is True:
+                    segment.consumed(filepath, batch[count - 1][0])
+                return False
+            segment.consumed(
+                filepath, records[start:start + self.agent.bulk_size][-1][0])
+
+        # Delete segments that were already posted
+        if bool(records) is False:
+            segment.consumed(filepath)
+
+        # Return
+        return True
+
+    def _post(self, device, batch):
+        """Post a batch of cache files of a device.
+
+        Args:
+            device: Device part of the filenames
+            batch: List of (timestamp, filepath, data) tuples
+
+        Returns:
+            success: True if all files were posted
+
+        """
+        # Post
+        count = self._send([data for (_, _, data) in batch])
+        if bool(count) is True:
+            self._posted(device, batch[:count])
+
+        # Return
+        success = count == len(batch)
+        return success
+
+    def _send(self, posts):
+        """Post data, in bulk if the server has the bulk route.
+
+        Args:
+            posts: List of data dicts
+
+        Returns:
+            count: Number of data dicts posted, in order
+
+        """
+        # Initialize key variables
+        count = 0
+        if bool(posts) is False:
+            return count
+
+        # Post in bulk
+        url = ('%s/bulk') % (self.agent.url)
+        status_code = self.agent._post(url, posts)
+        if status_code == 200:
+            count = len(posts)
+
+        # Post one by one to servers without the bulk route
+        elif status_code in _NO_BULK:
+            for data in posts:
+                status_code = self.agent._post(self.agent.url, data)
+                if status_code != 200:
+                    break
+                count += 1
+
+        # Stop purging if the server can't accept any more
+        if status_code is None or status_code in _RETRY_LATER:
+            self._stop.set()
+
+        # Return
+        return count
+
+    def _posted(self, device, batch):
+        """Checkpoint and delete posted cache files.
+
+        Args:
+            device: Device part of the filenames
+            batch: List of (timestamp, filepath, data) tuples
+
+        Returns:
+            None
+
+        """
+        # Checkpoint
+        with self._lock:
+            self.checkpoint[device] = batch[-1][0]
+            compression.write_json(
+                self.checkpoint_file, self.checkpoint, 'identity')
+
+        # Delete
+        self._delete([filepath for (_, filepath, _) in batch])
+
+    def _delete(self, filepaths):
+        """Delete posted cache files.
+
+        Args:
+            filepaths: List of cache files
+
+        Returns:
+            None
+
+        """
+        # Delete files
+        for filepath in filepaths:
+            os.remove(filepath)
+
+            # Log removal
+            log_message = (
+                'Purging cache file %s after successfully '
+                'contacting server %s'
+                '') % (filepath, self.agent.url)
+            log.log2info(1029, log_message)
+
+    def _read(self, filepath):
+        """Read a cache file, quarantining it if it can't be read.
+
+        Args:
+            filepath: Cache file
+
+        Returns:
+            data: Cached data, None if unreadable
+
+        """
+        # Read
+        try:
+            data = compression.read_json(filepath)
+        except:
+            data = None
+
+        # Quarantine
+        if isinstance(data, dict) is False:
+            if os.path.exists(self.quarantine_dir) is False:
+                os.makedirs(self.quarantine_dir, mode=0o755)
+            os.rename(filepath, os.path.join(
+                self.quarantine_dir, os.path.basename(filepath)))
+            log_message = (
+                'Error reading previously cached agent data file %s '
+                'for agent %s. May be corrupted. Moved it to %s.'
+                '') % (filepath, self.agent.name(), self.quarantine_dir)
+            log.log2warning(1184, log_message)
+            data = None
+
+        # Return
+        return data
 
 
 def get_id_agent(config):
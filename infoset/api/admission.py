@@ -0,0 +1,161 @@
+"""infoset-ng database API. Admission control of agent posts."""
+
+# Standard imports
+import time
+import threading
+import collections
+
+# PIP libraries
+import redis
+
+# Infoset-ng imports
+from infoset.utils import log
+
+# Number of seconds the length of the ingest queue is cached for
+_DEPTH_TTL = 1.0
+
+
+class Admission(object):
+    """Shed agent posts at the API when ingesting falls behind.
+
+    Posts are rejected with HTTP 429 once the ingest queue holds
+    api_queue_high_water posts, until it has drained to api_queue_low_water
+    posts. They are rejected with HTTP 503 if the queue can't be reached.
+
+    Args:
+        None
+
+    Returns:
+        None
+
+    Methods:
+
+    """
+
+    def __init__(self, config, depth):
+        """Function for intializing the class.
+
+        Args:
+            config: Configuration object
+            depth: Function returning the number of posts in the ingest queue
+
+        Returns:
+            None
+
+        """
+        # Initialize key variables
+        self.depth = depth
+        self.high_water = config.api_queue_high_water()
+        self.low_water = config.api_queue_low_water()
+        self.retry_after = config.api_retry_after()
+        self.shedding = False
+        self._rejected = collections.Counter()
+        self._lock = threading.Lock()
+        self._depth = 0
+        self._checked = 0
+
+    def admit(self, id_agent):
+        """Determine whether to accept a post.
+
+        Args:
+            id_agent: Unique Identifier of the agent posting
+
+        Returns:
+            status: None if the post is accepted, otherwise the HTTP status
+                code to reject it with
+
+        """
+        # Initialize key variables
+        status = None
+
+        # Check the ingest queue
+        if self.high_water > 0:
+            try:
+                depth = self._queue_depth()
+            except redis.RedisError:
+                status = 503
+            else:
+                if self._shed(depth) is True:
+                    status = 429
+
+        # Return
+        if status is not None:
+            self.reject(id_agent)
+        return status
+
+    def reject(self, id_agent):
+        """Count a rejected post.
+
+        Args:
+            id_agent: Unique Identifier of the agent posting
+
+        Returns:
+            None
+
+        """
+        # Count
+        with self._lock:
+            self._rejected[id_agent] += 1
+
+    def rejected(self):
+        """Get the number of posts rejected by this process.
+
+        Args:
+            None
+
+        Returns:
+            result: Dict of counts keyed by id_agent
+
+        """
+        # Return
+        with self._lock:
+            result = dict(self._rejected)
+        return result
+
+    def _shed(self, depth):
+        """Determine whether to shed load.
+
+        Args:
+            depth: Number of posts in the ingest queue
+
+        Returns:
+            shedding: True if posts must be rejected
+
+        """
+        # Start or stop shedding load
+        with self._lock:
+            if self.shedding is False and depth >= self.high_water:
+                self.shedding = True
+                log_message = (
+                    'Ingest queue holds %s posts. Rejecting agent posts '
+                    'until it holds %s.') % (depth, self.low_water)
+                log.log2warning(1178, log_message)
+            elif self.shedding is True and depth <= self.low_water:
+                self.shedding = False
+                log_message = (
+                    'Ingest queue holds %s posts. Accepting agent posts '
+                    'again.') % (depth)
+                log.log2warning(1179, log_message)
+            shedding = self.shedding
+
+        # Return
+        return shedding
+
+    def _queue_depth(self):
+        """Get the number of posts in the ingest queue.
+
+        Args:
+            None
+
+        Returns:
+            depth: Number of posts
+
+        """
+        # Only query the queue every _DEPTH_TTL seconds
+        now = time.time()
+        if now - self._checked >= _DEPTH_TTL:
+            self._depth = self.depth()
+            self._checked = now
+
+        # Return
+        return self._depth
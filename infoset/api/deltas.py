@@ -0,0 +1,225 @@
+"""infoset-ng database API. Delta posts of agents."""
+
+# Standard imports
+import json
+import struct
+import threading
+
+# Infoset-ng imports
+from infoset.utils import codec
+from infoset.utils import delta
+from infoset.utils import log
+
+# Keys of the latest complete data of each device
+_KEY = 'infoset-ng:delta:%s:%s'
+
+# Sequence numbers of the post and its keyframe, stored before the data
+_STATE = struct.Struct('>qq')
+
+# Number of seconds the latest complete data of a device is kept for
+_TTL = 86400
+
+# Codec for decoding delta posts without compressing them first
+_PLAIN = codec.Codec()
+
+
+class Deltas(object):
+    """Rebuild complete agent data from delta posts.
+
+    The latest complete data of each device is stored with the sequence
+    numbers of its post and keyframe. Keyframes replace it. Delta posts
+    are merged into it if they are the next post of the same keyframe,
+    otherwise a keyframe is requested.
+
+    Args:
+        None
+
+    Returns:
+        None
+
+    Methods:
+
+    """
+
+    def __init__(self, store, codec_=None):
+        """Function for intializing the class.
+
+        Args:
+            store: Object with the set_raw() and get_raw() methods of
+                infoset.utils.redis.Redis. Such as LocalStore
+            codec_: Codec of the stored data. JSON if None
+
+        Returns:
+            None
+
+        """
+        # Initialize key variables
+        self.store = store
+        self.codec = codec_
+        if codec_ is None:
+            self.codec = _PLAIN
+
+    def receive(self, id_agent, headers, body, content_type):
+        """Process a post that may be a delta post.
+
+        Args:
+            id_agent: Unique Identifier of the agent posting
+            headers: HTTP headers of the post
+            body: Body of the post
+            content_type: Content type of the body
+
+        Returns:
+            (status, body, content_type): status is None if the post is
+                accepted, with the body and content type of the complete
+                data to queue. Otherwise it is the HTTP status code to
+                reject the post with
+
+        """
+        # Posts without a sequence number are complete
+        if delta.SEQUENCE not in headers:
+            return (None, body, content_type)
+        try:
+            (devicehash, sequence, keyframe) = _numbers(headers)
+        except ValueError:
+            return (400, None, None)
+        key = _KEY % (id_agent, devicehash)
+
+        # Keyframes are stored as they are
+        if sequence == keyframe:
+            self._save(
+                key, sequence, keyframe,
+                self.codec.encode_body(body, content_type))
+            return (None, body, content_type)
+
+        # Delta posts must follow the previous post of the same keyframe
+        state = self.store.get_raw(key)
+        if state is not None:
+            (previous, previous_keyframe) = _STATE.unpack_from(state)
+        if state is None or previous_keyframe != keyframe or (
+                previous + 1 != sequence):
+            log_message = (
+                'Delta post %s of keyframe %s from agent %s is out of '
+                'sequence. Requesting a keyframe.'
+                '') % (sequence, keyframe, id_agent)
+            log.log2debug(1192, log_message)
+            return (delta.RESEND, None, None)
+
+        # Rebuild the complete data
+        try:
+            data = delta.merge(
+                codec.decode(state[_STATE.size:]),
+                codec.decode(_PLAIN.encode_body(body, content_type)))
+        except (ValueError, TypeError, KeyError,
+                IndexError, AttributeError) as exception_error:
+            log_message = (
+                'Unable to rebuild delta post %s of keyframe %s from agent '
+                '%s. Error: "%s"'
+                '') % (sequence, keyframe, id_agent, exception_error)
+            log.log2warning(1193, log_message)
+            return (400, None, None)
+        self._save(key, sequence, keyframe, self.codec.encode(data))
+
+        # Return
+        return (None, json.dumps(data).encode(), 'application/json')
+
+    def _save(self, key, sequence, keyframe, value):
+        """Store the latest complete data of a device.
+
+        Args:
+            key: Key
+            sequence: Sequence number of the post
+            keyframe: Sequence number of its keyframe
+            value: Encoded data
+
+        Returns:
+            None
+
+        """
+        # Save
+        self.store.set_raw(
+            key, _STATE.pack(sequence, keyframe) + value, expire=_TTL)
+
+
+class LocalStore(object):
+    """Store the data of Deltas in this process, without Redis.
+
+    Values don't expire.
+
+    Args:
+        None
+
+    Returns:
+        None
+
+    Methods:
+
+    """
+
+    def __init__(self):
+        """Function for intializing the class.
+
+        Args:
+            None
+
+        Returns:
+            None
+
+        """
+        # Initialize key variables
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def set_raw(self, key, value, expire=None):
+        """Set a key.
+
+        Args:
+            key: Key
+            value: Encoded data
+            expire: Ignored
+
+        Returns:
+            None
+
+        """
+        with self._lock:
+            self._values[key] = value
+
+    def get_raw(self, key):
+        """Get a key.
+
+        Args:
+            key: Key
+
+        Returns:
+            value: Encoded data. None if the key doesn't exist
+
+        """
+        with self._lock:
+            value = self._values.get(key)
+        return value
+
+
+def _numbers(headers):
+    """Get the delta headers of a post.
+
+    Args:
+        headers: HTTP headers of the post
+
+    Returns:
+        (devicehash, sequence, keyframe): Hash of the devicename, and
+            sequence numbers of the post and its keyframe
+
+    """
+    # Initialize key variables
+    devicehash = headers.get(delta.DEVICE, '')
+    sequence = int(headers[delta.SEQUENCE])
+    keyframe = int(headers.get(delta.KEYFRAME, ''))
+
+    # Check them
+    if len(devicehash) != 40 or devicehash.strip('0123456789abcdef'):
+        raise ValueError('Invalid %s header' % delta.DEVICE)
+    if keyframe < 1 or sequence < keyframe:
+        raise ValueError('Invalid sequence numbers')
+
+    # Return
+    return (devicehash, sequence, keyframe)
@@ -2,24 +2,60 @@
 
 # Standard imports
 import json
+import uuid
 import celery
 import pprint
 
+# PIP imports
+import redis
+
 # Flask imports
-from flask import Blueprint, request, abort
+from flask import Blueprint, request, abort, jsonify
 from celery import Celery
+from celery.signals import worker_ready
 
 # Infoset-ng imports
-from infoset.utils import general
+from infoset.utils import codec
+from infoset.utils import compression
 from infoset.api import CONFIG
 from infoset.api import REDIS
 from infoset.cache import cache
+from infoset.cache import stream
+from infoset.cache import embedded
+from infoset.cache import validate
+from infoset.api import admission
+from infoset.api import deltas
 from infoset.utils import log
 
+# Content types of posts received in bulk with one post per line
+_NDJSON_TYPES = ['application/x-ndjson', 'application/jsonlines']
 
 # Define the POST global variable
 POST = Blueprint('POST', __name__)
 
+# Define the ingest stream or embedded ingest queue, if used
+STREAM = None
+QUEUE = None
+if CONFIG.api_ingest_mode() == 'stream':
+    STREAM = stream.IngestStream(CONFIG)
+elif CONFIG.api_ingest_mode() == 'embedded':
+    QUEUE = embedded.embedded(CONFIG)
+
+# Define the admission control of posts, based on the length of the queue
+if STREAM is not None:
+    ADMISSION = admission.Admission(CONFIG, STREAM.length)
+elif QUEUE is not None:
+    ADMISSION = admission.Admission(CONFIG, QUEUE.depth)
+else:
+    ADMISSION = admission.Admission(CONFIG, REDIS.pending)
+
+# Define the store of the complete data of agents posting deltas. Only the
+# embedded ingest queue runs without Redis
+if QUEUE is not None:
+    DELTAS = deltas.Deltas(deltas.LocalStore())
+else:
+    DELTAS = deltas.Deltas(REDIS, REDIS.codec)
+
 # Define celery instance
 celery = Celery("infoset", broker=CONFIG.redis_url(),
                 backend=CONFIG.redis_url())
@@ -27,56 +63,315 @@ celery = Celery("infoset", broker=CONFIG.redis_url(),
 
 @celery.task
 def process_cache(redis_key):
-    data = REDIS.get(redis_key)
+    data = REDIS.get_raw(redis_key)
     processed = cache.ProcessRedisCache(data)
 
 
+@celery.task
+def process_batch():
+    """Ingest the agent posts waiting in Redis in batches.
+
+    Posts are only deleted from Redis once ingested. Those of a batch that
+    fails are put back in front of the posts still waiting.
+
+    Args:
+        None
+
+    Returns:
+        None
+
+    """
+    # Initialize key variables
+    batch_size = CONFIG.celery_batch_size()
+
+    # Posts arriving from now on need another batch
+    REDIS.unschedule()
+
+    # Process batches until there are no more posts
+    while True:
+        redis_keys = REDIS.claim(batch_size)
+        if bool(redis_keys) is False:
+            break
+
+        # Keep the posts if they can't be ingested
+        try:
+            cache.ProcessRedisBatch(REDIS.get_many(redis_keys)).process()
+        except (Exception, SystemExit) as exception_error:
+            REDIS.requeue(redis_keys)
+            log_message = (
+                'Unable to ingest %s agent posts. They will be ingested with '
+                'the next batch. Error: "%s"'
+                '') % (len(redis_keys), exception_error)
+            log.log2warning(1206, log_message)
+            raise
+        REDIS.ack(redis_keys)
+
+
+@worker_ready.connect
+def _recover(**kwargs):
+    """Requeue the posts of a Celery worker that died while ingesting them.
+
+    Args:
+        kwargs: Arguments of the worker_ready signal
+
+    Returns:
+        None
+
+    """
+    # Requeue
+    if STREAM is None and QUEUE is None:
+        count = REDIS.recover()
+        if bool(count) is True:
+            log_message = (
+                'Requeued %s agent posts that were being ingested when '
+                'the Celery worker stopped.') % (count)
+            log.log2info(1207, log_message)
+
+
 @POST.route('/receive/<id_agent>', methods=['POST'])
 def receive(id_agent):
     """Function for handling /infoset/api/v1.0/receive/<id_agent> route.
 
+    The body of the POST is decompressed if it has a Content-Encoding, then
+    stored in Redis as it is. It is only decoded and validated by the
+    ingester. Depending on api_ingest_mode it is
+    added to the ingest stream, the embedded ingest queue, or ingested by
+    a Celery task.
+
+    Posts are rejected with HTTP 429 while ingesting is too far behind,
+    and with HTTP 503 if they can't be queued. Agents must then keep the
+    data and post it again later.
+
+    Delta posts are rebuilt into complete data before being queued. They
+    are rejected with HTTP 409 if they are out of sequence, and agents must
+    then post a keyframe.
+
     Args:
         id_agent: Unique Identifier of an Infoset Agent
 
     Returns:
         Text response of Received
 
+    """
+    # Shed load when ingesting is too far behind
+    status = ADMISSION.admit(id_agent)
+    if status is not None:
+        return _retry_later(status)
+
+    # Get the body of the incoming agent POST
+    body = _body()
+    if bool(body) is False:
+        abort(404)
+
+    # Make sure msgpack data can be decoded
+    content_type = request.mimetype
+    if content_type in codec.MSGPACK_TYPES and codec.msgpack is None:
+        abort(415)
+
+    # Rebuild the complete data of delta posts
+    try:
+        (status, body, content_type) = DELTAS.receive(
+            id_agent, request.headers, body, content_type)
+    except redis.RedisError as exception_error:
+        log_message = (
+            'Unable to rebuild delta post from agent %s. Error: "%s"'
+            '') % (id_agent, exception_error)
+        log.log2warning(1194, log_message)
+        return _retry_later(503)
+    if status == 409:
+        return ('Keyframe required', status)
+    if status is not None:
+        abort(status)
+
+    # Queue the post for the ingester
+    if _enqueue(id_agent, body, content_type) is False:
+        return _retry_later(503)
+
+    # Return
+    return 'OK'
+
+
+@POST.route('/receive/<id_agent>/bulk', methods=['POST'])
+def receive_bulk(id_agent):
+    """Function for handling /infoset/api/v1.0/receive/<id_agent>/bulk route.
+
+    Agents post the data they cached while the API was unreachable here,
+    as a JSON array of posts, or one post per line if the content type is
+    application/x-ndjson. The valid posts are queued as a single unit,
+    in timestamp order, and are ingested together.
+
+    Args:
+        id_agent: Unique Identifier of an Infoset Agent
+
+    Returns:
+        JSON with the number of posts accepted and rejected
+
+    """
+    # Shed load when ingesting is too far behind
+    status = ADMISSION.admit(id_agent)
+    if status is not None:
+        return _retry_later(status)
+
+    # Get the posts
+    body = _body()
+    if bool(body) is False:
+        abort(404)
+    try:
+        posts = _bulk_posts(body, request.mimetype)
+    except ValueError:
+        abort(400)
+
+    # Validate the posts together and sort them
+    valid = [data for data in posts if validate.payload_ok(data) is True]
+    valid.sort(key=lambda data: data['timestamp'])
+    if len(valid) < len(posts):
+        log_message = (
+            'Rejected %s invalid posts of %s received in bulk from agent %s.'
+            '') % (len(posts) - len(valid), len(posts), id_agent)
+        log.log2warning(1183, log_message)
+
+    # Queue the posts for the ingester as a single unit
+    if bool(valid) is True:
+        body = json.dumps(valid).encode()
+        if _enqueue(id_agent, body, 'application/json') is False:
+            return _retry_later(503)
+
+    # Return
+    return jsonify({
+        'accepted': len(valid), 'rejected': len(posts) - len(valid)})
+
+
+def _bulk_posts(body, content_type):
+    """Decode agent posts received in bulk.
+
+    Args:
+        body: Body of POST
+        content_type: Content type of the body
+
+    Returns:
+        posts: List of posts
+
+    """
+    # Decode
+    text = body.decode()
+    if content_type in _NDJSON_TYPES:
+        posts = [
+            json.loads(line) for line in text.splitlines()
+            if bool(line.strip()) is True]
+    else:
+        posts = json.loads(text)
+        if isinstance(posts, list) is False:
+            raise ValueError('Bulk posts must be a JSON array')
+
+    # Return
+    return posts
+
+
+def _enqueue(id_agent, body, content_type):
+    """Queue the body of an agent post, counting it if rejected.
+
+    Args:
+        id_agent: Unique Identifier of an Infoset Agent
+        body: Body of POST
+        content_type: Content type of the body
+
+    Returns:
+        success: True if queued
+
+    """
+    # Queue
+    try:
+        _queue(id_agent, body, content_type)
+    except redis.RedisError as exception_error:
+        log_message = (
+            'Unable to queue post from agent %s. Error: "%s"'
+            '') % (id_agent, exception_error)
+        log.log2warning(1180, log_message)
+        ADMISSION.reject(id_agent)
+        return False
+
+    # Return
+    return True
+
+
+def _body():
+    """Get the body of the incoming agent POST, decompressing it.
+
+    Args:
+        None
+
+    Returns:
+        body: Body of POST
+
     """
     # Initialize key variables
-    found_count = 0
+    limit = CONFIG.api_max_body_size()
+    encoding = request.headers.get('Content-Encoding', 'identity').lower()
+
+    # Reject bodies that can't be decompressed, or are too large
+    if encoding not in compression.encodings():
+        abort(415)
+    if request.content_length is not None and request.content_length > limit:
+        abort(413)
+
+    # Decompress
+    try:
+        body = compression.decompress(request.stream, encoding, limit)
+    except ValueError:
+        abort(400)
+    if body is None:
+        abort(413)
+
+    # Return
+    return body
+
+
+def _queue(id_agent, body, content_type):
+    """Queue the body of an agent post for the ingester.
 
-    # Read configuration
-    cache_dir = CONFIG.ingest_cache_directory()
+    Args:
+        id_agent: Unique Identifier of an Infoset Agent
+        body: Body of POST
+        content_type: Content type of the body
+
+    Returns:
+        None
 
-    # Get JSON from incoming agent POST
-    data = request.json
-    # Make sure all the important keys are available
-    keys = ['timestamp', 'id_agent', 'devicename']
-    for key in keys:
-        if key in data:
-            found_count += 1
+    """
+    # Use the ingest stream or embedded queue if configured
+    if STREAM is not None:
+        STREAM.add(body, content_type)
+        return
+    if QUEUE is not None:
+        QUEUE.put(body, content_type)
+        return
 
     # Do processing
-    if found_count == 3:
-        # Extract key values from posting
-        try:
-            timestamp = int(data['timestamp'])
-        except:
-            abort(404)
-        id_agent = data['id_agent']
-        devicename = data['devicename']
+    redis_key = ('%s-%s') % (id_agent, uuid.uuid4().hex)
+    REDIS.set_body(redis_key, body, content_type)
 
-        # Create a hash of the devicename
-        device_hash = general.hashstring(devicename, sha=1)
+    # Ingest the post with the others received within celery_batch_linger
+    # seconds, or straight away if there are enough for a batch
+    length = REDIS.push(redis_key)
+    linger = CONFIG.celery_batch_linger()
+    if length % CONFIG.celery_batch_size() == 0:
+        process_batch.delay()
+    elif REDIS.schedule(linger) is True:
+        process_batch.apply_async(countdown=linger)
 
-        redis_key = (
-            '%s-%s-%s') % (timestamp, id_agent, device_hash)
-        REDIS.set(redis_key, data)
 
-        result = process_cache.delay(redis_key)
+def _retry_later(status):
+    """Create the response rejecting an agent post.
 
-        # Return
-        return 'OK'
+    Args:
+        status: HTTP status code
 
-    else:
-        abort(404)
+    Returns:
+        response: Response tuple with a Retry-After header
+
+    """
+    # Return
+    response = (
+        'Retry later', status,
+        {'Retry-After': str(ADMISSION.retry_after)})
+    return response
@@ -1,7 +1,12 @@
 """infoset-ng database API. Get Version."""
 
 # Flask imports
-from flask import Blueprint
+from flask import Blueprint, jsonify
+
+# Infoset-ng imports
+from infoset.api import CONFIG
+from infoset.api.post import ADMISSION
+from infoset.cache import cache
 
 # Define the STATUS global variable
 STATUS = Blueprint('STATUS', __name__)
@@ -20,3 +25,34 @@ def index():
     """
     # Return
     return 'Infoset API v1.0 Operational.\n'
+
+
+@STATUS.route('/status/rejected')
+def rejected():
+    """Function for handling /status/rejected route.
+
+    Args:
+        None
+
+    Returns:
+        Number of agent posts rejected by this API process, by id_agent
+
+    """
+    # Return
+    return jsonify(ADMISSION.rejected())
+
+
+@STATUS.route('/status/writer')
+def writer():
+    """Function for handling /status/writer route.
+
+    Args:
+        None
+
+    Returns:
+        Number of database busy errors, and seconds spent waiting to retry,
+            of the ingest writer of each running ingester
+
+    """
+    # Return
+    return jsonify(cache.writer_status(CONFIG))
@@ -3,11 +3,15 @@
 
 # Standard libraries
 import os
+import json
 import time
 import shutil
-from collections import defaultdict
-from multiprocessing import Pool
-import re
+import socket
+import queue
+import threading
+from itertools import chain
+from collections import defaultdict, deque, OrderedDict
+from multiprocessing import Pool, SimpleQueue
 import pymysql
 
 # PIP libraries
@@ -15,18 +19,29 @@ from sqlalchemy import and_
 
 # Infoset libraries
 from infoset.db import db
-from infoset.db.db_orm import Data, Datapoint, Agent, Device, DeviceAgent
+from infoset.db.db_orm import Datapoint, Agent, Device, DeviceAgent
 from infoset.db.db_orm import AgentName
 from infoset.db import db_agent
 from infoset.db import db_agentname
+from infoset.db import db_data
+from infoset.db import db_datapoint
 from infoset.db import db_device
+from infoset.db import db_identity
 from infoset.db import db_deviceagent
+from infoset.utils import codec
+from infoset.utils import spool
 from infoset.utils import configuration
 from infoset.utils import general
 from infoset.utils import log
 from infoset.cache import drain
+from infoset.cache import validate
+from infoset.cache import lease
+from infoset.cache import watcher as cache_watcher
 from infoset.utils import daemon
 
+# Marker queued to wait for the ingest writer
+_FLUSH = 'flush'
+
 
 class _ProcessAgentCache(object):
     """Processes cache files from a single agent.
@@ -35,11 +50,13 @@ class _ProcessAgentCache(object):
 
     Methodology:
 
-    1)  JSON data from each successive cache file is converted to a series
-        of dicts using the Drain class in infoset.cache.drain
+    1)  JSON data from each successive cache file, or from each record of
+        successive agent spool segments, is converted to a series of dicts
+        using the Drain class in infoset.cache.drain
 
     2)  Data from invalid files are discarded and moved to a failure
-        directory for future analysis.
+        directory for future analysis. Invalid records of segments are
+        discarded.
 
     3)  The timestamp of the ingester's PID file is updated with each valid
         file found.
@@ -62,48 +79,118 @@ class _ProcessAgentCache(object):
 
     """
 
-    def __init__(self, config, metadata, ingester_agent_name):
+    def __init__(
+            self, config, metadata, ingester_agent_name, batches=None):
         """Initialize the class.
 
         args:
             config: Config object
             metadata: Metadata
             ingester_agent_name: Ingester's agent name
+            batches: Queue of a _Writer to pass batches of data to, instead
+                of writing them to the database
 
         """
         self.config = config
         self.metadata = metadata
         self.ingester_agent_name = ingester_agent_name
+        self.batches = batches
 
     def process(self):
-        """Update the database using threads."""
+        """Update the database using threads.
+
+        Files are read in timestamp order. Their data is written to the
+        database in batches of at most ingest_flush_files posts or
+        ingest_flush_datapoints datapoints. Memory usage therefore doesn't
+        depend on the size of the backlog. Files are purged with the batch
+        holding the last of their data.
+
+        Args:
+            None
+
+        Returns:
+            success: True if successful, None if there was nothing to do
+
+        """
         # Initialize key variables
-        do_update = False
         success = None
-        ingests = []
-        agent_data = {
-            'devicename': None,
-            'id_agent': None,
-            'sources': [],
-            'timeseries': [],
-            'timefixed': [],
-            'max_timestamp': 0
-        }
+        filepaths = []
+        posts = 0
+        datapoints = 0
+        agent_data = _agent_data()
+        flush_files = self.config.ingest_flush_files()
+        flush_datapoints = self.config.ingest_flush_datapoints()
+
+        # Process file for each timestamp, starting from the oldest file
+        for (ingest, filepath) in self._ingests():
+            # Append data
+            if ingest is not None:
+                _append(agent_data, ingest)
+                posts += 1
+                datapoints += len(ingest.sources())
+            if filepath is not None:
+                filepaths.append(filepath)
+
+            # Write the batch to the database if it's big enough
+            if posts >= flush_files or datapoints >= flush_datapoints:
+                success = _success(
+                    success, self._flush(agent_data, filepaths, posts))
+                filepaths = []
+                posts = 0
+                datapoints = 0
+                agent_data = _agent_data()
+
+        # Process the rest
+        if bool(posts) is True:
+            success = _success(
+                success, self._flush(agent_data, filepaths, posts))
+        else:
+            for filepath in filepaths:
+                drain.purge(filepath)
 
+        # Return
+        return success
+
+    def _ingests(self):
+        """Read cache files in timestamp order.
+
+        Args:
+            None
+
+        Returns:
+            None
+
+        Yields:
+            (ingest, filepath): Drain object of each valid file or segment
+                record, None if a segment has no more valid records. The
+                file to purge once the Drain has been ingested, None if
+                more records of the segment follow
+
+        """
         # Get the directory to which failed files will be moved
         failure_directory = self.config.ingest_failures_directory()
 
-        # Get start time for activity
-        start_ts = time.time()
+        # Get the PID file for the agent
+        pid_file = daemon.pid_file(self.ingester_agent_name)
 
-        # Process file for each timestamp, starting from the oldes file
-        for data_dict in self.metadata:
+        # Validate all the files of the agent as a batch, so that the
+        # database is only queried once for duplicate detection
+        batch = validate.ValidateBatch()
+
+        # Process file for each timestamp, starting from the oldest file
+        for data_dict in sorted(
+                self.metadata, key=lambda item: item['timestamp']):
             # Initialize key variables
-            timestamp = data_dict['timestamp']
             filepath = data_dict['filepath']
 
+            # Read the records of agent spool segments
+            if filepath.endswith(spool.SUFFIX) is True:
+                for item in self._segment_ingests(filepath, batch):
+                    yield item
+                continue
+
             # Read in data
-            ingest = drain.Drain(filepath)
+            ingest = drain.Drain(filepath, batch=batch)
 
             # Make sure file is OK
             # Move it to a directory for further analysis
@@ -113,31 +200,11 @@ class _ProcessAgentCache(object):
                     'Cache ingest file %s is invalid. Moving.'
                     '') % (filepath)
                 log.log2warning(1054, log_message)
-                shutil.copy(filepath, failure_directory)
-                os.remove(filepath)
+                if os.path.isfile(filepath) is True:
+                    shutil.copy(filepath, failure_directory)
+                    os.remove(filepath)
                 continue
 
-            # Append data
-            agent_data['timeseries'].extend(ingest.timeseries())
-            agent_data['timefixed'].extend(ingest.timefixed())
-            agent_data['sources'].extend(ingest.sources())
-
-            # Append ingest object to a list for later processing
-            ingests.append(ingest)
-
-            # Update information that doesn't change
-            if do_update is False:
-                agent_data['devicename'] = ingest.devicename()
-                agent_data['id_agent'] = ingest.id_agent()
-                agent_data['agent_name'] = ingest.agent()
-
-                # Get the PID file for the agent
-                pid_file = daemon.pid_file(self.ingester_agent_name)
-            else:
-                # Get the max timestamp
-                agent_data['max_timestamp'] = max(
-                    timestamp, agent_data['max_timestamp'])
-
             # Update the PID file for the agent to ensure agentd.py
             # doesn't kill the ingest while processing a long stream
             # of files. If we are running this using __main__ = process()
@@ -145,53 +212,122 @@ class _ProcessAgentCache(object):
             if os.path.isfile(pid_file) is True:
                 daemon.update_pid(self.ingester_agent_name)
 
-            # Update update flag
-            do_update = True
+            yield (ingest, filepath)
 
-        # Process the rest
-        if do_update is True:
-            # Upadate and note success
-            (success, datapoints_processed) = self._do_update(
-                agent_data, ingests)
-
-            # Log duration of activity
-            duration = time.time() - start_ts
-            if success is True:
-                log_message = (
-                    'Agent %s was processed from %s cache files in %s '
-                    'seconds (%s seconds/file, %s seconds/datapoint)'
-                    '') % (
-                        agent_data['id_agent'],
-                        len(ingests),
-                        round(duration, 4),
-                        round(duration / len(ingests), 4),
-                        round(duration / datapoints_processed, 6))
-                log.log2info(1007, log_message)
-            else:
-                log_message = (
-                    'Failed to process all cache files for agent %s. '
-                    'Investigate.') % (
-                        agent_data['id_agent'])
-                log.log2info(1008, log_message)
+    def _segment_ingests(self, filepath, batch):
+        """Read the records of an agent spool segment.
+
+        Args:
+            filepath: Segment file
+            batch: ValidateBatch object
+
+        Returns:
+            None
+
+        Yields:
+            (ingest, filepath): As for _ingests()
 
-    def _do_update(self, agent_data, ingests):
+        """
+        # Initialize key variables
+        pid_file = daemon.pid_file(self.ingester_agent_name)
+        ingest = None
+
+        # Read the records, holding back each valid one until the next is
+        # found so that the last can be yielded with the filepath
+        try:
+            for (_, data) in spool.records(filepath):
+                if data is None:
+                    continue
+                record = drain.Drain(filepath, data=data, batch=batch)
+                if record.valid() is False:
+                    log_message = (
+                        'Record of spool segment %s is invalid. Skipping.'
+                        '') % (filepath)
+                    log.log2warning(1187, log_message)
+                    continue
+                if os.path.isfile(pid_file) is True:
+                    daemon.update_pid(self.ingester_agent_name)
+                if ingest is not None:
+                    yield (ingest, None)
+                ingest = record
+        except OSError as exception_error:
+            log_message = (
+                'Unable to read spool segment %s: %s'
+                '') % (filepath, exception_error)
+            log.log2warning(1188, log_message)
+            return
+
+        # Return
+        yield (ingest, filepath)
+
+    def _flush(self, agent_data, filepaths, posts):
+        """Write a batch of data to the database and purge its files.
+
+        Args:
+            agent_data: Agent data from successive Drains
+            filepaths: List of files from which all the data was read
+            posts: Number of Drains in the agent data
+
+        Returns:
+            success: True if successful
+
+        """
+        # Leave writing the batch, and purging its files, to the writer
+        if self.batches is not None:
+            self.batches.put((agent_data, filepaths, posts))
+            return True
+
+        # Get start time for activity
+        start_ts = time.time()
+
+        # Upadate and note success
+        (success, datapoints_processed,
+         rows_per_second) = self._do_update(agent_data, filepaths)
+
+        # Log duration of activity
+        duration = time.time() - start_ts
+        if success is True:
+            log_message = (
+                'Agent %s was processed from %s cached posts in %s '
+                'seconds (%s seconds/post, %s seconds/datapoint, '
+                '%s rows/second inserted, %s identity cache hit rate, '
+                '%s datapoint ID cache hit rate)'
+                '') % (
+                    agent_data['id_agent'],
+                    posts,
+                    round(duration, 4),
+                    round(duration / posts, 4),
+                    round(duration / max(1, datapoints_processed), 6),
+                    round(rows_per_second, 2),
+                    round(db_identity.identity_map().hit_rate(), 4),
+                    round(drain.id_datapoint_cache_info()['hit_rate'], 4))
+            log.log2info(1007, log_message)
+        else:
+            log_message = (
+                'Failed to process all cache files for agent %s. '
+                'Investigate.') % (
+                    agent_data['id_agent'])
+            log.log2info(1008, log_message)
+
+        # Return
+        return success
+
+    def _do_update(self, agent_data, filepaths):
         """Update the database using threads."""
         # Initialize key variables
         max_timestamp = agent_data['max_timestamp']
 
-        # Add datapoints to the database
+        # Add datapoints to the database and get the latest datapoints
         db_prepare = _PrepareDatabase(agent_data)
-        db_prepare.add_datapoints()
-
-        # Get the latest datapoints
-        datapoints = db_prepare.get_datapoints()
+        datapoints = db_prepare.add_datapoints()
 
         # Get the assigned index values for the device and agent
         idx_device = db_prepare.idx_device()
         idx_agent = db_prepare.idx_agent()
 
         # Update database with data
-        db_update = _UpdateDB(agent_data, datapoints)
+        db_update = _UpdateDB(
+            agent_data, datapoints, self.config.ingest_batch_size())
         success = db_update.update()
 
         #####################################################################
@@ -215,65 +351,185 @@ class _ProcessAgentCache(object):
         # success of database updates. If not we could lose data in the
         # event of an ingester crash. Ingester would re-read the files
         # and process the non-duplicates, while deleting the duplicates.
-        for ingest in ingests:
-            ingest.purge()
+        for filepath in filepaths:
+            drain.purge(filepath)
 
         # Return
-        return (success, len(datapoints))
+        return (success, len(datapoints), db_update.rows_per_second())
+
+
+def _agent_data():
+    """Create an empty dict for agent data from successive Drains.
+
+    Args:
+        None
+
+    Returns:
+        agent_data: Dict of agent data
+
+    """
+    # Return
+    agent_data = {
+        'devicename': None,
+        'id_agent': None,
+        'sources': [],
+        'timeseries': [],
+        'timefixed': [],
+        'max_timestamp': 0
+    }
+    return agent_data
+
+
+def _append(agent_data, ingest):
+    """Append the data of a Drain to agent data.
+
+    Args:
+        agent_data: Agent data from successive Drains
+        ingest: Drain object
+
+    Returns:
+        None
+
+    """
+    # Append data
+    agent_data['timeseries'].extend(ingest.timeseries())
+    agent_data['timefixed'].extend(ingest.timefixed())
+    agent_data['sources'].extend(ingest.sources())
+
+    # Update information that doesn't change
+    agent_data['devicename'] = ingest.devicename()
+    agent_data['id_agent'] = ingest.id_agent()
+    agent_data['agent_name'] = ingest.agent()
+
+    # Get the max timestamp
+    agent_data['max_timestamp'] = max(
+        ingest.timestamp(), agent_data['max_timestamp'])
+
+
+def _success(previous, current):
+    """Combine the success of successive database updates.
+
+    Args:
+        previous: Success so far. None if nothing has been done yet
+        current: Success of the latest update
+
+    Returns:
+        success: False if any update failed
+
+    """
+    # Return
+    if previous is False:
+        success = False
+    else:
+        success = current
+    return success
 
 
 class ProcessRedisCache(object):
 
     def __init__(self, data):
-        do_update = False
-        success = None
-        agent_data = {
-            'devicename': None,
-            'id_agent': None,
-            'sources': [],
-            'timeseries': [],
-            'timefixed': [],
-            'max_timestamp': 0
-        }
+        """Ingest agent data posted to the API.
+
+        Args:
+            data: Data dict, or data encoded by infoset.utils.codec
 
-        ingest = drain.Drain(filename=None, data=data)
+        Returns:
+            None
 
-        if ingest.valid() is False:
+        """
+        # Process
+        self.success = ProcessRedisBatch([data]).process()
+
+
+class ProcessRedisBatch(object):
+    """Ingest a batch of agent data posted to the API.
+
+    The data is grouped by device and agent. The data of each group is
+    written to the database by a single pass of _PrepareDatabase and
+    _UpdateDB, instead of one pass per post.
+
+    """
+
+    def __init__(self, values):
+        """Initialize the class.
+
+        Args:
+            values: List of data dicts, or lists of data dicts posted in
+                bulk. Either may be encoded by infoset.utils.codec. None
+                values are ignored.
+
+        Returns:
+            None
+
+        """
+        self.values = values
+
+    def process(self):
+        """Update the database.
+
+        Args:
+            None
+
+        Returns:
+            success: True if successful, None if there was nothing to do
+
+        """
+        # Initialize key variables
+        success = None
+        groups = OrderedDict()
+        batch = validate.ValidateBatch()
+        start_ts = time.time()
+
+        # Group the data by device and agent
+        for value in self.values:
+            for ingest in _redis_ingests(value, batch):
+                key = (ingest.id_agent(), ingest.devicename())
+                if key in groups:
+                    groups[key].append(ingest)
+                else:
+                    groups[key] = [ingest]
+
+        # Update the database with the data of each group
+        for ingests in groups.values():
+            agent_data = _agent_data()
+            for ingest in ingests:
+                _append(agent_data, ingest)
+            (result, _, _) = self._do_update(agent_data)
+            success = _success(success, result)
+
+        # Log duration of activity
+        if bool(groups) is True:
             log_message = (
-                'Cache data at timestamp %s is invalid. Moving.'
-                '') % (ingest.timestamp())
-            log.log2warning(1054, log_message)
-        else:
-            agent_data['timeseries'] = ingest.timeseries()
-            agent_data['timefixed'] = ingest.timefixed()
-            agent_data['sources'] = ingest.sources()
-            agent_data['devicename'] = ingest.devicename()
-            agent_data['id_agent'] = ingest.id_agent()
-            agent_data['agent_name'] = ingest.agent()
-            agent_data['max_timestamp'] = ingest.timestamp()
-
-            # Upadate and note success
-            (success, datapoints_processed) = self._do_update(
-                agent_data)
+                'Ingested %s posts for %s device agents in %s seconds '
+                '(%s identity cache hit rate, %s datapoint ID cache hit '
+                'rate).'
+                '') % (
+                    sum(len(ingests) for ingests in groups.values()),
+                    len(groups),
+                    round(time.time() - start_ts, 4),
+                    round(db_identity.identity_map().hit_rate(), 4),
+                    round(drain.id_datapoint_cache_info()['hit_rate'], 4))
+            log.log2debug(1169, log_message)
+
+        # Return
+        return success
 
     def _do_update(self, agent_data):
         """Update the database using threads."""
         # Initialize key variables
         max_timestamp = agent_data['max_timestamp']
 
-        # Add datapoints to the database
+        # Add datapoints to the database and get the latest datapoints
         db_prepare = _PrepareDatabase(agent_data)
-        db_prepare.add_datapoints()
-
-        # Get the latest datapoints
-        datapoints = db_prepare.get_datapoints()
+        datapoints = db_prepare.add_datapoints()
 
         # Get the assigned index values for the device and agent
         idx_device = db_prepare.idx_device()
         idx_agent = db_prepare.idx_agent()
 
         # Update database with data
-        db_update = _UpdateDB(agent_data, datapoints)
+        db_update = _UpdateDB(
+            agent_data, datapoints, _config().ingest_batch_size())
         success = db_update.update()
 
         #####################################################################
@@ -293,13 +549,60 @@ class ProcessRedisCache(object):
         update_timestamps.deviceagent()
         update_timestamps.datapoint()
 
-        # Purge source files. Only done after complete
-        # success of database updates. If not we could lose data in the
-        # event of an ingester crash. Ingester would re-read the files
-        # and process the non-duplicates, while deleting the duplicates.
-
         # Return
-        return (success, len(datapoints))
+        return (success, len(datapoints), db_update.rows_per_second())
+
+
+def _redis_ingests(value, batch):
+    """Create Drain objects for agent data posted to the API.
+
+    Args:
+        value: Data dict, or list of data dicts posted in bulk. Either may
+            be encoded by infoset.utils.codec
+        batch: ValidateBatch object
+
+    Returns:
+        ingests: List of Drain objects for the valid data
+
+    """
+    # Ignore keys that have expired
+    if value is None:
+        return []
+
+    # Decode data encoded by infoset.utils.codec
+    if isinstance(value, (bytes, str)) is True:
+        try:
+            value = codec.decode(value)
+        except ValueError as exception_error:
+            log_message = (
+                'Redis cache data is invalid. Error: "%s"'
+                '') % (exception_error)
+            log.log2warning(1168, log_message)
+            return []
+
+    # Data posted in bulk is ingested in the order it was queued
+    if isinstance(value, list) is True:
+        items = value
+    else:
+        items = [value]
+
+    # Validate
+    ingests = []
+    for item in items:
+        ingest = drain.Drain(filename=None, data=item, batch=batch)
+        if ingest.valid() is False:
+            if isinstance(item, dict) is True:
+                timestamp = item.get('timestamp')
+            else:
+                timestamp = None
+            log_message = (
+                'Cache data at timestamp %s is invalid.') % (timestamp)
+            log.log2warning(1054, log_message)
+            continue
+        ingests.append(ingest)
+
+    # Return
+    return ingests
 
 
 class _PrepareDatabase(object):
@@ -325,12 +628,28 @@ class _PrepareDatabase(object):
         """
         # Initialize key variables
         self.agent_data = agent_data
+        self._enabled = False
+
         # Update Agent, Device and DeviceAgent database tables if
         # Device and agent are not already there
         self._idx_agent = self.idx_agent()
         self._idx_device = self.idx_device()
-        self._idx_deviceagent = db_deviceagent.GetDeviceAgent(
-            self._idx_device, self._idx_agent).idx_deviceagent()
+        self._idx_deviceagent = db_deviceagent.idx_deviceagent(
+            self._idx_device, self._idx_agent)
+
+    def idx_deviceagent(self):
+        """Get the index of the DeviceAgent of the agent data.
+
+        Args:
+            None
+
+        Returns:
+            value: DeviceAgent index
+
+        """
+        # Return
+        value = self._idx_deviceagent
+        return value
 
     def idx_agent(self):
         """Insert new agent into database if necessary.
@@ -352,6 +671,7 @@ class _PrepareDatabase(object):
         # Return if agent already exists in the table
         if agent_data.exists() is True:
             idx_agent = agent_data.idx_agent()
+            self._enabled = agent_data.enabled()
             return idx_agent
 
         # Get information on agent from database
@@ -388,6 +708,7 @@ class _PrepareDatabase(object):
         # Get idx_agent value from database
         new_agent_data = db_agent.GetIDAgent(id_agent)
         idx_agent = new_agent_data.idx_agent()
+        self._enabled = new_agent_data.enabled()
         return idx_agent
 
     def idx_device(self):
@@ -434,38 +755,90 @@ class _PrepareDatabase(object):
     def add_datapoints(self):
         """Add new datapoints to the database.
 
+        All unseen datapoints are inserted in a single transaction.
+        Datapoints added simultaneously by other processes are ignored.
+
         Args:
             None
 
         Returns:
-            None
+            dp_metadata: Refreshed dict of enabled datapoints. The format is
+                the same as that returned by get_datapoints()
 
         """
         # Initialize key variables
-        new_datapoint_ids = []
+        idx_deviceagent = self._idx_deviceagent
+        new_datapoints = {}
+
+        # Create map of DIDs to database row index values
+        dp_metadata = self.get_datapoints()
 
         # Add newly found datapoints to database if agent is enabled
-        agent_object = db_agent.GetIDXAgent(self._idx_agent)
-        if agent_object.enabled() is True:
-            # Create map of DIDs to database row index values
-            dp_metadata = self.get_datapoints()
-
-            # Update datapoint metadata if not there
-            # Use a dictionary query versus individual database calls
-            # which was slow.
-            for source in self.agent_data['sources']:
-                id_datapoint = source['id_datapoint']
-                if id_datapoint not in dp_metadata:
-                    # This is a protection against the scenario where
-                    # the very first contact from an agent is a result
-                    # of a stream of data postings of cached data.
-                    # The datapoints are not originally in the database
-                    # and so there is the risk of duplicate insertions
-                    if id_datapoint not in new_datapoint_ids:
-                        self._add_datapoint(source)
-
-                        # Note the datapoint that was added
-                        new_datapoint_ids.append(id_datapoint)
+        if self._enabled is False:
+            return dp_metadata
+
+        # Update datapoint metadata if not there
+        # Use a dictionary query versus individual database calls
+        # which was slow.
+        for source in self.agent_data['sources']:
+            id_datapoint = source['id_datapoint']
+            if id_datapoint not in dp_metadata:
+                # This is a protection against the scenario where
+                # the very first contact from an agent is a result
+                # of a stream of data postings of cached data.
+                # The datapoints are not originally in the database
+                # and so there is the risk of duplicate insertions
+                if id_datapoint not in new_datapoints:
+                    new_datapoints[id_datapoint] = {
+                        'id_datapoint': general.encode(id_datapoint),
+                        'idx_deviceagent': idx_deviceagent,
+                        'agent_label': general.encode(source['agent_label']),
+                        'agent_source': general.encode(
+                            source['agent_source']),
+                        'base_type': source['base_type']}
+
+        # Return if there is nothing to do
+        if bool(new_datapoints) is False:
+            return dp_metadata
+
+        # Insert the datapoints and read back the result in one transaction
+        statement = Datapoint.__table__.insert().prefix_with(
+            'OR IGNORE', dialect='sqlite')
+        database = db.Database()
+        session = database.session()
+        try:
+            session.execute(statement, list(new_datapoints.values()))
+            dp_metadata = self._datapoints(session)
+            session.commit()
+
+        except Exception as exception_error:
+            session.rollback()
+            if db.busy(exception_error) is True:
+                database.close()
+                raise db.DatabaseBusy(
+                    str(exception_error)) from exception_error
+            log_message = (
+                'Unable to modify database connection. '
+                'Error: \"%s\"') % (exception_error)
+            log.log2die(1082, log_message)
+        except:
+            session.rollback()
+            log_message = ('Unexpected database exception')
+            log.log2die(1082, log_message)
+
+        # Return the session to the database pool after processing
+        database.close()
+
+        # Log
+        log_message = (
+            'Added %s new datapoints for agent %s, device %s.'
+            '') % (
+                len(new_datapoints),
+                self.agent_data['id_agent'], self.agent_data['devicename'])
+        log.log2debug(1151, log_message)
+
+        # Return
+        return dp_metadata
 
     def get_datapoints(self):
         """Create dict of enabled datapoints and their corresponding indices.
@@ -479,18 +852,39 @@ class _PrepareDatabase(object):
                 idx: Datapoint index
                 idx_agent: Agent index
                 last_timestamp: The last time the timestamp was updated
+                timefixed_value: Encoded timefixed value in the database
+
+        """
+        # Update database
+        database = db.Database()
+        session = database.session()
+        data = self._datapoints(session)
+
+        # Return the session to the database pool after processing
+        database.close()
+
+        # Return
+        return data
+
+    def _datapoints(self, session):
+        """Query enabled datapoints of the deviceagent.
+
+        Args:
+            session: Database session to use
+
+        Returns:
+            data: Dict in the format returned by get_datapoints()
 
         """
         # Initialize key variables
         idx_deviceagent = self._idx_deviceagent
         data = {}
 
-        # Update database
-        database = db.Database()
-        session = database.session()
+        # Query database
         result = session.query(
             Datapoint.id_datapoint, Datapoint.idx_datapoint,
-            Datapoint.idx_deviceagent, Datapoint.last_timestamp).filter(
+            Datapoint.idx_deviceagent, Datapoint.last_timestamp,
+            Datapoint.timefixed_value).filter(
                 and_(Datapoint.enabled == 1,
                      Datapoint.idx_deviceagent == idx_deviceagent))
 
@@ -501,55 +895,13 @@ class _PrepareDatabase(object):
             last_timestamp = instance.last_timestamp
             data[id_datapoint] = {
                 'idx_datapoint': idx_datapoint,
-                'last_timestamp': last_timestamp
+                'last_timestamp': last_timestamp,
+                'timefixed_value': instance.timefixed_value
             }
 
-        # Return the session to the database pool after processing
-        database.close()
-
         # Return
         return data
 
-    def _add_datapoint(self, source):
-        """Insert new datapoint into database.
-
-        Args:
-            source: Dict of datapoint source information
-                {'id_agent': id_agent,
-                 'id_datapoint': id_datapoint,
-                 'agent_label': agent_label,
-                 'agent_source': source,
-                 'description': description,
-                 'base_type': base_type}
-
-                id_agent: Agent Identifier
-                id_datapoint: Datapoint ID
-                label: Datapoint label created by agent
-                source: Source of the data (subsystem being tracked)
-                description: Description provided by agent config file
-                base_type = SNMP base type (Counter32, Counter64, Gauge etc.)
-
-        Returns:
-            None
-
-        """
-        # Initialize key variables
-        idx_deviceagent = self._idx_deviceagent
-        id_datapoint = source['id_datapoint']
-        agent_label = source['agent_label']
-        agent_source = source['agent_source']
-        base_type = source['base_type']
-
-        # Insert Datapoint record
-        record = Datapoint(
-            id_datapoint=general.encode(id_datapoint),
-            idx_deviceagent=idx_deviceagent,
-            agent_label=general.encode(agent_label),
-            agent_source=general.encode(agent_source),
-            base_type=base_type)
-        database = db.Database()
-        database.add(record, 1082)
-
 
 class _UpdateDB(object):
     """Update database with agent data.
@@ -558,12 +910,13 @@ class _UpdateDB(object):
 
     """
 
-    def __init__(self, agent_data, datapoints):
+    def __init__(self, agent_data, datapoints, batch_size):
         """Instantiate the class.
 
         Args:
             agent_data: Agent data obtained from Drain object
             datapoints: Dict of datapoint data
+            batch_size: Maximum number of rows per INSERT execution
 
         Returns:
             None
@@ -572,6 +925,9 @@ class _UpdateDB(object):
         self.agent_data = agent_data
         self.datapoints = datapoints
 
+        # Create an object for bulk timeseries inserts
+        self._inserter = db_data.InsertData(batch_size=batch_size)
+
     def update(self):
         """Update the database.
 
@@ -590,7 +946,7 @@ class _UpdateDB(object):
         outcomes.append(self._update_timeseries())
 
         # Update timefixed data
-        outcomes.append(self._update_timefixed())
+        outcomes.append(self.update_timefixed())
 
         # Determine success
         if False in outcomes:
@@ -603,7 +959,7 @@ class _UpdateDB(object):
         """Insert data into the database "iset_data" table.
 
         Args:
-            mapping: Map of DIDs to database row index values
+            None
 
         Returns:
             success: True if successful
@@ -612,18 +968,43 @@ class _UpdateDB(object):
         # Initialize key variables
         success = False
         data = self.agent_data['timeseries']
+
+        # Update if there is data
+        if bool(data) is True:
+            # Do performance data update. Rows are streamed to the
+            # database in chunks by a single prepared statement.
+            success = self._inserter.insert(self.timeseries_rows(), 1056)
+
+        # Return
+        return success
+
+    def timeseries_rows(self):
+        """Create rows for insertion into the "iset_data" table.
+
+        Args:
+            None
+
+        Returns:
+            None
+
+        Yields:
+            (idx_datapoint, timestamp, value) tuples
+
+        """
+        # Initialize key variables
+        data = self.agent_data['timeseries']
         datapoints = self.datapoints
-        data_list = []
-        timestamp_tracker = {}
 
         # Update data
         for item in data:
             # Process datapoint values
-
             id_datapoint = item['id_datapoint']
-            value = item['value']
             timestamp = item['timestamp']
 
+            # Skip disabled datapoints
+            if id_datapoint not in datapoints:
+                continue
+
             # Get data on datapoints
             idx_datapoint = datapoints[id_datapoint]['idx_datapoint']
             last_timestamp = datapoints[id_datapoint]['last_timestamp']
@@ -631,36 +1012,30 @@ class _UpdateDB(object):
             # Only update with data collected after
             # the most recent DID update. Don't do anything more
             if timestamp > last_timestamp:
-                data_list.append(
-                    Data(
-                        idx_datapoint=idx_datapoint,
-                        value=value,
-                        timestamp=timestamp
-                    )
-                )
-
-                # Update DID's last updated timestamp
-                if idx_datapoint in timestamp_tracker:
-                    timestamp_tracker[idx_datapoint] = max(
-                        timestamp, timestamp_tracker[idx_datapoint])
-                else:
-                    timestamp_tracker[idx_datapoint] = timestamp
+                yield (idx_datapoint, timestamp, item['value'])
 
-        # Update if there is data
-        if bool(data_list) is True:
-            # Do performance data update
-            database = db.Database()
-            success = database.add_all(data_list, 1056, die=False)
-            success = True
+    def rows_per_second(self):
+        """Get the rate at which timeseries rows were inserted.
+
+        Args:
+            None
+
+        Returns:
+            value: Rows inserted per second
 
+        """
         # Return
-        return success
+        value = self._inserter.rows_per_second()
+        return value
 
-    def _update_timefixed(self):
+    def update_timefixed(self):
         """Update timefixed data into the database "iset_datapoint" table.
 
+        Only values that differ from those already stored in the database
+        are written. All changed values are written with a single statement.
+
         Args:
-            mapping: Map of DIDs to database row index values
+            None
 
         Returns:
             success: True if successful
@@ -668,59 +1043,66 @@ class _UpdateDB(object):
         """
         # Initialize key variables
         success = True
+        changes = self.timefixed_changes()
+
+        # Update if there is data
+        if bool(changes) is True:
+            success = db_datapoint.update_timefixed_values(changes, 1037)
+
+        # Return
+        return success
+
+    def timefixed_changes(self):
+        """Get the timefixed values that differ from those in the database.
+
+        Args:
+            None
+
+        Returns:
+            changes: Dict of the most recent encoded timefixed values keyed
+                by idx_datapoint
+
+        """
+        # Initialize key variables
         data = self.agent_data['timefixed']
         datapoints = self.datapoints
-        data_list = []
+        changes = {}
         timestamp_tracker = {}
 
         # Update data
         for item in data:
             # Process datapoint values
             id_datapoint = item['id_datapoint']
-            value = item['value']
+            value = general.encode(item['value'])
             timestamp = item['timestamp']
 
+            # Skip disabled datapoints
+            if id_datapoint not in datapoints:
+                continue
+
             # Get data on datapoints
             idx_datapoint = datapoints[id_datapoint]['idx_datapoint']
             last_timestamp = datapoints[id_datapoint]['last_timestamp']
 
             # Only update with data collected after
             # the most recent update. Don't do anything more
-            if timestamp > last_timestamp:
-                data_list.append(
-                    (idx_datapoint, value)
-                )
-
-                # Update DID's last updated timestamp
-                if idx_datapoint in timestamp_tracker:
-                    timestamp_tracker[idx_datapoint] = max(
-                        timestamp, timestamp_tracker[idx_datapoint])
-                else:
-                    timestamp_tracker[idx_datapoint] = timestamp
-
-        # Update if there is data
-        if bool(data_list) is True:
-            # Create a database session
-            # NOTE: We only do a single commit on the session.
-            # This is much faster (20x based on testing) than
-            # instantiating the database, updating records, and committing
-            # after every iteration of the "for loop"
-            database = db.Database()
-            session = database.session()
+            if timestamp <= last_timestamp:
+                continue
 
-            # Update timefixed data
-            for item in data_list:
-                (idx_datapoint, value) = item
-                data_dict = {'timefixed_value': general.encode(value)}
-                session.query(Datapoint).filter(
-                    Datapoint.idx_datapoint == idx_datapoint).update(
-                        data_dict)
+            # Use the most recent value if there are many
+            if idx_datapoint in timestamp_tracker:
+                if timestamp < timestamp_tracker[idx_datapoint]:
+                    continue
+            timestamp_tracker[idx_datapoint] = timestamp
 
-            # Commit data
-            database.commit(session, 1037)
+            # Don't write values that haven't changed
+            if value == datapoints[id_datapoint]['timefixed_value']:
+                changes.pop(idx_datapoint, None)
+            else:
+                changes[idx_datapoint] = value
 
-            # Return
-            return success
+        # Return
+        return changes
 
 
 class _UpdateLastTimestamp(object):
@@ -767,11 +1149,11 @@ class _UpdateLastTimestamp(object):
         # Update database
         database = db.Database()
         session = database.session()
-        record = session.query(DeviceAgent).filter(
+        session.query(DeviceAgent).filter(
             and_(
                 DeviceAgent.idx_device == idx_device,
-                DeviceAgent.idx_agent == idx_agent)).one()
-        record.last_timestamp = last_timestamp
+                DeviceAgent.idx_agent == idx_agent)).update(
+                    {'last_timestamp': last_timestamp})
         database.commit(session, 1124)
 
     def datapoint(self):
@@ -789,8 +1171,8 @@ class _UpdateLastTimestamp(object):
         idx_device = self.idx_device
         last_timestamp = self.last_timestamp
         data_dict = {'last_timestamp': last_timestamp}
-        idx_deviceagent = db_deviceagent.GetDeviceAgent(
-            idx_device, idx_agent).idx_deviceagent()
+        idx_deviceagent = db_deviceagent.idx_deviceagent(
+            idx_device, idx_agent)
 
         # Access the database
         database = db.Database()
@@ -825,10 +1207,6 @@ def validate_cache_files(config):
     # Configuration setup
     cache_dir = config.ingest_cache_directory()
 
-    # Filenames must start with a numeric timestamp and #
-    # end with a hex string. This will be tested later
-    regex = re.compile(r'^\d+_[0-9a-f]+_[0-9a-f]+.json')
-
     # Add files in cache directory to list
     all_filenames = [filename for filename in os.listdir(
         cache_dir) if os.path.isfile(
@@ -841,7 +1219,8 @@ def validate_cache_files(config):
     # Process only valid agent filenames
     for filename in all_filenames:
         # Add valid data to lists
-        if bool(regex.match(filename)) is True:
+        metadata = cache_watcher.parse_filename(filename)
+        if metadata is not None:
             # Create a complete filepath
             filepath = os.path.join(cache_dir, filename)
 
@@ -852,9 +1231,7 @@ def validate_cache_files(config):
                 continue
 
             # Create a dict of Identifiers, timestamps and filepaths
-            (name, _) = filename.split('.')
-            (tstamp, id_agent, devicehash) = name.split('_')
-            timestamp = int(tstamp)
+            (timestamp, id_agent, devicehash) = metadata
 
             # Create data dictionary
             data_dict = {
@@ -876,50 +1253,626 @@ def validate_cache_files(config):
     return id_agent_metadata
 
 
-def _wrapper_process(argument_list):
-    """Wrapper function to unpack arguments before calling the real function.
+class IngestPool(object):
+    """Long-lived pool of processes that ingest cache files.
+
+    Each agent's backlog of files is split into chunks of at most
+    ingest_chunk_size files. Only one chunk per agent is processed at a
+    time, so files are always ingested in timestamp order. The next chunk
+    of an agent is queued behind the chunks of all other agents when the
+    previous one completes. Agents with small backlogs are therefore not
+    delayed by agents with large ones.
+
+    """
+
+    def __init__(self, config, ingester_agent_name, pool_size=None):
+        """Instantiate the class.
+
+        Args:
+            config: Configuration object
+            ingester_agent_name: Ingester agent name
+            pool_size: Number of processes. Defaults to ingest_pool_size
+
+        Returns:
+            None
+
+        """
+        # Initialize key variables
+        if pool_size is None:
+            pool_size = config.ingest_pool_size()
+        self.pool_size = max(1, int(pool_size))
+        self.chunk_size = config.ingest_chunk_size()
+
+        # Write to the database from this process only, if configured
+        self.writer = None
+        batches = None
+        if config.ingest_single_writer() is True:
+            self.writer = _Writer(config, self.pool_size)
+            batches = self.writer.batches
+
+        # Create a pool of sub process resources
+        self._pool = Pool(
+            processes=self.pool_size,
+            initializer=_initialize_worker,
+            initargs=(ingester_agent_name, batches))
+
+        # Only start writing once the sub processes have been forked, so
+        # that they don't inherit locks held by the writer thread
+        if self.writer is not None:
+            self.writer.start()
+
+    def process(self, id_agent_metadata, leases=None):
+        """Ingest cache files.
+
+        Args:
+            id_agent_metadata: Dict in the format returned by
+                validate_cache_files()
+            leases: ShardLeases object to check in with as chunks of files
+                are ingested
+
+        Returns:
+            None
+
+        """
+        # Initialize key variables
+        backlogs = OrderedDict()
+        results = queue.Queue()
+        running = 0
+
+        # Split the files of each agent into chunks
+        for devicehash in id_agent_metadata.keys():
+            for id_agent in id_agent_metadata[devicehash].keys():
+                metadata = sorted(
+                    id_agent_metadata[devicehash][id_agent],
+                    key=lambda item: item['timestamp'])
+                backlogs[(devicehash, id_agent)] = deque(
+                    metadata[index:index + self.chunk_size]
+                    for index in range(0, len(metadata), self.chunk_size))
+
+        # Start with the first chunk of every agent
+        for key in backlogs.keys():
+            self._submit(key, backlogs[key].popleft(), results)
+            running += 1
+
+        # Process results as they complete
+        while running > 0:
+            (key, files, success) = results.get()
+            running -= 1
+            if leases is not None:
+                leases.checkin()
+
+            # Log
+            log_message = (
+                'Ingested %s cache files for agent %s, device hash %s. '
+                'Success: %s. %s chunks remaining.'
+                '') % (files, key[1], key[0], success, len(backlogs[key]))
+            log.log2debug(1158, log_message)
+
+            # Queue the next chunk of the agent
+            if bool(backlogs[key]) is True:
+                self._submit(key, backlogs[key].popleft(), results)
+                running += 1
+
+        # Wait for the data to be written
+        if self.writer is not None:
+            self.writer.flush()
+
+    def close(self):
+        """Stop the processes in the pool.
+
+        Args:
+            None
+
+        Returns:
+            None
+
+        """
+        # Close
+        self._pool.close()
+        self._pool.join()
+        if self.writer is not None:
+            self.writer.close()
+
+    def _submit(self, key, metadata, results):
+        """Queue a chunk of files for processing.
+
+        Args:
+            key: Tuple of (devicehash, id_agent)
+            metadata: List of dicts of timestamps and filepaths
+            results: Queue to which the result is added
+
+        Returns:
+            None
+
+        """
+        # Queue. Chunks that can't be processed are reported as failures.
+        self._pool.apply_async(
+            _process_chunk, (key, metadata), callback=results.put,
+            error_callback=lambda _: results.put(
+                (key, len(metadata), False)))
+
+
+class _Writer(object):
+    """Single writer of the data read by IngestPool processes.
+
+    SQLite only allows one connection to write at a time. The processes
+    therefore only read and validate cache files, and put batches of
+    agent data on a queue. A thread of the ingester takes them off in
+    order, and writes the timeseries rows and last timestamps of all the
+    batches waiting, up to one per process, in one transaction each.
+
+    Transactions that fail because the database stayed locked for
+    db_busy_timeout seconds are retried db_busy_retries times. The cache
+    files of batches that still can't be written are left for the next run,
+    as are those of later batches of the same agents, so that they are
+    written in order. Busy errors, and the time spent waiting to retry, are
+    counted and saved to a file in the ingest_status_directory. See
+    writer_status().
+
+    """
+
+    def __init__(self, config, group_size):
+        """Instantiate the class.
+
+        Args:
+            config: Configuration object
+            group_size: Maximum number of batches written together
+
+        Returns:
+            None
+
+        """
+        # Initialize key variables
+        self.group_size = max(1, int(group_size))
+        self.batch_size = config.ingest_batch_size()
+        self.busy_retries = config.db_busy_retries()
+        self.busy_delay = config.db_busy_delay()
+        self.batches = SimpleQueue()
+        self.busy = 0
+        self.busy_seconds = 0.0
+        self._flushed = threading.Event()
+        self._failed = set()
+        self._thread = None
+        self._status_file = os.path.join(
+            config.ingest_status_directory(), ('writer-%s-%s.json') % (
+                socket.gethostname(), os.getpid()))
+
+    def start(self):
+        """Start writing the batches queued.
+
+        Args:
+            None
+
+        Returns:
+            None
+
+        """
+        # Start
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def flush(self):
+        """Wait for the batches queued so far to be written.
+
+        Args:
+            None
+
+        Returns:
+            None
+
+        """
+        # Wait
+        self._flushed.clear()
+        self.batches.put(_FLUSH)
+        self._flushed.wait()
+
+    def close(self):
+        """Write the batches queued so far, then stop.
+
+        Args:
+            None
+
+        Returns:
+            None
+
+        """
+        # Stop
+        if self._thread is None:
+            return
+        self.batches.put(None)
+        self._thread.join()
+
+        # The counters are no longer updated
+        try:
+            os.remove(self._status_file)
+        except OSError:
+            pass
+
+    def _run(self):
+        """Write batches as they are queued.
+
+        Args:
+            None
+
+        Returns:
+            None
+
+        """
+        # Initialize key variables
+        group = []
+
+        while True:
+            # Group the batches already waiting
+            item = self.batches.get()
+            if isinstance(item, tuple) is True:
+                group.append(item)
+                if len(group) < self.group_size and (
+                        self.batches.empty() is False):
+                    continue
+
+            # Write them. Failures must not stop the writer
+            if bool(group) is True:
+                try:
+                    self._write(group)
+                except (Exception, SystemExit) as exception_error:
+                    log_message = (
+                        'Failed to write %s batches of cache data. '
+                        'Error: "%s"') % (len(group), exception_error)
+                    log.log2warning(1196, log_message)
+
+                    # Leave the later batches of the agents too, so that
+                    # they are written in order on the next run
+                    self._failed.update(
+                        _agent_key(batch[0]) for batch in group)
+                group = []
+
+            # Process markers
+            if item == _FLUSH:
+                self._failed = set()
+                self._flushed.set()
+            elif item is None:
+                break
+
+    def _write(self, group):
+        """Write a group of batches, retrying while the database is busy.
+
+        Args:
+            group: List of (agent_data, filepaths, posts) tuples
+
+        Returns:
+            None
+
+        """
+        # Leave the batches of agents whose earlier batches weren't written
+        group = [
+            batch for batch in group
+            if _agent_key(batch[0]) not in self._failed]
+        if bool(group) is False:
+            return
+
+        # Initialize key variables
+        start_ts = time.time()
+        posts = sum(batch[2] for batch in group)
+
+        # Write
+        for attempt in range(self.busy_retries + 1):
+            try:
+                (success, rows_per_second) = _write_batches(
+                    group, self.batch_size)
+                break
+            except db.DatabaseBusy as exception_error:
+                self.busy += 1
+                if attempt == self.busy_retries:
+                    log_message = (
+                        'Database still busy after %s attempts. Leaving '
+                        '%s cached posts for the next run. Error: "%s"'
+                        '') % (attempt + 1, posts, exception_error)
+                    log.log2warning(1197, log_message)
+                    self._failed.update(
+                        _agent_key(batch[0]) for batch in group)
+                    self._save_status()
+                    return
+                delay = self.busy_delay * (2 ** attempt)
+                log_message = (
+                    'Database busy writing %s cached posts. Retrying in '
+                    '%s seconds.') % (posts, delay)
+                log.log2debug(1198, log_message)
+                time.sleep(delay)
+                self.busy_seconds += delay
+
+        # Purge source files. Only done after the database updates
+        for (_, filepaths, _) in group:
+            for filepath in filepaths:
+                drain.purge(filepath)
+
+        # Log
+        log_message = (
+            'Wrote %s cached posts of %s agents in %s seconds (%s rows/'
+            'second inserted, %s identity cache hit rate). Success: %s. '
+            '%s database busy errors, %s seconds waiting to retry so far.'
+            '') % (
+                posts,
+                len(set(batch[0]['id_agent'] for batch in group)),
+                round(time.time() - start_ts, 4),
+                round(rows_per_second, 2),
+                round(db_identity.identity_map().hit_rate(), 4),
+                success, self.busy, round(self.busy_seconds, 2))
+        log.log2info(1199, log_message)
+        self._save_status()
+
+    def _save_status(self):
+        """Save the counters of busy errors for writer_status().
+
+        Args:
+            None
+
+        Returns:
+            None
+
+        """
+        # Initialize key variables
+        status = {
+            'busy': self.busy,
+            'busy_seconds': round(self.busy_seconds, 2),
+            'timestamp': int(time.time())}
+        tmp_filename = ('%s.tmp') % (self._status_file)
+
+        # Replace the file atomically
+        try:
+            with open(tmp_filename, 'w') as f_handle:
+                json.dump(status, f_handle)
+            os.replace(tmp_filename, self._status_file)
+        except OSError as exception_error:
+            log_message = (
+                'Unable to save ingest writer status to %s. Error: "%s"'
+                '') % (self._status_file, exception_error)
+            log.log2warning(1205, log_message)
+
+
+def writer_status(config):
+    """Get the counters of the ingest writers of running ingesters.
+
+    Args:
+        config: Configuration object
+
+    Returns:
+        result: Dict of dicts of the number of database busy errors, the
+            number of seconds spent waiting to retry and the time they were
+            last updated, keyed by ingester
+
+    """
+    # Initialize key variables
+    result = {}
+    directory = config.ingest_status_directory()
+
+    # Read the files of each ingester
+    for filename in os.listdir(directory):
+        if filename.startswith('writer-') is False or (
+                filename.endswith('.json') is False):
+            continue
+        try:
+            with open(os.path.join(directory, filename), 'r') as f_handle:
+                status = json.load(f_handle)
+        except (OSError, ValueError):
+            continue
+        result[filename[len('writer-'):-len('.json')]] = status
+
+    # Return
+    return result
+
+
+def _agent_key(agent_data):
+    """Identify the agent and device of agent data.
+
+    Args:
+        agent_data: Agent data from successive Drains
+
+    Returns:
+        key: Tuple of (id_agent, devicename)
+
+    """
+    # Return
+    key = (agent_data['id_agent'], agent_data['devicename'])
+    return key
+
+
+def _write_batches(group, batch_size):
+    """Write a group of batches of agent data to the database.
+
+    New agents, devices and datapoints are added first, each in its own
+    transaction as in _ProcessAgentCache. Adding them again is harmless,
+    so they don't need to be rolled back if the rest fails. The timeseries
+    rows, timefixed values and last timestamps of all the batches are then
+    written in one transaction. If that fails for reasons other than a busy
+    database, only the last timestamps are updated, as _ProcessAgentCache
+    does.
 
     Args:
-        argument_list: A list of tuples of arguments to be provided to
-            lib_process_devices.process_device
+        group: List of (agent_data, filepaths, posts) tuples
+        batch_size: Maximum number of rows per INSERT execution
 
     Returns:
-        Nothing
+        (success, rows_per_second): True if successful, and the rate at
+            which timeseries rows were inserted
 
     """
-    return _process(*argument_list)
+    # Initialize key variables
+    success = False
+    rows_per_second = 0
+    updates = []
+    last_timestamps = {}
+    changes = {}
+    inserter = db_data.InsertData(batch_size=batch_size)
+
+    # Add datapoints to the database and get the latest datapoints
+    for (agent_data, _, _) in group:
+        db_prepare = _PrepareDatabase(agent_data)
+        updates.append(
+            _UpdateDB(
+                agent_data, db_prepare.add_datapoints(), batch_size))
+        key = db_prepare.idx_deviceagent()
+        last_timestamps[key] = max(
+            last_timestamps.get(key, 0), agent_data['max_timestamp'])
+
+    # Later batches have the most recent timefixed values
+    for update in updates:
+        changes.update(update.timefixed_changes())
+
+    # Update database with data
+    database = db.Database()
+    session = database.session()
+    ts_start = time.time()
+    try:
+        rows = inserter.execute(
+            session, chain.from_iterable(
+                update.timeseries_rows() for update in updates))
+        db_datapoint.execute_timefixed_values(session, changes)
+        _update_last_timestamps(session, last_timestamps)
+        session.commit()
+        success = True
+        duration = time.time() - ts_start
+        if duration > 0:
+            rows_per_second = rows / duration
+
+    except Exception as exception_error:
+        session.rollback()
+        if db.busy(exception_error) is True:
+            database.close()
+            raise db.DatabaseBusy(str(exception_error)) from exception_error
+        log_message = (
+            'Unable to write %s batches of cache data. Error: "%s"'
+            '') % (len(group), exception_error)
+        log.log2warning(1056, log_message)
+
+    except:
+        session.rollback()
+        log_message = ('Unexpected database exception')
+        log.log2warning(1056, log_message)
+
+    # Update the last timestamps anyway
+    if success is False:
+        _update_last_timestamps(session, last_timestamps)
+        database.commit(session, 1124)
+
+    # Return the session to the database pool after processing
+    database.close()
+
+    # Return
+    return (success, rows_per_second)
 
 
-def _process(config, metadata, ingester_agent_name):
-    """Process metadata.
+def _update_last_timestamps(session, last_timestamps):
+    """Update the last timestamps of deviceagents and their datapoints.
 
     Args:
+        session: Database session to use
+        last_timestamps: Dict of last timestamps keyed by idx_deviceagent
+
+    Returns:
+        None
+
+    """
+    # Update
+    for idx_deviceagent, last_timestamp in last_timestamps.items():
+        data_dict = {'last_timestamp': last_timestamp}
+        session.query(DeviceAgent).filter(
+            DeviceAgent.idx_deviceagent == idx_deviceagent).update(data_dict)
+        session.query(Datapoint).filter(
+            and_(Datapoint.idx_deviceagent == idx_deviceagent,
+                 Datapoint.enabled == 1)).update(data_dict)
+
+
+# Per process data for IngestPool processes
+_WORKER = {}
+
+
+def _config():
+    """Get the configuration, reading it once per process.
+
+    Args:
+        None
+
+    Returns:
         config: Config object
-        metadata: metadata
-        ingester_agent_name: Ingester's agent name
+
+    """
+    # Return
+    if 'config' not in _WORKER:
+        _WORKER['config'] = configuration.Config()
+    return _WORKER['config']
+
+
+def _initialize_worker(ingester_agent_name, batches=None):
+    """Initialize an IngestPool process.
+
+    Args:
+        ingester_agent_name: Ingester agent name
+        batches: Queue of the _Writer of the IngestPool, if any
+
+    Returns:
+        None
+
+    """
+    # Read the configuration once per process
+    _WORKER['config'] = configuration.Config()
+    _WORKER['ingester_agent_name'] = ingester_agent_name
+    _WORKER['batches'] = batches
+
+    # Create the database connection for the process
+    db.connectivity()
+
+
+def _process_chunk(key, metadata):
+    """Process a chunk of cache files for an agent.
+
+    Args:
+        key: Tuple of (devicehash, id_agent)
+        metadata: List of dicts of timestamps and filepaths
 
     Returns:
-        Nothing
+        result: Tuple of (key, number of files, success)
 
     """
-    # Start processing
-    data = _ProcessAgentCache(config, metadata, ingester_agent_name)
-    data.process()
+    # Initialize key variables
+    success = False
+
+    # Start processing. Failures must not prevent the result from
+    # being returned, as the IngestPool waits for it.
+    try:
+        data = _ProcessAgentCache(
+            _WORKER['config'], metadata, _WORKER['ingester_agent_name'],
+            batches=_WORKER['batches'])
+        success = data.process()
+    except (Exception, SystemExit) as exception_error:
+        log_message = (
+            'Failed to ingest cache files for agent %s. Error: "%s"'
+            '') % (key[1], exception_error)
+        log.log2warning(1159, log_message)
+
+    # Return
+    result = (key, len(metadata), success)
+    return result
 
 
-def process(config, ingester_agent_name):
+def process(
+        config, ingester_agent_name, watcher=None, pool=None, leases=None):
     """Process cache data by adding it to the database using subprocesses.
 
     Args:
         config: Configuration object
         ingester_agent_name: Ingester agent name
+        watcher: CacheWatcher object tracking the cache directory. The
+            cache directory is scanned if None.
+        pool: IngestPool object to use. A temporary pool is created
+            if None.
+        leases: ShardLeases object of the ingester. Temporary leases are
+            acquired if None.
 
     Returns:
         None
 
     """
     # Initialize key variables
-    argument_list = []
     id_agent_metadata = defaultdict(lambda: defaultdict(dict))
 
     # Configuration setup
@@ -935,47 +1888,43 @@ def process(config, ingester_agent_name):
         return
 
     # Get meta data on files
-    id_agent_metadata = validate_cache_files(config)
+    if watcher is None:
+        id_agent_metadata = validate_cache_files(config)
+    else:
+        id_agent_metadata = watcher.metadata()
 
     # Spawn processes only if we have files to process
     if bool(id_agent_metadata.keys()) is True:
-        # Process lock file
-        lockfile = daemon.lock_file(ingester_agent_name)
-        if os.path.exists(lockfile) is True:
-            # Return if lock file is present
-            log_message = (
-                'Ingest lock file %s exists. Multiple ingest daemons running '
-                'or lots of cache files to ingest. Ingester may have died '
-                'catastrophically in the past, in which case the lockfile '
-                'should be deleted. Exiting ingest process. '
-                'Will try again later.'
-                '') % (lockfile)
-            log.log2warning(1069, log_message)
-            return
+        # Get the leases of the shards to process
+        if leases is None:
+            shard_leases = lease.leases(config)
         else:
-            # Create lockfile
-            open(lockfile, 'a').close()
+            shard_leases = leases
+        owned = shard_leases.acquire()
 
-        # Read each cache file
-        for devicehash in id_agent_metadata.keys():
-            for id_agent in id_agent_metadata[devicehash].keys():
-                # Create a list of arguments to process
-                argument_list.append(
-                    (config,
-                     id_agent_metadata[devicehash][id_agent],
-                     ingester_agent_name)
-                )
+        # Only process files of devices in shards held by this ingester
+        for devicehash in list(id_agent_metadata.keys()):
+            if shard_leases.owns(devicehash) is False:
+                del id_agent_metadata[devicehash]
 
-        # Create a pool of sub process resources
-        pool_size = int(min(configured_pool_size, len(id_agent_metadata)))
-        with Pool(processes=pool_size) as pool:
-
-            # Create sub processes from the pool
-            pool.map(_wrapper_process, argument_list)
+        # Process the files
+        if bool(id_agent_metadata.keys()) is False:
+            log_message = (
+                'No cache files to ingest in the shards %s held by this '
+                'ingester.') % (owned)
+            log.log2debug(1163, log_message)
+        elif pool is None:
+            pool_size = int(min(configured_pool_size, len(id_agent_metadata)))
+            temporary_pool = IngestPool(
+                config, ingester_agent_name, pool_size=pool_size)
+            temporary_pool.process(id_agent_metadata, leases=shard_leases)
+            temporary_pool.close()
+        else:
+            pool.process(id_agent_metadata, leases=shard_leases)
 
-        # Return if lock file is present
-        if os.path.exists(lockfile) is True:
-            os.remove(lockfile)
+        # Release temporary leases
+        if leases is None:
+            shard_leases.release()
 
 
 def main():
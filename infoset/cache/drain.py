@@ -3,11 +3,15 @@
 
 # Standard libraries
 import os
+import functools
+import threading
 from collections import defaultdict
 
 # Infoset libraries
 from infoset.utils import log
 from infoset.utils import general
+from infoset.utils import payload
+from infoset.utils import configuration
 from infoset.cache import validate
 
 
@@ -32,11 +36,14 @@ class Drain(object):
 
     """
 
-    def __init__(self, filename, data):
+    def __init__(self, filename, data=None, batch=None):
         """Method initializing the class.
 
         Args:
             filename: Cache filename
+            data: Data dict to use instead of reading the file
+            batch: ValidateBatch object to use for validation when the
+                data is one of a series of payloads from the same agent
 
         Returns:
             None
@@ -51,8 +58,12 @@ class Drain(object):
         data_types = ['timeseries', 'timefixed']
 
         # Ingest data
-        validator = validate.ValidateCache(filepath=None, data=data)
-        information = validator.getinfo()
+        if batch is None:
+            batch = validate.ValidateBatch()
+        if data is None:
+            information = batch.getinfo(filepath=filename)
+        else:
+            information = batch.getinfo(data=data)
 
         # Log if data is bad
         if information is False:
@@ -88,7 +99,8 @@ class Drain(object):
                         self._information[data_type][base_type] = []
 
                     # Process the data associated with the agent_label
-                    for datapoint in label_dict['data']:
+                    for datapoint in payload.datapoints(
+                            information, label_dict):
                         # Create a unique, unchangeable id_datapoint for data
                         index = datapoint[0]
                         value = datapoint[1]
@@ -357,31 +369,74 @@ class Drain(object):
             success: "True" if successful
 
         """
-        # Initialize key variables
-        success = True
+        # Return
+        success = purge(self.filename)
+        return success
 
-        try:
-            os.remove(self.filename)
-        except:
-            success = False
 
-        # Report success
-        if success is True:
-            log_message = (
-                'Ingest cache file %s deleted') % (self.filename)
-            log.log2debug(1046, log_message)
-        else:
-            log_message = (
-                'Failed to delete ingest cache file %s') % (self.filename)
-            log.log2debug(1087, log_message)
+def purge(filename):
+    """Purge a cache file.
 
-        # Return
-        return success
+    Args:
+        filename: Cache filename
+
+    Returns:
+        success: "True" if successful
+
+    """
+    # Initialize key variables
+    success = True
+
+    try:
+        os.remove(filename)
+    except:
+        success = False
+
+    # Report success
+    if success is True:
+        log_message = (
+            'Ingest cache file %s deleted') % (filename)
+        log.log2debug(1046, log_message)
+    else:
+        log_message = (
+            'Failed to delete ingest cache file %s') % (filename)
+        log.log2debug(1087, log_message)
+
+    # Return
+    return success
 
 
 def _id_datapoint(id_agent, label, index, agent_name, devicename):
     """Create a unique DID from ingested data.
 
+    IDs are memoized as the same datapoints are found in successive files.
+
+    Args:
+        id_agent: Identifier of device that created the cache data file
+        label: Label of the data
+        index: Index of the data
+        agent_name: Name of agent
+        devicename: Devicename
+
+    Returns:
+        id_datapoint: Datapoint ID
+
+    """
+    # Use the memo cache unless a value can't be used as a key
+    try:
+        id_datapoint = _id_datapoint_cache()(
+            id_agent, label, index, agent_name, devicename)
+    except TypeError:
+        id_datapoint = _hash_id_datapoint(
+            id_agent, label, index, agent_name, devicename)
+
+    # Return
+    return id_datapoint
+
+
+def _hash_id_datapoint(id_agent, label, index, agent_name, devicename):
+    """Create a unique DID by hashing ingested data.
+
     Args:
         id_agent: Identifier of device that created the cache data file
         label: Label of the data
@@ -402,6 +457,60 @@ def _id_datapoint(id_agent, label, index, agent_name, devicename):
     return id_datapoint
 
 
+def id_datapoint_cache_info():
+    """Get statistics of the datapoint ID memo cache.
+
+    Args:
+        None
+
+    Returns:
+        data: Dict of hits, misses, size, maxsize and hit_rate
+
+    """
+    # Initialize key variables
+    info = _id_datapoint_cache().cache_info()
+    total = info.hits + info.misses
+    data = {
+        'hits': info.hits,
+        'misses': info.misses,
+        'size': info.currsize,
+        'maxsize': info.maxsize,
+        'hit_rate': 0
+    }
+
+    # Return
+    if total > 0:
+        data['hit_rate'] = info.hits / total
+    return data
+
+
+def _id_datapoint_cache():
+    """Get the datapoint ID memo cache of this process.
+
+    The cache is created on first use. Values are cached by type, as
+    values such as 1 and 1.0 create different IDs.
+
+    Args:
+        None
+
+    Returns:
+        result: Memoized _hash_id_datapoint function
+
+    """
+    # Initialize key variables
+    global _ID_DATAPOINT_CACHE
+
+    # Create the cache
+    with _LOCK:
+        if _ID_DATAPOINT_CACHE is None:
+            config = configuration.Config()
+            _ID_DATAPOINT_CACHE = functools.lru_cache(
+                maxsize=config.datapoint_id_cache_size(),
+                typed=True)(_hash_id_datapoint)
+        result = _ID_DATAPOINT_CACHE
+    return result
+
+
 def _main_keys(information):
     """Properly format the keys of information received from the validator.
 
@@ -456,3 +565,8 @@ def _base_type(data):
 
     # Return
     return base_type
+
+
+# Process-local datapoint ID memo cache. See _id_datapoint_cache()
+_ID_DATAPOINT_CACHE = None
+_LOCK = threading.Lock()
@@ -0,0 +1,296 @@
+#!/usr/bin/env python3
+"""Ingest queue embedded in the API process.
+
+Agent posts are put in a bounded in-memory queue and written to the
+database in batches by threads in the API process, so neither Redis nor
+Celery is needed. Posts that can't be queued, or that are still queued
+when the API stops, are written to the ingest_cache_directory for the
+ingester to process.
+
+"""
+
+# Standard libraries
+import os
+import time
+import json
+import queue
+import atexit
+import tempfile
+import threading
+
+# Infoset libraries
+from infoset.cache import cache
+from infoset.cache import validate
+from infoset.utils import codec
+from infoset.utils import general
+from infoset.utils import log
+
+
+class EmbeddedQueue(object):
+    """Ingest agent posts using threads in the current process.
+
+    Args:
+        None
+
+    Returns:
+        None
+
+    Methods:
+
+    """
+
+    def __init__(self, config):
+        """Function for intializing the class.
+
+        Args:
+            config: Configuration object
+
+        Returns:
+            None
+
+        """
+        # Initialize key variables
+        self.cache_dir = config.ingest_cache_directory()
+        self.batch_size = config.celery_batch_size()
+        self.linger = config.celery_batch_linger()
+        self.thread_count = config.embedded_queue_threads()
+        self._queue = queue.Queue(maxsize=config.embedded_queue_size())
+        self._codec = codec.Codec('json')
+        self._stopping = threading.Event()
+        self._lock = threading.Lock()
+        self._threads = []
+        self._pid = None
+
+        # Spill queued posts when the process exits
+        atexit.register(self.close)
+
+    def put(self, body, content_type=None):
+        """Queue the body of an agent post for ingesting.
+
+        Args:
+            body: Body of POST
+            content_type: Content type of the body
+
+        Returns:
+            queued: True if queued, False if written to the cache directory
+
+        """
+        # Initialize key variables
+        value = self._codec.encode_body(body, content_type)
+        self._start()
+
+        # Queue
+        if self._stopping.is_set() is False:
+            try:
+                self._queue.put_nowait(value)
+                return True
+            except queue.Full:
+                log_message = (
+                    'Embedded ingest queue is full. Writing post to the '
+                    'cache directory.')
+                log.log2warning(1174, log_message)
+
+        # Spill
+        spill(self.cache_dir, value)
+        return False
+
+    def depth(self):
+        """Get the number of queued posts.
+
+        Args:
+            None
+
+        Returns:
+            depth: Number of posts
+
+        """
+        # Return
+        depth = self._queue.qsize()
+        return depth
+
+    def close(self):
+        """Stop ingesting and spill queued posts to the cache directory.
+
+        Args:
+            None
+
+        Returns:
+            None
+
+        """
+        # Let threads finish the batches they are ingesting
+        self._stopping.set()
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+
+        # Spill the rest
+        while True:
+            try:
+                value = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            spill(self.cache_dir, value)
+
+    def _start(self):
+        """Start the ingest threads in this process if not yet started.
+
+        Threads don't survive a fork, so they are started by the process
+        that uses the queue.
+
+        Args:
+            None
+
+        Returns:
+            None
+
+        """
+        # Start
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._threads = []
+            for _ in range(max(1, self.thread_count)):
+                thread = threading.Thread(target=self._run, daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def _run(self):
+        """Ingest batches of posts until stopped.
+
+        Args:
+            None
+
+        Returns:
+            None
+
+        """
+        # Ingest
+        while self._stopping.is_set() is False:
+            values = self._batch()
+            if bool(values) is False:
+                continue
+            # Failures, including those of log2die, must not stop the thread
+            try:
+                cache.ProcessRedisBatch(values).process()
+            except (Exception, SystemExit) as exception_error:
+                log_message = (
+                    'Failed to ingest %s posts. Writing them to the cache '
+                    'directory. Error: "%s"') % (len(values), exception_error)
+                log.log2warning(1175, log_message)
+                for value in values:
+                    spill(self.cache_dir, value)
+
+    def _batch(self):
+        """Get the next batch of queued posts.
+
+        Waits up to celery_batch_linger seconds after the first post for
+        a full batch.
+
+        Args:
+            None
+
+        Returns:
+            values: List of encoded posts
+
+        """
+        # Wait for the first post
+        try:
+            values = [self._queue.get(timeout=0.5)]
+        except queue.Empty:
+            return []
+
+        # Get more posts
+        stop = time.time() + self.linger
+        while len(values) < self.batch_size:
+            remaining = stop - time.time()
+            if remaining <= 0:
+                break
+            try:
+                values.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+
+        # Return
+        return values
+
+
+def spill(cache_dir, value):
+    """Write agent posts to the cache directory for the ingester.
+
+    Args:
+        cache_dir: Cache directory
+        value: Post, or list of posts received in bulk, encoded by
+            infoset.utils.codec
+
+    Returns:
+        filepaths: List of the names of the files written
+
+    """
+    # Decode
+    try:
+        data = codec.decode(value)
+    except ValueError:
+        data = None
+    if isinstance(data, list) is True:
+        items = data
+    else:
+        items = [data]
+
+    # Write a file per post
+    filepaths = []
+    for item in items:
+        filepath = _spill(cache_dir, item)
+        if filepath is not None:
+            filepaths.append(filepath)
+    return filepaths
+
+
+def _spill(cache_dir, data):
+    """Write an agent post to the cache directory for the ingester.
+
+    Args:
+        cache_dir: Cache directory
+        data: Data dict
+
+    Returns:
+        filepath: Name of the file, None if the post is invalid
+
+    """
+    # Ignore invalid posts
+    if validate.payload_ok(data) is False:
+        log_message = (
+            'Invalid post not written to the cache directory.')
+        log.log2warning(1176, log_message)
+        return None
+
+    # Use the filename format of agents' cache files
+    devicehash = general.hashstring(data['devicename'], sha=1)
+    filepath = ('%s/%s_%s_%s.json') % (
+        cache_dir, data['timestamp'], data['id_agent'], devicehash)
+
+    # Write the file atomically so the ingester never reads part of it
+    (f_descriptor, tmp_filepath) = tempfile.mkstemp(
+        dir=cache_dir, prefix='.', suffix='.tmp')
+    with os.fdopen(f_descriptor, 'w') as f_handle:
+        json.dump(data, f_handle)
+    os.rename(tmp_filepath, filepath)
+
+    # Return
+    return filepath
+
+
+def embedded(config):
+    """Create an EmbeddedQueue from the configuration.
+
+    Args:
+        config: Configuration object
+
+    Returns:
+        result: EmbeddedQueue object
+
+    """
+    # Return
+    result = EmbeddedQueue(config)
+    return result
@@ -0,0 +1,500 @@
+#!/usr/bin/env python3
+"""Lease based coordination of ingesters sharing a cache directory.
+
+The devicehash space is split into shards. An ingester only processes the
+cache files of the shards it holds leases on. A lease is an fcntl lock on
+a lease file to which the holder regularly writes a heartbeat. Locks are
+released by the operating system when an ingester dies. Leases with old
+heartbeats, such as those of hung ingesters or of hosts that died while
+holding NFS locks, are taken over by replacing the lease file.
+
+Heartbeats may be written by a background thread. It only writes them
+while the ingest loop checks in, so that the leases of an ingester whose
+loop hangs still go stale.
+
+Each ingester also maintains a member file so that ingesters can share
+the shards fairly among themselves.
+
+"""
+
+# Standard libraries
+import os
+import math
+import time
+import fcntl
+import errno
+import socket
+import threading
+
+# Infoset libraries
+from infoset.utils import log
+
+
+class ShardLeases(object):
+    """Manage the shard leases of an ingester.
+
+    Args:
+        None
+
+    Returns:
+        None
+
+    Methods:
+
+    """
+
+    def __init__(self, directory, shards=1, timeout=60):
+        """Function for intializing the class.
+
+        Args:
+            directory: Directory for lease files
+            shards: Number of shards
+            timeout: Number of seconds without a heartbeat after which
+                a lease can be taken over
+
+        Returns:
+            None
+
+        """
+        # Initialize key variables
+        self.directory = directory
+        self.shards = max(1, int(shards))
+        self.timeout = timeout
+        self.holder = ('%s-%s') % (socket.gethostname(), os.getpid())
+        self._leases = {}
+        self._lock = threading.RLock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._checked_in = time.time()
+
+    def acquire(self):
+        """Acquire this ingester's fair share of the shards.
+
+        Args:
+            None
+
+        Returns:
+            owned: Sorted list of shards held
+
+        """
+        with self._lock:
+            # Refresh the leases already held
+            self._heartbeat()
+
+            # Try to get leases for all shards not yet held
+            for number in range(self.shards):
+                if number not in self._leases:
+                    self._take(number)
+
+            # Only keep a fair share, so that other ingesters get some
+            target = int(math.ceil(self.shards / self._members()))
+            for number in sorted(self._leases.keys())[target:]:
+                self._release(number)
+
+            # Return
+            owned = sorted(self._leases.keys())
+            return owned
+
+    def owns(self, devicehash):
+        """Determine whether the shard of a devicehash is held.
+
+        Args:
+            devicehash: Devicehash
+
+        Returns:
+            value: True if held
+
+        """
+        # Return
+        value = shard(devicehash, self.shards) in self._leases
+        return value
+
+    def heartbeat(self):
+        """Update the heartbeats of the leases held.
+
+        Args:
+            None
+
+        Returns:
+            owned: Sorted list of shards still held
+
+        """
+        with self._lock:
+            self._heartbeat()
+            owned = sorted(self._leases.keys())
+            return owned
+
+    def checkin(self):
+        """Note that the ingest loop is still making progress.
+
+        Args:
+            None
+
+        Returns:
+            None
+
+        """
+        # Note the time
+        self._checked_in = time.time()
+
+    def start(self):
+        """Update heartbeats in the background.
+
+        Heartbeats are only updated while checkin() has been called within
+        the last timeout seconds.
+
+        Args:
+            None
+
+        Returns:
+            None
+
+        """
+        # Start
+        self.checkin()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def release(self):
+        """Stop the heartbeats and release all leases.
+
+        Args:
+            None
+
+        Returns:
+            None
+
+        """
+        # Stop the heartbeat thread
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+        # Release
+        with self._lock:
+            for number in list(self._leases.keys()):
+                self._release(number)
+            try:
+                os.remove(self._member_file(self.holder))
+            except OSError:
+                pass
+
+    def _run(self):
+        """Update heartbeats until stopped.
+
+        Args:
+            None
+
+        Returns:
+            None
+
+        """
+        # Initialize key variables
+        hung = False
+
+        # Update while the ingest loop checks in
+        while self._stop.wait(self.timeout / 3) is False:
+            idle = time.time() - self._checked_in
+            if idle <= self.timeout:
+                hung = False
+                self.heartbeat()
+            elif hung is False:
+                hung = True
+                log_message = (
+                    'Ingester %s has not checked in for %s seconds. No '
+                    'longer updating the heartbeats of its ingest leases.'
+                    '') % (self.holder, int(idle))
+                log.log2warning(1202, log_message)
+
+    def _heartbeat(self):
+        """Update the heartbeats of leases and the member file.
+
+        Args:
+            None
+
+        Returns:
+            None
+
+        """
+        # Announce this ingester
+        _write(self._member_file(self.holder), self._content())
+
+        # Drop leases that have been taken over
+        for number, f_descriptor in list(self._leases.items()):
+            filename = self._lease_file(number)
+            try:
+                current = os.stat(filename).st_ino
+            except OSError:
+                current = None
+            if current != os.fstat(f_descriptor).st_ino:
+                log_message = (
+                    'Ingest lease for shard %s was taken over by another '
+                    'ingester.') % (number)
+                log.log2warning(1161, log_message)
+                os.close(f_descriptor)
+                del self._leases[number]
+                continue
+
+            # Update the heartbeat
+            os.ftruncate(f_descriptor, 0)
+            os.pwrite(f_descriptor, self._content(), 0)
+
+    def _take(self, number):
+        """Try to get the lease of a shard.
+
+        Args:
+            number: Shard number
+
+        Returns:
+            None
+
+        """
+        # Initialize key variables
+        filename = self._lease_file(number)
+
+        # Try to lock the lease file
+        f_descriptor = _lock(filename)
+        if f_descriptor is not None:
+            self._held(number, f_descriptor)
+            return
+
+        # Take over leases with old heartbeats. Only one ingester
+        # may do this at a time, and the lease must still be stale.
+        takeover = os.path.join(self.directory, 'takeover.lock')
+        with open(takeover, 'a') as f_handle:
+            fcntl.lockf(f_handle, fcntl.LOCK_EX)
+            (holder, heartbeat) = _read(filename)
+            if time.time() - heartbeat > self.timeout:
+                log_message = (
+                    'Taking over the ingest lease for shard %s from %s. '
+                    'No heartbeat for %s seconds.'
+                    '') % (number, holder, int(time.time() - heartbeat))
+                log.log2warning(1162, log_message)
+                try:
+                    os.remove(filename)
+                except OSError:
+                    pass
+                f_descriptor = _lock(filename)
+                if f_descriptor is not None:
+                    self._held(number, f_descriptor)
+            fcntl.lockf(f_handle, fcntl.LOCK_UN)
+
+    def _held(self, number, f_descriptor):
+        """Record a newly held lease.
+
+        Args:
+            number: Shard number
+            f_descriptor: File descriptor of the locked lease file
+
+        Returns:
+            None
+
+        """
+        # Record
+        self._leases[number] = f_descriptor
+        os.ftruncate(f_descriptor, 0)
+        os.pwrite(f_descriptor, self._content(), 0)
+        log_message = (
+            'Ingester %s now holds the ingest lease for shard %s.'
+            '') % (self.holder, number)
+        log.log2debug(1160, log_message)
+
+    def _release(self, number):
+        """Release the lease of a shard.
+
+        Args:
+            number: Shard number
+
+        Returns:
+            None
+
+        """
+        # Release
+        f_descriptor = self._leases.pop(number)
+        os.ftruncate(f_descriptor, 0)
+        fcntl.lockf(f_descriptor, fcntl.LOCK_UN)
+        os.close(f_descriptor)
+
+    def _members(self):
+        """Count the ingesters with recent heartbeats.
+
+        Args:
+            None
+
+        Returns:
+            count: Number of ingesters
+
+        """
+        # Initialize key variables
+        count = 0
+        now = time.time()
+
+        for filename in os.listdir(self.directory):
+            if filename.startswith('member-') is False:
+                continue
+            if filename.endswith('.tmp') is True:
+                continue
+            filepath = os.path.join(self.directory, filename)
+            (_, heartbeat) = _read(filepath)
+            if now - heartbeat <= self.timeout:
+                count += 1
+            elif now - heartbeat > self.timeout * 10:
+                # Remove the files of ingesters that stopped long ago
+                try:
+                    os.remove(filepath)
+                except OSError:
+                    pass
+
+        # Return
+        count = max(1, count)
+        return count
+
+    def _content(self):
+        """Create the contents of lease and member files.
+
+        Args:
+            None
+
+        Returns:
+            value: Contents
+
+        """
+        # Return
+        value = (('%s %s\n') % (self.holder, time.time())).encode()
+        return value
+
+    def _lease_file(self, number):
+        """Get the name of a lease file.
+
+        Args:
+            number: Shard number
+
+        Returns:
+            value: Name of file
+
+        """
+        # Return
+        value = os.path.join(self.directory, ('shard-%s.lease') % (number))
+        return value
+
+    def _member_file(self, holder):
+        """Get the name of a member file.
+
+        Args:
+            holder: Name of the ingester
+
+        Returns:
+            value: Name of file
+
+        """
+        # Return
+        value = os.path.join(self.directory, ('member-%s') % (holder))
+        return value
+
+
+def shard(devicehash, shards):
+    """Get the shard of a devicehash.
+
+    Args:
+        devicehash: Devicehash
+        shards: Number of shards
+
+    Returns:
+        value: Shard number
+
+    """
+    # Return
+    value = int(devicehash[:8], 16) % shards
+    return value
+
+
+def _lock(filename):
+    """Lock a file without waiting.
+
+    Args:
+        filename: Name of file
+
+    Returns:
+        f_descriptor: File descriptor of the locked file,
+            None if it is locked by another process
+
+    """
+    # Lock
+    f_descriptor = os.open(filename, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        fcntl.lockf(f_descriptor, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError as exception_error:
+        os.close(f_descriptor)
+        if exception_error.errno in (errno.EACCES, errno.EAGAIN):
+            return None
+        raise
+    return f_descriptor
+
+
+def _read(filename):
+    """Read a lease or member file.
+
+    Args:
+        filename: Name of file
+
+    Returns:
+        result: Tuple of (holder, heartbeat). The modification time of
+            the file is used as the heartbeat if it has no contents yet.
+            The heartbeat is zero if the file doesn't exist.
+
+    """
+    # Initialize key variables
+    result = (None, 0)
+
+    # Read
+    try:
+        with open(filename, 'r') as f_handle:
+            content = f_handle.read().split()
+            modified = os.fstat(f_handle.fileno()).st_mtime
+        if len(content) == 2:
+            result = (content[0], float(content[1]))
+        else:
+            result = (None, modified)
+    except (OSError, ValueError):
+        pass
+
+    # Return
+    return result
+
+
+def _write(filename, content):
+    """Replace the contents of a file atomically.
+
+    Args:
+        filename: Name of file
+        content: Contents
+
+    Returns:
+        None
+
+    """
+    # Write
+    tmp_filename = ('%s.tmp') % (filename)
+    with open(tmp_filename, 'wb') as f_handle:
+        f_handle.write(content)
+    os.replace(tmp_filename, filename)
+
+
+def leases(config):
+    """Create a ShardLeases object from the configuration.
+
+    Args:
+        config: Configuration object
+
+    Returns:
+        result: ShardLeases object
+
+    """
+    # Return
+    result = ShardLeases(
+        config.ingest_lease_directory(),
+        shards=config.ingest_shards(),
+        timeout=config.ingest_lease_timeout())
+    return result
@@ -0,0 +1,362 @@
+#!/usr/bin/env python3
+"""Ingest queue built on Redis Streams.
+
+The API adds agent posts to a stream. Ingesters read them as members of a
+consumer group, and acknowledge them once they have been written to the
+database. Posts read by an ingester that died before acknowledging them
+are reclaimed by the others. The length of the stream is capped.
+
+Posts that are read ingest_stream_max_deliveries times without being
+acknowledged, such as those that always make ingesting fail, are moved to a
+dead letter stream instead of being reclaimed again.
+
+"""
+
+# Standard libraries
+import os
+import time
+import socket
+
+# PIP libraries
+import redis
+
+# Infoset libraries
+from infoset.cache import cache
+from infoset.utils import codec
+from infoset.utils import log
+
+# Names of the stream, its dead letter stream, its consumer group and the
+# field holding posts
+_STREAM = 'infoset-ng:ingest'
+_DEAD = 'infoset-ng:ingest:dead'
+_GROUP = 'ingesters'
+_FIELD = b'data'
+
+
+class IngestStream(object):
+    """Add agent posts to, and ingest them from, a Redis stream.
+
+    Args:
+        None
+
+    Returns:
+        None
+
+    Methods:
+
+    """
+
+    def __init__(self, config, consumer=None):
+        """Function for intializing the class.
+
+        Args:
+            config: Configuration object
+            consumer: Name of this ingester in the consumer group
+
+        Returns:
+            None
+
+        """
+        # Initialize key variables
+        self.redis = redis.StrictRedis(
+            host=config.redis_hostname(), port=config.redis_port(), db=0)
+        self.codec = codec.codec(config)
+        self.maxlen = config.ingest_stream_maxlen()
+        self.claim_idle = config.ingest_stream_claim_idle()
+        self.max_deliveries = config.ingest_stream_max_deliveries()
+        self.batch_size = config.celery_batch_size()
+        self._group = False
+        if consumer is None:
+            self.consumer = ('%s-%s') % (socket.gethostname(), os.getpid())
+        else:
+            self.consumer = consumer
+
+    def add(self, body, content_type=None):
+        """Add the body of an agent post to the stream.
+
+        Args:
+            body: Body of POST
+            content_type: Content type of the body
+
+        Returns:
+            entry_id: ID of the stream entry
+
+        """
+        # Return
+        (entry_id,) = self.add_many([(body, content_type)])
+        return entry_id
+
+    def add_many(self, posts):
+        """Add the bodies of agent posts to the stream in one round trip.
+
+        Args:
+            posts: List of (body, content_type) tuples
+
+        Returns:
+            entry_ids: List of IDs of the stream entries
+
+        """
+        # Add
+        pipeline = self.redis.pipeline(transaction=False)
+        for (body, content_type) in posts:
+            pipeline.xadd(
+                _STREAM, {_FIELD: self.codec.encode_body(body, content_type)},
+                maxlen=self.maxlen, approximate=True)
+        entry_ids = pipeline.execute()
+        return entry_ids
+
+    def length(self):
+        """Get the number of posts in the stream not yet acknowledged.
+
+        Args:
+            None
+
+        Returns:
+            length: Number of posts
+
+        """
+        # Acknowledged posts are deleted
+        length = self.redis.xlen(_STREAM)
+        return length
+
+    def read(self, count, block=None):
+        """Read posts not yet acknowledged by any ingester.
+
+        Posts read by other ingesters more than ingest_stream_claim_idle
+        seconds ago are reclaimed first.
+
+        Args:
+            count: Maximum number of posts
+            block: Number of seconds to wait for new posts. Don't wait
+                if None
+
+        Returns:
+            entries: List of (entry_id, value) tuples. Decode the values
+                with infoset.utils.codec.decode()
+
+        """
+        # Initialize key variables
+        self._create_group()
+        entries = self._reclaim(count)
+
+        # Read new posts
+        if bool(entries) is False:
+            if block is not None:
+                block = max(1, int(block * 1000))
+            result = self.redis.xreadgroup(
+                _GROUP, self.consumer, {_STREAM: '>'},
+                count=count, block=block)
+            for (_, items) in result:
+                entries.extend(items)
+
+        # Return
+        entries = [
+            (entry_id, fields.get(_FIELD)) for (entry_id, fields) in entries]
+        return entries
+
+    def ack(self, entry_ids):
+        """Acknowledge and delete ingested posts.
+
+        Args:
+            entry_ids: List of IDs of stream entries
+
+        Returns:
+            None
+
+        """
+        # Acknowledge
+        if bool(entry_ids) is True:
+            pipeline = self.redis.pipeline(transaction=True)
+            pipeline.xack(_STREAM, _GROUP, *entry_ids)
+            pipeline.xdel(_STREAM, *entry_ids)
+            pipeline.execute()
+
+    def process(self, block=None, duration=None):
+        """Ingest posts until there are none left.
+
+        Posts are only acknowledged once they have been ingested. Posts of
+        a batch that fails with an exception are reclaimed later.
+
+        Args:
+            block: Number of seconds to wait for the first post. Don't wait
+                if None
+            duration: Number of seconds after which no more batches are
+                started. No limit if None
+
+        Returns:
+            count: Number of posts ingested
+
+        """
+        # Initialize key variables
+        count = 0
+        start = time.time()
+
+        while duration is None or time.time() - start < duration:
+            # Get the next batch
+            try:
+                entries = self.read(self.batch_size, block=block)
+            except redis.RedisError as exception_error:
+                log_message = (
+                    'Unable to read the ingest stream. Error: "%s"'
+                    '') % (exception_error)
+                log.log2warning(1170, log_message)
+                break
+            if bool(entries) is False:
+                break
+            block = None
+
+            # Ingest
+            try:
+                cache.ProcessRedisBatch(
+                    [value for (_, value) in entries]).process()
+            except Exception as exception_error:
+                log_message = (
+                    'Failed to ingest %s posts from the ingest stream. '
+                    'Error: "%s"') % (len(entries), exception_error)
+                log.log2warning(1171, log_message)
+                break
+
+            # Acknowledge
+            try:
+                self.ack([entry_id for (entry_id, _) in entries])
+            except redis.RedisError as exception_error:
+                log_message = (
+                    'Unable to acknowledge posts in the ingest stream. '
+                    'Error: "%s"') % (exception_error)
+                log.log2warning(1203, log_message)
+                break
+            count += len(entries)
+
+        # Log
+        if count > 0:
+            log_message = (
+                'Ingested %s posts from the ingest stream.') % (count)
+            log.log2debug(1172, log_message)
+
+        # Return
+        return count
+
+    def _reclaim(self, count):
+        """Reclaim posts read by ingesters that didn't acknowledge them.
+
+        Args:
+            count: Maximum number of posts
+
+        Returns:
+            entries: List of (entry_id, fields) tuples
+
+        """
+        # Initialize key variables
+        min_idle_time = int(self.claim_idle * 1000)
+
+        # Give up on posts that have been read too often
+        self._dead_letter(count, min_idle_time)
+
+        # Reclaim
+        result = self.redis.xautoclaim(
+            _STREAM, _GROUP, self.consumer,
+            min_idle_time=min_idle_time, start_id='0-0', count=count)
+
+        # Entries trimmed from the stream have no fields
+        entries = []
+        missing = []
+        for (entry_id, fields) in result[1]:
+            if fields is None:
+                missing.append(entry_id)
+            else:
+                entries.append((entry_id, fields))
+        if bool(missing) is True:
+            self.redis.xack(_STREAM, _GROUP, *missing)
+
+        # Log
+        if bool(entries) is True:
+            log_message = (
+                'Reclaimed %s posts from the ingest stream.'
+                '') % (len(entries))
+            log.log2info(1173, log_message)
+
+        # Return
+        return entries
+
+    def _dead_letter(self, count, min_idle_time):
+        """Move posts that have been read too often to the dead letter stream.
+
+        Args:
+            count: Maximum number of posts to check
+            min_idle_time: Number of milliseconds since the posts were last
+                read by an ingester
+
+        Returns:
+            None
+
+        """
+        # Find the posts
+        pending = self.redis.xpending_range(
+            _STREAM, _GROUP, min='-', max='+', count=count,
+            idle=min_idle_time)
+        entry_ids = [
+            item['message_id'] for item in pending
+            if item['times_delivered'] >= self.max_deliveries]
+        if bool(entry_ids) is False:
+            return
+
+        # Claim them, so that no other ingester moves them too
+        entries = self.redis.xclaim(
+            _STREAM, _GROUP, self.consumer,
+            min_idle_time=min_idle_time, message_ids=entry_ids)
+
+        # Move them. Posts trimmed from the stream are left to _reclaim()
+        entries = [
+            (entry_id, fields) for (entry_id, fields) in entries
+            if entry_id is not None]
+        pipeline = self.redis.pipeline(transaction=True)
+        for (entry_id, fields) in entries:
+            pipeline.xadd(_DEAD, fields, maxlen=self.maxlen, approximate=True)
+            pipeline.xack(_STREAM, _GROUP, entry_id)
+            pipeline.xdel(_STREAM, entry_id)
+        pipeline.execute()
+
+        # Log
+        if bool(entries) is True:
+            log_message = (
+                'Moved %s posts that were read %s times without being '
+                'ingested to the %s stream.'
+                '') % (len(entries), self.max_deliveries, _DEAD)
+            log.log2warning(1204, log_message)
+
+    def _create_group(self):
+        """Create the stream and consumer group if they don't exist.
+
+        Args:
+            None
+
+        Returns:
+            None
+
+        """
+        # Create
+        if self._group is True:
+            return
+        try:
+            self.redis.xgroup_create(_STREAM, _GROUP, id='0', mkstream=True)
+        except redis.ResponseError as exception_error:
+            if 'BUSYGROUP' not in str(exception_error):
+                raise
+        self._group = True
+
+
+def stream(config):
+    """Create an IngestStream if configured.
+
+    Args:
+        config: Configuration object
+
+    Returns:
+        result: IngestStream object, None if ingest_stream is False
+
+    """
+    # Return
+    result = None
+    if config.ingest_stream() is True:
+        result = IngestStream(config)
+    return result
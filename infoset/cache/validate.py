@@ -6,14 +6,21 @@ import os
 import re
 import json
 import time
+from collections import deque
 
 # Infoset libraries
 from infoset.utils import log
 from infoset.utils import general
+from infoset.utils import payload
 from infoset.db import db_deviceagent
 from infoset.db import db_agent
 from infoset.db import db_device
 
+# Main keys of ingested data and their types
+_MAIN_KEYS = (
+    ('timestamp', int), ('id_agent', str), ('agent', str),
+    ('devicename', str))
+
 
 class ValidateCache(object):
     """Primary class that reads and validates agent data from the cache.
@@ -23,24 +30,23 @@ class ValidateCache(object):
     class _CheckFile: Makes sure the file has the correct
         1) naming convention
 
-    class _CheckMainKeys: Makes sure the file has the correct
+    class _CheckPayload: Makes sure the file has the correct
         1) first level keys in the json contents of the cache file
-
-    class _CheckData: Makes sure the file has the correct
-        1) second level keys in the json contents of the cache file
-        2) values for the 'data' key for each agent label in the data
+        2) second level keys in the json contents of the cache file
+        3) values for the 'data' key for each agent label in the data
 
     class _CheckDuplicates: Makes sure the data in the json cache file
         hasn't already been inserted into the database
 
     """
 
-    def __init__(self, filepath=None, data=None):
+    def __init__(self, filepath=None, data=None, timestamps=None):
         """Method initializing the class.
 
         Args:
             filepath: Cache filename
             data: Data dict expected to be in a cache file (Agent or server)
+            timestamps: Dict of timestamps shared by a ValidateBatch
 
         Returns:
             None
@@ -51,6 +57,7 @@ class ValidateCache(object):
         self.information = {}
         _data = {}
         self.filepath = filepath
+        self.timestamps = timestamps
 
         # Assign data to self.information for future validity checks
         if filepath is not None:
@@ -61,14 +68,9 @@ class ValidateCache(object):
             else:
                 self._valid = False
         else:
+            # The main keys are checked with the rest of the data
             if isinstance(data, dict) is True:
-                # Check main keys in data.
-                # Data read from file has already gone through this process.
-                contents = _CheckMainKeys(data)
-                if contents.valid() is True:
-                    self.information = data
-                else:
-                    self._valid = False
+                self.information = data
             else:
                 self._valid = False
 
@@ -106,12 +108,13 @@ class ValidateCache(object):
 
         # Check timeseries and timefixed data in the data
         if len(valid_list) == valid_list.count(True):
-            check = _CheckData(self.information)
+            check = _CheckPayload(self.information)
             valid_list.append(check.valid())
 
         # Check if data to be validated is already in the database
         if len(valid_list) == valid_list.count(True):
-            check = _CheckDuplicates(self.information)
+            check = _CheckDuplicates(
+                self.information, timestamps=self.timestamps)
             valid_list.append(check.valid())
 
         # Do final check
@@ -135,6 +138,68 @@ class ValidateCache(object):
         return all_ok
 
 
+class ValidateBatch(object):
+    """Validate successive payloads of an agent.
+
+    The database is queried only once for the last_timestamp of each
+    id_agent and devicename in the batch. Duplicate payloads are then
+    detected in memory.
+
+    Args:
+        None
+
+    Returns:
+        None
+
+    Methods:
+
+    """
+
+    def __init__(self):
+        """Method initializing the class.
+
+        Args:
+            None
+
+        Returns:
+            None
+
+        """
+        # Initialize key variables
+        self.timestamps = {}
+
+    def getinfo(self, filepath=None, data=None):
+        """Provide validated information of a payload when valid.
+
+        Args:
+            filepath: Cache filename
+            data: Data dict expected to be in a cache file (Agent or server)
+
+        Returns:
+            information: Data, False if invalid or a duplicate
+
+        """
+        # Return
+        validator = ValidateCache(
+            filepath=filepath, data=data, timestamps=self.timestamps)
+        information = validator.getinfo()
+        return information
+
+    def lookups(self):
+        """Get the number of last_timestamp database lookups done.
+
+        Args:
+            None
+
+        Returns:
+            value: Number of lookups
+
+        """
+        # Return
+        value = len(self.timestamps)
+        return value
+
+
 class _CheckDuplicates(object):
     """Checks for duplicate data entries.
 
@@ -143,11 +208,15 @@ class _CheckDuplicates(object):
 
     """
 
-    def __init__(self, data):
+    def __init__(self, data, timestamps=None):
         """Method initializing the class.
 
         Args:
             data: Ingested data to validate
+            timestamps: Dict of the last_timestamp and the timestamps
+                already validated for each id_agent and devicename.
+                The database is only queried for missing entries.
+                The database is always queried if None.
 
         Returns:
             None
@@ -156,6 +225,7 @@ class _CheckDuplicates(object):
         # Initialize key variables
         self._valid = True
         self.data = data
+        self.timestamps = timestamps
 
         # Check that we are evaluating a dict
         if isinstance(self.data, dict) is False:
@@ -186,6 +256,11 @@ class _CheckDuplicates(object):
         id_agent = self.data['id_agent']
         devicename = self.data['devicename']
 
+        # Use the timestamps of the batch if available
+        if self.timestamps is not None:
+            valid = self._batch_valid(timestamp, id_agent, devicename)
+            return valid
+
         # Check if there is a duplicate entry for this id_agent
         if db_agent.id_agent_exists(id_agent) is not False:
             idx_agent = db_agent.GetIDAgent(id_agent).idx_agent()
@@ -214,76 +289,13 @@ class _CheckDuplicates(object):
         # Return
         return valid
 
-
-class _CheckData(object):
-    """Validates timeseries data in ingested data.
-
-    Makes sure the file has the correct
-        1) second level keys in the json contents of the cache file
-        2) values for the 'data' key for each agent label in the data
-
-    """
-
-    def __init__(self, data):
-        """Method initializing the class.
+    def _batch_valid(self, timestamp, id_agent, devicename):
+        """Check for duplicates using the timestamps of a batch.
 
         Args:
-            data: Ingested data to validate
-
-        Returns:
-            None
-
-        """
-        # Initialize key variables
-        self._valid = True
-        self.data = data
-
-        # Check that we are evaluating a dict
-        if isinstance(self.data, dict) is False:
-            log_message = ('Ingest data is not a dictionary')
-            log.log2warning(1121, log_message)
-            self._valid = False
-
-    def _data_keys_ok(self):
-        """Check if data keys are OK.
-
-        Args:
-            None
-
-        Returns:
-            valid: True if valid
-
-        """
-        # Initialize key variables
-        valid = False
-        count = 0
-        data_types = ['timeseries', 'timefixed']
-
-        # Process data
-        if self._valid is True:
-            for data_type in data_types:
-                # Skip if data type isn't in the data
-                if data_type in self.data:
-                    count += 1
-
-        # Verify validity
-        if count > 0:
-            valid = True
-
-        # Log error
-        if valid is False:
-            log_message = (
-                'Ingest data does not contain all data keys.')
-            log.log2warning(1003, log_message)
-
-        # Return
-        return valid
-
-    def _agent_label_keys_ok(self):
-        """Check if agent label keys are OK.
-
-        Args:
-            None
+            timestamp: Timestamp of the data
+            id_agent: Agent ID
+            devicename: Devicename
 
         Returns:
             valid: True if valid
@@ -291,152 +303,47 @@ class _CheckData(object):
         """
         # Initialize key variables
         valid = True
-        data_types = ['timeseries', 'timefixed']
-
-        # Check major keys expected under each ageng label
-        if self._data_keys_ok() is False:
+        key = (id_agent, devicename)
+
+        # Get the last_timestamp from the database once per batch
+        if key not in self.timestamps:
+            self.timestamps[key] = {
+                'last_timestamp': db_deviceagent.last_timestamp(
+                    id_agent, devicename),
+                'validated': set()}
+        last_timestamp = self.timestamps[key]['last_timestamp']
+        validated = self.timestamps[key]['validated']
+
+        # Validate
+        if last_timestamp is not None and timestamp <= last_timestamp:
+            log_message = (
+                'Data for id_agent %s, devicename %s '
+                'at timestamp %s '
+                'is already found in database.'
+                '') % (id_agent, devicename, timestamp)
+            log.log2warning(1113, log_message)
             valid = False
-            return valid
-
-        # Check each data_type
-        for data_type in data_types:
-            # Skip if key is not present
-            if data_type not in self.data:
-                continue
-
-            # Process next major key
-            # The "_" in this case is the agent label in the dict
-            for _, agent_items in sorted(
-                    self.data[data_type].items()):
-                # Process keys in data reported by agents
-                for key in ['base_type', 'description', 'data']:
-                    if key not in agent_items:
-                        log_message = (
-                            '"%s" data type does not contain a "%s" key.'
-                            '') % (data_type, key)
-                        log.log2warning(1115, log_message)
-                        valid = False
-                        return valid
-
-                # Process data
-                if 'data' in agent_items:
-                    for datapoint in agent_items['data']:
-                        if len(datapoint) != 3:
-                            log_message = (
-                                '"%s" data type does not contain valid '
-                                'datapoints in it\'s "data" key.'
-                                '') % (data_type)
-                            log.log2warning(1114, log_message)
-                            valid = False
-                else:
-                    # If there is no data, then it must be invalid
-                    log_message = (
-                        'Ingest data has no "data" label '
-                        'values for database.')
-                    log.log2warning(1004, log_message)
-                    valid = False
-                    return valid
-
-        # Return
-        return valid
-
-    def _timeseries_data_ok(self):
-        """Check if timeseries data is OK.
-
-        Args:
-            None
-
-        Returns:
-            valid: True if valid
-
-        """
-        # Initialize key variables
-        valid = True
-        data_type = 'timeseries'
-
-        # Check major keys expected under each ageng label
-        if self._agent_label_keys_ok() is False:
+        elif timestamp in validated:
+            log_message = (
+                'Data for id_agent %s, devicename %s '
+                'at timestamp %s '
+                'is already found in the batch.'
+                '') % (id_agent, devicename, timestamp)
+            log.log2warning(1164, log_message)
             valid = False
-            return valid
-
-        # Check for timeseries data
-        if data_type in self.data:
-
-            # Process the data type
-            for _, reported_data in sorted(
-                    self.data[data_type].items()):
-
-                # Make sure the base types are numeric
-                if 'base_type' in reported_data:
-                    try:
-                        float(reported_data['base_type'])
-                    except:
-                        log_message = (
-                            'TimeSeries "base_type" key is non numeric.')
-                        log.log2warning(1120, log_message)
-                        valid = False
-                        return valid
-                else:
-                    log_message = (
-                        'TimeSeries data has no "base_type" key.')
-                    log.log2warning(1117, log_message)
-                    valid = False
-                    return valid
-
-                # Process data
-                if 'data' in reported_data:
-                    for datapoint in reported_data['data']:
-                        # Check to make sure value is numeric
-                        value = datapoint[1]
-                        try:
-                            float(value)
-                        except:
-                            log_message = (
-                                'TimeSeries data has non numeric data values.')
-                            log.log2warning(1119, log_message)
-                            valid = False
-                            return valid
-                else:
-                    log_message = (
-                        'TimeSeries data has no "data" key.')
-                    log.log2warning(1118, log_message)
-                    valid = False
-                    return valid
-
-        # Return
-        return valid
-
-    def valid(self):
-        """Validate Data.
-
-        Args:
-            None
-
-        Returns:
-            valid: Valid if True
-
-        """
-        # Initialize key variables
-        valid = False
-        valid_list = [self._valid]
-
-        # All other tests need to pass for _timeseries_data_ok to pass
-        valid_list.append(self._timeseries_data_ok())
+        else:
+            validated.add(timestamp)
 
         # Return
-        if len(valid_list) == valid_list.count(True):
-            valid = True
-        else:
-            log_message = ('Failed validity testing. %s') % (valid_list)
-            log.log2warning(1002, log_message)
         return valid
 
 
-class _CheckMainKeys(object):
-    """Validates main keys in ingested data.
+class _CheckPayload(object):
+    """Validates ingested data in a single pass.
 
-    Makes sure the file has the correct first level keys in the json
-    contents of the cache file
+    Checks the main keys, data types, agent label keys and datapoints of
+    the data, walking it only once and stopping at the first error. Only
+    the first of several errors is therefore logged.
 
     """
 
@@ -452,104 +359,9 @@ class _CheckMainKeys(object):
         """
         # Initialize key variables
         self.data = data
-        self._valid = True
-
-        # Check if data is a dict
-        if isinstance(data, dict) is False:
-            log_message = ('Ingest data is not a dictionary')
-            log.log2warning(1093, log_message)
-            self._valid = False
-
-    def _timestamp(self):
-        """Verify existence of timestamp key.
-
-        Args:
-            None
-
-        Returns:
-            valid: Valid if True
-
-        """
-        # Initialize key variables
-        valid = False
-
-        # Check key
-        if self._valid is True:
-            if 'timestamp' in self.data:
-                if isinstance(self.data['timestamp'], int) is True:
-                    valid = True
-
-        # Return
-        return valid
-
-    def _id_agent(self):
-        """Verify existence of id_agent key.
-
-        Args:
-            None
-
-        Returns:
-            valid: Valid if True
-
-        """
-        # Initialize key variables
-        valid = False
-
-        # Check key
-        if self._valid is True:
-            if 'id_agent' in self.data:
-                if isinstance(self.data['id_agent'], str) is True:
-                    valid = True
-
-        # Return
-        return valid
-
-    def _agent(self):
-        """Verify existence of agent key.
-
-        Args:
-            None
-
-        Returns:
-            valid: Valid if True
-
-        """
-        # Initialize key variables
-        valid = False
-
-        # Check key
-        if self._valid is True:
-            if 'agent' in self.data:
-                if isinstance(self.data['agent'], str) is True:
-                    valid = True
-
-        # Return
-        return valid
-
-    def _devicename(self):
-        """Verify existence of devicename key.
-
-        Args:
-            None
-
-        Returns:
-            valid: Valid if True
-
-        """
-        # Initialize key variables
-        valid = False
-
-        # Check key
-        if self._valid is True:
-            if 'devicename' in self.data:
-                if isinstance(self.data['devicename'], str) is True:
-                    valid = True
-
-        # Return
-        return valid
 
     def valid(self):
-        """Validate main keys.
+        """Validate Data.
 
         Args:
             None
@@ -558,22 +370,14 @@ class _CheckMainKeys(object):
             valid: Valid if True
 
         """
-        # Initialize key variables
-        valid = False
-        valid_list = [self._valid]
-        valid_list.append(self._timestamp())
-        valid_list.append(self._agent())
-        valid_list.append(self._id_agent())
-        valid_list.append(self._devicename())
-
-        # Define validity
-        if len(valid_list) == valid_list.count(True):
-            valid = True
-        else:
-            log_message = ('Ingest data does not have all main keys')
-            log.log2warning(1000, log_message)
+        # Log the error, if any
+        error = _payload_error(self.data)
+        if error is not None:
+            (code, log_message) = error
+            log.log2warning(code, log_message)
 
         # Return
+        valid = error is None
         return valid
 
 
@@ -611,10 +415,15 @@ class _CheckFile(object):
             log.log2warning(1026, log_message)
 
         # Check main keys in data.
-        contents = _CheckMainKeys(self.data)
-        if contents.valid() is True:
+        if isinstance(self.data, dict) is False:
+            log_message = ('Ingest data is not a dictionary')
+            log.log2warning(1093, log_message)
+        if _main_keys_ok(self.data) is True:
             if name_ok is True:
                 self._valid = True
+        else:
+            log_message = ('Ingest data does not have all main keys')
+            log.log2warning(1000, log_message)
 
     def _keys_in_filename(self):
         """Validate main keys contained in the file are in the filename.
@@ -713,6 +522,227 @@ class _CheckFile(object):
         return self.data
 
 
+def payload_ok(data):
+    """Determine whether ingested data is valid, without logging.
+
+    The duplicate checks of ValidateCache aren't done.
+
+    Args:
+        data: Ingested data to validate
+
+    Returns:
+        valid: True if valid
+
+    """
+    # Return
+    valid = _payload_error(data) is None
+    return valid
+
+
+def _payload_error(data):
+    """Find the first error in ingested data.
+
+    Args:
+        data: Ingested data to validate
+
+    Returns:
+        error: Tuple of (code, log_message) for the error,
+            None if the data is valid
+
+    """
+    # Check the main keys
+    if isinstance(data, dict) is False:
+        return (1121, 'Ingest data is not a dictionary')
+    if _main_keys_ok(data) is False:
+        return (1000, 'Ingest data does not have all main keys')
+
+    # Check the version. Columnar payloads list their sources once
+    version = payload.version(data)
+    if version not in payload.LABEL_KEYS:
+        return (1189, (
+            'Ingest data has unsupported version "%s".') % (version))
+    sources = data.get('sources')
+    if version == payload.VERSION and isinstance(sources, list) is False:
+        return (1190, 'Ingest data "sources" key is not a list.')
+
+    # Check major keys expected under each agent label
+    if 'timeseries' not in data and 'timefixed' not in data:
+        return (1003, 'Ingest data does not contain all data keys.')
+
+    for data_type in ('timeseries', 'timefixed'):
+        # Skip if data type isn't in the data
+        if data_type not in data:
+            continue
+        labels = data[data_type]
+        if isinstance(labels, dict) is False:
+            return (1165, (
+                '"%s" data type is not a dictionary.') % (data_type))
+        timeseries = data_type == 'timeseries'
+
+        # Process the agent labels
+        for agent_items in labels.values():
+            for key in payload.LABEL_KEYS[version]:
+                if isinstance(agent_items, dict) is False or (
+                        key not in agent_items):
+                    return (1115, (
+                        '"%s" data type does not contain a "%s" key.'
+                        '') % (data_type, key))
+
+            # Make sure the base types are numeric
+            if timeseries is True:
+                try:
+                    float(agent_items['base_type'])
+                except (TypeError, ValueError):
+                    return (
+                        1120, 'TimeSeries "base_type" key is non numeric.')
+
+            # Process the datapoints
+            if version == payload.VERSION:
+                error = _columns_error(
+                    data_type, agent_items, sources, timeseries)
+            else:
+                error = _datapoints_error(
+                    data_type, agent_items['data'], timeseries)
+            if error is not None:
+                return error
+
+    # Return
+    return None
+
+
+def _main_keys_ok(data):
+    """Determine whether ingested data has all main keys.
+
+    Args:
+        data: Ingested data to validate
+
+    Returns:
+        valid: True if valid
+
+    """
+    # Initialize key variables
+    valid = isinstance(data, dict)
+
+    # Check the keys and the types of their values
+    if valid is True:
+        for key, key_type in _MAIN_KEYS:
+            if isinstance(data.get(key), key_type) is False:
+                valid = False
+                break
+
+    # Return
+    return valid
+
+
+def _datapoints_error(data_type, datapoints, timeseries):
+    """Find the first error in the datapoints of an agent label.
+
+    Args:
+        data_type: Data type of the datapoints
+        datapoints: List of datapoints
+        timeseries: True if values must be numeric
+
+    Returns:
+        error: Tuple of (code, log_message) for the error,
+            None if the datapoints are valid
+
+    """
+    # Initialize key variables
+    datapoint = None
+    error = (1114, (
+        '"%s" data type does not contain valid '
+        'datapoints in it\'s "data" key.'
+        '') % (data_type))
+
+    # Check all datapoints in one loop. Unpacking fails if a datapoint
+    # doesn't have three values. Work out what went wrong only when an
+    # exception occurs.
+    try:
+        if timeseries is True:
+            for datapoint in datapoints:
+                (_, value, _) = datapoint
+                float(value)
+        else:
+            for datapoint in datapoints:
+                (_, _, _) = datapoint
+    except (TypeError, ValueError):
+        if _datapoint_ok(datapoint) is True:
+            error = (1119, 'TimeSeries data has non numeric data values.')
+        return error
+
+    # Return
+    return None
+
+
+def _columns_error(data_type, columns, sources, timeseries):
+    """Find the first error in the datapoints of a columnar agent label.
+
+    Args:
+        data_type: Data type of the datapoints
+        columns: Dict of the agent label
+        sources: List of sources of the payload
+        timeseries: True if values must be numeric
+
+    Returns:
+        error: Tuple of (code, log_message) for the error,
+            None if the datapoints are valid
+
+    """
+    # Initialize key variables
+    indexes = columns['index']
+    values = columns['value']
+    positions = columns['source']
+    error = (1114, (
+        '"%s" data type does not contain valid '
+        'datapoints in it\'s "index", "value" and "source" keys.'
+        '') % (data_type))
+
+    # The lists must be of the same length
+    for column in (indexes, values, positions):
+        if isinstance(column, list) is False:
+            return error
+    if len(indexes) != len(values) or len(values) != len(positions):
+        return error
+
+    # Sources must be positions in the list of sources. Look them all up
+    # at once, which is much quicker than checking each in turn
+    try:
+        if bool(positions) is True and min(positions) < 0:
+            return error
+        deque(map(sources.__getitem__, positions), maxlen=0)
+    except (TypeError, IndexError):
+        return error
+
+    # Check that values are numbers. Unlike version 1 payloads, numeric
+    # strings aren't accepted, so they don't have to be converted to check
+    if timeseries is True:
+        try:
+            sum(values)
+        except TypeError:
+            return (1119, 'TimeSeries data has non numeric data values.')
+
+    # Return
+    return None
+
+
+def _datapoint_ok(datapoint):
+    """Determine whether a datapoint has three values.
+
+    Args:
+        datapoint: Datapoint
+
+    Returns:
+        valid: True if valid
+
+    """
+    # Return
+    try:
+        valid = len(datapoint) == 3
+    except TypeError:
+        valid = False
+    return valid
+
+
 def _valid_filename(filepath):
     """Check if the filename in the filepath is valid.
 
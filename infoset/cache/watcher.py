@@ -0,0 +1,391 @@
+#!/usr/bin/env python3
+"""Event driven tracking of cache files that are ready for ingesting.
+
+The CacheWatcher keeps an in-memory index of the cache files in the
+ingest_cache_directory. The index is updated using Linux inotify events,
+so the directory only needs to be fully scanned at startup.
+
+"""
+
+# Standard libraries
+import os
+import re
+import sys
+import time
+import errno
+import ctypes
+import ctypes.util
+import select
+import struct
+from collections import defaultdict
+
+# Infoset libraries
+from infoset.utils import log
+
+# Constants from <sys/inotify.h>
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_FROM = 0x00000040
+_IN_MOVED_TO = 0x00000080
+_IN_DELETE = 0x00000200
+_IN_DELETE_SELF = 0x00000400
+_IN_MOVE_SELF = 0x00000800
+_IN_Q_OVERFLOW = 0x00004000
+_IN_IGNORED = 0x00008000
+_IN_ONLYDIR = 0x01000000
+_EVENT = struct.Struct('iIII')
+
+# Filenames are a numeric timestamp, id_agent and devicehash. Agent spool
+# segments are also accepted
+_REGEX = re.compile(r'^(\d+)_([0-9a-f]+)_([0-9a-f]+)\.(?:json|seg)$')
+
+
+class CacheWatcher(object):
+    """Track cache files that are ready for ingesting.
+
+    Files are ready when they have been closed after writing, or renamed
+    into the directory. Files found by the startup scan are only ready once
+    they are older than the age limit, as they could still be written to.
+
+    Args:
+        None
+
+    Returns:
+        None
+
+    Methods:
+
+    """
+
+    def __init__(self, cache_dir, age=15):
+        """Function for intializing the class.
+
+        Args:
+            cache_dir: Cache directory to watch
+            age: Age in seconds of files found by a scan before
+                they are considered ready
+
+        Returns:
+            None
+
+        """
+        # Initialize key variables
+        self.cache_dir = cache_dir
+        self.age = age
+        self._ready = {}
+        self._pending = {}
+        self._changes = 0
+        self._fd = None
+        self._libc = None
+
+        # Start watching before scanning so no files are missed
+        self._watch()
+        self.rescan()
+
+    def rescan(self):
+        """Rebuild the index from the contents of the cache directory.
+
+        Args:
+            None
+
+        Returns:
+            None
+
+        """
+        # Initialize key variables
+        self._ready = {}
+        self._pending = {}
+
+        # Process only valid agent filenames
+        with os.scandir(self.cache_dir) as entries:
+            for entry in entries:
+                if entry.is_file() is False:
+                    continue
+                if parse_filename(entry.name) is None:
+                    continue
+                self._pending[entry.name] = entry.stat().st_mtime
+
+        # Promote files that are old enough
+        self._promote()
+
+    def poll(self, timeout=0):
+        """Update the index with events from the cache directory.
+
+        Args:
+            timeout: Maximum number of seconds to wait for new events
+
+        Returns:
+            value: Number of ready files
+
+        """
+        # Wait for events
+        (readable, _, _) = select.select([self._fd], [], [], timeout)
+        if bool(readable) is True:
+            self._read()
+
+        # Promote files that are old enough
+        self._promote()
+
+        # Return
+        value = len(self._ready)
+        return value
+
+    def wait(self, timeout):
+        """Wait until new files are ready for ingesting.
+
+        Args:
+            timeout: Maximum number of seconds to wait
+
+        Returns:
+            value: Number of ready files
+
+        """
+        # Initialize key variables
+        stop = time.time() + timeout
+        changes = self._changes
+        value = self.poll()
+
+        # Wait
+        while self._changes == changes:
+            remaining = stop - time.time()
+            if remaining <= 0:
+                break
+            if bool(self._pending) is True:
+                remaining = min(remaining, 1)
+            value = self.poll(remaining)
+
+        # Return
+        return value
+
+    def metadata(self):
+        """Create metadata for ready cache files.
+
+        Args:
+            None
+
+        Returns:
+            id_agent_metadata: Dict in the format returned by
+                infoset.cache.cache.validate_cache_files(). The lists of
+                files are sorted by timestamp.
+
+        """
+        # Initialize key variables
+        id_agent_metadata = defaultdict(lambda: defaultdict(dict))
+
+        # Get the latest events
+        self.poll()
+
+        # Create a list of dicts of timestamps and filepaths
+        for filename in sorted(
+                self._ready, key=lambda key: self._ready[key][0]):
+            (timestamp, id_agent, devicehash) = self._ready[filename]
+            data_dict = {
+                'timestamp': timestamp,
+                'filepath': os.path.join(self.cache_dir, filename)
+            }
+            if bool(id_agent_metadata[devicehash][id_agent]) is True:
+                id_agent_metadata[devicehash][id_agent].append(data_dict)
+            else:
+                id_agent_metadata[devicehash][id_agent] = [data_dict]
+
+        # Return
+        return id_agent_metadata
+
+    def close(self):
+        """Stop watching the cache directory.
+
+        Args:
+            None
+
+        Returns:
+            None
+
+        """
+        # Close
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+    def __len__(self):
+        """Get the number of ready files.
+
+        Args:
+            None
+
+        Returns:
+            value: Number of ready files
+
+        """
+        return len(self._ready)
+
+    def _watch(self):
+        """Start an inotify watch on the cache directory.
+
+        Args:
+            None
+
+        Returns:
+            None
+
+        """
+        # Linux only
+        if sys.platform.startswith('linux') is False:
+            raise OSError(
+                errno.ENOSYS, 'inotify is only available on Linux')
+
+        # Setup inotify
+        self._libc = ctypes.CDLL(
+            ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        self._fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            error = ctypes.get_errno()
+            raise OSError(error, os.strerror(error))
+
+        # Add the watch
+        mask = (
+            _IN_CLOSE_WRITE | _IN_MOVED_TO | _IN_MOVED_FROM | _IN_DELETE |
+            _IN_DELETE_SELF | _IN_MOVE_SELF | _IN_ONLYDIR)
+        result = self._libc.inotify_add_watch(
+            self._fd, os.fsencode(self.cache_dir), mask)
+        if result < 0:
+            error = ctypes.get_errno()
+            self.close()
+            raise OSError(error, os.strerror(error), self.cache_dir)
+
+    def _read(self):
+        """Process pending inotify events.
+
+        Args:
+            None
+
+        Returns:
+            None
+
+        """
+        # Read all events
+        while True:
+            try:
+                buffer = os.read(self._fd, 65536)
+            except BlockingIOError:
+                break
+
+            offset = 0
+            while offset < len(buffer):
+                (_, mask, _, length) = _EVENT.unpack_from(buffer, offset)
+                offset += _EVENT.size
+                filename = os.fsdecode(
+                    buffer[offset:offset + length].rstrip(b'\0'))
+                offset += length
+                self._event(mask, filename)
+
+    def _event(self, mask, filename):
+        """Update the index with an inotify event.
+
+        Args:
+            mask: Event mask
+            filename: Name of file
+
+        Returns:
+            None
+
+        """
+        # Events were lost, start again
+        if bool(mask & _IN_Q_OVERFLOW) is True:
+            log_message = (
+                'Too many changes to cache directory %s. Rescanning.'
+                '') % (self.cache_dir)
+            log.log2warning(1155, log_message)
+            self.rescan()
+            return
+
+        # The directory itself has gone away
+        if bool(mask & (
+                _IN_DELETE_SELF | _IN_MOVE_SELF | _IN_IGNORED)) is True:
+            log_message = (
+                'Cache directory %s is no longer being watched.'
+                '') % (self.cache_dir)
+            log.log2warning(1156, log_message)
+            return
+
+        # Ignore files that can't be ingested
+        metadata = parse_filename(filename)
+        if metadata is None:
+            return
+
+        # Update the index
+        if bool(mask & (_IN_CLOSE_WRITE | _IN_MOVED_TO)) is True:
+            self._pending.pop(filename, None)
+            self._ready[filename] = metadata
+            self._changes += 1
+        elif bool(mask & (_IN_DELETE | _IN_MOVED_FROM)) is True:
+            self._pending.pop(filename, None)
+            self._ready.pop(filename, None)
+
+    def _promote(self):
+        """Make files found by a scan ready once they are old enough.
+
+        Args:
+            None
+
+        Returns:
+            None
+
+        """
+        # Initialize key variables
+        now = time.time()
+
+        for filename, mtime in list(self._pending.items()):
+            if now - mtime >= self.age:
+                del self._pending[filename]
+                self._ready[filename] = parse_filename(filename)
+                self._changes += 1
+
+
+def parse_filename(filename):
+    """Get the metadata encoded in the name of a cache file.
+
+    Args:
+        filename: Name of cache file
+
+    Returns:
+        result: Tuple of (timestamp, id_agent, devicehash),
+            None if the filename is invalid
+
+    """
+    # Initialize key variables
+    result = None
+
+    # Process only valid agent filenames
+    match = _REGEX.match(filename)
+    if match is not None:
+        (tstamp, id_agent, devicehash) = match.groups()
+        result = (int(tstamp), id_agent, devicehash)
+
+    # Return
+    return result
+
+
+def watcher(config):
+    """Create a CacheWatcher for the configured cache directory.
+
+    Args:
+        config: Configuration object
+
+    Returns:
+        result: CacheWatcher object, None if inotify is not available
+
+    """
+    # Initialize key variables
+    result = None
+    cache_dir = config.ingest_cache_directory()
+
+    # Create the watcher
+    try:
+        result = CacheWatcher(cache_dir)
+    except (OSError, AttributeError) as exception_error:
+        log_message = (
+            'Unable to watch cache directory %s. Scanning it instead. '
+            'Error: "%s"') % (cache_dir, exception_error)
+        log.log2warning(1157, log_message)
+
+    # Return
+    return result
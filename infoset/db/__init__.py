@@ -56,9 +56,11 @@ def main():
         URL = ('sqlite:///%s') % (
             config.db_file())
 
-        # Add MySQL to the pool
+        # Add MySQL to the pool. Connections wait for db_busy_timeout
+        # seconds for other connections to unlock the database
         db_engine = create_engine(
-            URL, echo=False)
+            URL, echo=False,
+            connect_args={'timeout': config.db_busy_timeout()})
 
         # Fix for multiprocessing
         _add_engine_pidguard(db_engine)
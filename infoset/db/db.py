@@ -2,6 +2,8 @@
 
 """Class to process connection."""
 
+import sqlite3
+
 from sqlalchemy import and_
 
 # Infoset libraries
@@ -10,6 +12,20 @@ from infoset.db import POOL
 from infoset.db.db_orm import Agent
 import os
 
+# SQLite result codes of databases locked by other connections
+_SQLITE_BUSY = 5
+_SQLITE_LOCKED = 6
+
+
+class DatabaseBusy(Exception):
+    """The database stayed locked by another connection.
+
+    Raised instead of dying, as the modification can be retried.
+
+    """
+
+    pass
+
 
 class Database(object):
     """Class interacts with the connection.
@@ -71,6 +87,7 @@ class Database(object):
         except Exception as exception_error:
             success = False
             session.rollback()
+            _raise_busy(exception_error)
             log_message = (
                 'Unable to modify database connection. '
                 'Error: \"%s\"') % (exception_error)
@@ -136,6 +153,7 @@ class Database(object):
 
         except Exception as exception_error:
             session.rollback()
+            _raise_busy(exception_error)
             log_message = (
                 'Unable to modify database connection. '
                 'Error: \"%s\"') % (exception_error)
@@ -170,6 +188,7 @@ class Database(object):
 
         except Exception as exception_error:
             session.rollback()
+            _raise_busy(exception_error)
             log_message = (
                 'Unable to modify database connection. '
                 'Error: \"%s\"') % (exception_error)
@@ -183,6 +202,45 @@ class Database(object):
         self.close()
 
 
+def busy(exception_error):
+    """Determine whether an error was caused by a locked database.
+
+    Args:
+        exception_error: Exception raised by SQLAlchemy or sqlite3
+
+    Returns:
+        result: True if the database was busy or locked
+
+    """
+    # Get the sqlite3 error wrapped by SQLAlchemy
+    error = getattr(exception_error, 'orig', exception_error)
+    if isinstance(error, sqlite3.OperationalError) is False:
+        return False
+
+    # Use the result code if available
+    code = getattr(error, 'sqlite_errorcode', None)
+    if code is not None:
+        result = code & 0xff in [_SQLITE_BUSY, _SQLITE_LOCKED]
+    else:
+        result = 'locked' in str(error)
+    return result
+
+
+def _raise_busy(exception_error):
+    """Raise DatabaseBusy if an error was caused by a locked database.
+
+    Args:
+        exception_error: Exception raised by SQLAlchemy or sqlite3
+
+    Returns:
+        None
+
+    """
+    # Raise
+    if busy(exception_error) is True:
+        raise DatabaseBusy(str(exception_error)) from exception_error
+
+
 def connectivity():
     """Check connectivity to the database.
 
@@ -6,6 +6,7 @@ from collections import defaultdict
 # Infoset libraries
 from infoset.utils import general
 from infoset.db import db
+from infoset.db import db_identity
 from infoset.db.db_orm import Agent, AgentName
 from sqlalchemy import and_
 
@@ -207,6 +208,12 @@ class GetIDAgent(object):
             self.data_dict[key] = None
         self.data_dict['exists'] = False
 
+        # Use the cached identity if available
+        cached = db_identity.identity_map().agent(id_agent)
+        if cached is not None:
+            self.data_dict.update(cached)
+            return
+
         # Encode the id_agent
         if isinstance(id_agent, str) is True:
             value = id_agent.encode()
@@ -241,6 +248,9 @@ class GetIDAgent(object):
             self.data_dict['agent'] = general.decode(result.name)
             database.close()
 
+            # Cache the identity
+            db_identity.identity_map().set_agent(id_agent, self.data_dict)
+
     def exists(self):
         """Tell if row is exists.
 
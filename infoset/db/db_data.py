@@ -1,11 +1,13 @@
 """Module of infoset database functions. Data table."""
 
 # Python standard libraries
+import time
 from collections import defaultdict
 from sqlalchemy import and_
 
 # Infoset libraries
 from infoset.utils import general
+from infoset.utils import log
 from infoset.db import db_datapoint
 from infoset.db import db
 from infoset.db.db_orm import Data, Datapoint
@@ -164,6 +166,169 @@ class GetIDXData(object):
         return values
 
 
+class InsertData(object):
+    """Class to insert timeseries values into the iset_data table in bulk.
+
+    Values are supplied as an iterable of (idx_datapoint, timestamp, value)
+    tuples. They are streamed into a single prepared INSERT statement that
+    is executed once per chunk of "batch_size" rows, bypassing the ORM
+    unit-of-work bookkeeping. All chunks are committed as one transaction.
+
+    Args:
+        None
+
+    Returns:
+        None
+
+    Methods:
+
+    """
+
+    def __init__(self, batch_size=5000):
+        """Function for intializing the class.
+
+        Args:
+            batch_size: Maximum number of rows per INSERT execution
+
+        Returns:
+            None
+
+        """
+        # Initialize important variables
+        self.batch_size = max(1, int(batch_size))
+        self._rows = 0
+        self._duration = 0
+
+        # Rows already in the database are silently skipped. This makes
+        # the re-ingestion of previously processed data harmless.
+        self._statement = Data.__table__.insert().prefix_with(
+            'OR IGNORE', dialect='sqlite')
+
+    def insert(self, rows, error_code):
+        """Insert rows into the database.
+
+        Args:
+            rows: Iterable of (idx_datapoint, timestamp, value) tuples
+            error_code: Error number to use if one occurs
+
+        Returns:
+            success: True if successful
+
+        """
+        # Initialize key variables
+        success = False
+        count = 0
+        ts_start = time.time()
+
+        # Establish a database session
+        database = db.Database()
+        session = database.session()
+
+        try:
+            count = self.execute(session, rows)
+
+            # Commit all chunks at once
+            session.commit()
+            success = True
+
+        except Exception as exception_error:
+            count = 0
+            session.rollback()
+            if db.busy(exception_error) is True:
+                database.close()
+                raise db.DatabaseBusy(
+                    str(exception_error)) from exception_error
+            log_message = (
+                'Unable to bulk insert data. '
+                'Error: \"%s\"') % (exception_error)
+            log.log2warning(error_code, log_message)
+
+        except:
+            count = 0
+            session.rollback()
+            log_message = ('Unexpected database exception')
+            log.log2warning(error_code, log_message)
+
+        # Return the session to the database pool after processing
+        database.close()
+
+        # Update statistics
+        self._rows += count
+        self._duration += time.time() - ts_start
+
+        # Return
+        return success
+
+    def execute(self, session, rows):
+        """Insert rows using a session without committing them.
+
+        The caller commits, or rolls back, the session. Rows inserted this
+        way aren't included in the statistics.
+
+        Args:
+            session: Database session to use
+            rows: Iterable of (idx_datapoint, timestamp, value) tuples
+
+        Returns:
+            count: Number of rows inserted
+
+        """
+        # Initialize key variables
+        count = 0
+        chunk = []
+
+        # Insert
+        for (idx_datapoint, timestamp, value) in rows:
+            chunk.append(
+                {'idx_datapoint': idx_datapoint,
+                 'timestamp': timestamp,
+                 'value': value})
+
+            # Write the chunk when full
+            if len(chunk) >= self.batch_size:
+                session.execute(self._statement, chunk)
+                count += len(chunk)
+                chunk = []
+
+        # Write the remainder
+        if bool(chunk) is True:
+            session.execute(self._statement, chunk)
+            count += len(chunk)
+
+        # Return
+        return count
+
+    def rows(self):
+        """Get the number of rows inserted.
+
+        Args:
+            None
+
+        Returns:
+            value: Number of rows inserted
+
+        """
+        # Initialize key variables
+        value = self._rows
+        return value
+
+    def rows_per_second(self):
+        """Get the insertion rate.
+
+        Args:
+            None
+
+        Returns:
+            value: Rows inserted per second
+
+        """
+        # Initialize key variables
+        value = 0
+        if self._duration > 0:
+            value = self._rows / self._duration
+        return value
+
+
 def last_contacts(ts_start):
     """Get the last time each timeseries datapoint was updated.
 
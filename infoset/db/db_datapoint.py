@@ -4,10 +4,11 @@
 from collections import defaultdict
 
 # PIP libraries
-from sqlalchemy import and_
+from sqlalchemy import and_, bindparam
 
 # Infoset libraries
 from infoset.utils import general
+from infoset.utils import log
 from infoset.db import db
 from infoset.db import db_deviceagent
 from infoset.db.db_orm import Datapoint
@@ -647,3 +648,86 @@ def listing(idx_deviceagent, base_type=None):
 
     # Return
     return dict_list
+
+
+def update_timefixed_values(values, error_code):
+    """Update the timefixed_value of many datapoints in a single statement.
+
+    The update is done using one prepared UPDATE statement executed for
+    all the values at once, and committed as a single transaction.
+
+    Args:
+        values: Dict of encoded timefixed values keyed by idx_datapoint
+        error_code: Error number to use if one occurs
+
+    Returns:
+        success: True if successful
+
+    """
+    # Initialize key variables
+    success = False
+
+    # Nothing to do
+    if bool(values) is False:
+        success = True
+        return success
+
+    # Establish a database session
+    database = db.Database()
+    session = database.session()
+
+    try:
+        execute_timefixed_values(session, values)
+        session.commit()
+        success = True
+
+    except Exception as exception_error:
+        session.rollback()
+        if db.busy(exception_error) is True:
+            database.close()
+            raise db.DatabaseBusy(str(exception_error)) from exception_error
+        log_message = (
+            'Unable to bulk update timefixed values. '
+            'Error: \"%s\"') % (exception_error)
+        log.log2warning(error_code, log_message)
+
+    except:
+        session.rollback()
+        log_message = ('Unexpected database exception')
+        log.log2warning(error_code, log_message)
+
+    # Return the session to the database pool after processing
+    database.close()
+
+    # Return
+    return success
+
+
+def execute_timefixed_values(session, values):
+    """Update the timefixed_value of many datapoints without committing.
+
+    The caller commits, or rolls back, the session.
+
+    Args:
+        session: Database session to use
+        values: Dict of encoded timefixed values keyed by idx_datapoint
+
+    Returns:
+        None
+
+    """
+    # Initialize key variables
+    table = Datapoint.__table__
+    parameters = [
+        {'b_idx_datapoint': idx_datapoint, 'b_timefixed_value': value}
+        for idx_datapoint, value in values.items()]
+
+    # Nothing to do
+    if bool(parameters) is False:
+        return
+
+    # Update
+    statement = table.update().where(
+        table.c.idx_datapoint == bindparam('b_idx_datapoint')).values(
+            timefixed_value=bindparam('b_timefixed_value'))
+    session.execute(statement, parameters)
@@ -6,6 +6,7 @@ from collections import defaultdict
 # Infoset libraries
 from infoset.utils import general
 from infoset.db import db
+from infoset.db import db_identity
 from infoset.db.db_orm import Device
 
 
@@ -40,7 +41,13 @@ class GetDevice(object):
             self.data_dict[key] = None
         self.data_dict['exists'] = False
 
-        # Encode the id_agent
+        # Use the cached identity if available
+        cached = db_identity.identity_map().device(devicename)
+        if cached is not None:
+            self.data_dict.update(cached)
+            return
+
+        # Encode the devicename
         if isinstance(devicename, str) is True:
             value = devicename.encode()
         else:
@@ -66,6 +73,9 @@ class GetDevice(object):
         # Return the session to the database pool after processing
         database.close()
 
+        # Cache the identity
+        db_identity.identity_map().set_device(devicename, self.data_dict)
+
     def exists(self):
         """Tell if row is found.
 
@@ -8,7 +8,9 @@ from sqlalchemy import and_
 
 # Infoset libraries
 from infoset.db import db
-from infoset.db.db_orm import DeviceAgent
+from infoset.db import db_identity
+from infoset.db.db_orm import DeviceAgent, Agent, Device
+from infoset.utils import general
 
 
 class GetIDXDeviceAgent(object):
@@ -350,15 +352,84 @@ def device_agent_exists(idx_device, idx_agent):
     if isinstance(idx_agent, int) is False:
         idx_agent = None
 
-    # Get information on agent from database
-    data = GetDeviceAgent(idx_device, idx_agent)
-    if data.exists() is True:
+    # Get information from the cache, then the database
+    if idx_deviceagent(idx_device, idx_agent) is not None:
         exists = True
 
     # Return
     return exists
 
 
+def idx_deviceagent(idx_device, idx_agent):
+    """Get the idx_deviceagent value of a device / agent entry.
+
+    The process-local identity cache is consulted before the database.
+
+    Args:
+        idx_device: Device idx
+        idx_agent: Agent idx
+
+    Returns:
+        value: idx_deviceagent value, None if not found
+
+    """
+    # Use the cached identity if available
+    cached = db_identity.identity_map().deviceagent(idx_device, idx_agent)
+    if cached is not None:
+        value = cached['idx_deviceagent']
+        return value
+
+    # Get information from the database
+    data = GetDeviceAgent(idx_device, idx_agent)
+    value = data.idx_deviceagent()
+
+    # Cache the identity. The frequently changing last_timestamp
+    # value is deliberately excluded.
+    db_identity.identity_map().set_deviceagent(idx_device, idx_agent, {
+        'idx_deviceagent': value,
+        'idx_device': idx_device,
+        'idx_agent': idx_agent,
+        'enabled': data.enabled(),
+        'exists': data.exists()})
+
+    # Return
+    return value
+
+
+def last_timestamp(id_agent, devicename):
+    """Get the last_timestamp of a device / agent entry in one query.
+
+    Args:
+        id_agent: Agent ID
+        devicename: Devicename
+
+    Returns:
+        value: last_timestamp value, None if there is no entry
+
+    """
+    # Initialize key variables
+    value = None
+
+    # Get information from the database
+    database = db.Database()
+    session = database.session()
+    result = session.query(DeviceAgent.last_timestamp).join(
+        Agent, Agent.idx_agent == DeviceAgent.idx_agent).join(
+            Device, Device.idx_device == DeviceAgent.idx_device).filter(
+                and_(
+                    Agent.id_agent == general.encode(id_agent),
+                    Device.devicename == general.encode(devicename)))
+    for instance in result:
+        value = instance.last_timestamp
+        break
+
+    # Return the session to the database pool after processing
+    database.close()
+
+    # Return
+    return value
+
+
 def all_device_indices():
     """Get list of all device indexes in database.
 
@@ -0,0 +1,445 @@
+"""Module of infoset database functions. Process-local identity map.
+
+Agent, device and deviceagent index values never change once created.
+The IdentityMap caches them in bounded, least recently used (LRU) maps so
+that repeated lookups by the ingester and API don't require database
+queries.
+
+Their enabled values and names may change, but rarely do. Entries are
+therefore kept for identity_cache_ttl seconds, and the map of a table is
+cleared whenever the process updates or deletes one of its rows using
+the ORM. Changes made by other processes are seen once entries expire.
+
+"""
+
+# Python standard libraries
+import time
+import threading
+from collections import OrderedDict
+from sqlalchemy import event
+
+# Infoset libraries
+from infoset.utils import general
+from infoset.utils import configuration
+from infoset.utils import log
+from infoset.db import db
+from infoset.db.db_orm import Agent, AgentName, Device, DeviceAgent
+
+
+class _LRU(object):
+    """Bounded least recently used map with expiring entries.
+
+    Args:
+        None
+
+    Returns:
+        None
+
+    Methods:
+
+    """
+
+    def __init__(self, size, ttl):
+        """Function for intializing the class.
+
+        Args:
+            size: Maximum number of entries
+            ttl: Number of seconds after which an entry expires
+
+        Returns:
+            None
+
+        """
+        # Initialize key variables
+        self.size = max(1, int(size))
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Get a value.
+
+        Args:
+            key: Key of value
+
+        Returns:
+            value: Copy of the value, None if not found or expired
+
+        """
+        # Initialize key variables
+        value = None
+        now = time.time()
+
+        with self._lock:
+            if key in self._data:
+                (expiry, cached) = self._data[key]
+                if expiry > now:
+                    self._data.move_to_end(key)
+                    value = dict(cached)
+                else:
+                    del self._data[key]
+
+        # Return
+        return value
+
+    def set(self, key, value):
+        """Set a value.
+
+        Args:
+            key: Key of value
+            value: Dict to store
+
+        Returns:
+            None
+
+        """
+        # Initialize key variables
+        expiry = time.time() + self.ttl
+
+        with self._lock:
+            self._data[key] = (expiry, dict(value))
+            self._data.move_to_end(key)
+            while len(self._data) > self.size:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        """Delete a value.
+
+        Args:
+            key: Key of value
+
+        Returns:
+            None
+
+        """
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        """Delete all values.
+
+        Args:
+            None
+
+        Returns:
+            None
+
+        """
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        """Get the number of entries.
+
+        Args:
+            None
+
+        Returns:
+            value: Number of entries
+
+        """
+        return len(self._data)
+
+
+class IdentityMap(object):
+    """Class to cache agent, device and deviceagent identities.
+
+    Args:
+        None
+
+    Returns:
+        None
+
+    Methods:
+
+    """
+
+    def __init__(self, size=10000, ttl=300):
+        """Function for intializing the class.
+
+        Args:
+            size: Maximum number of entries per map
+            ttl: Number of seconds after which an entry expires
+
+        Returns:
+            None
+
+        """
+        # Initialize key variables
+        self._agents = _LRU(size, ttl)
+        self._devices = _LRU(size, ttl)
+        self._deviceagents = _LRU(size, ttl)
+        self._hits = 0
+        self._misses = 0
+
+    def agent(self, id_agent):
+        """Get cached agent data.
+
+        Args:
+            id_agent: Identifier of agent
+
+        Returns:
+            value: Dict of agent data, None if not cached
+
+        """
+        # Return
+        value = self._count(self._agents.get(id_agent))
+        return value
+
+    def set_agent(self, id_agent, data):
+        """Cache agent data.
+
+        Args:
+            id_agent: Identifier of agent
+            data: Dict of agent data
+
+        Returns:
+            None
+
+        """
+        # Only cache rows that exist
+        if bool(data.get('exists')) is True:
+            self._agents.set(id_agent, data)
+
+    def device(self, devicename):
+        """Get cached device data.
+
+        Args:
+            devicename: Devicename
+
+        Returns:
+            value: Dict of device data, None if not cached
+
+        """
+        # Return
+        value = self._count(self._devices.get(devicename))
+        return value
+
+    def set_device(self, devicename, data):
+        """Cache device data.
+
+        Args:
+            devicename: Devicename
+            data: Dict of device data
+
+        Returns:
+            None
+
+        """
+        # Only cache rows that exist
+        if bool(data.get('exists')) is True:
+            self._devices.set(devicename, data)
+
+    def deviceagent(self, idx_device, idx_agent):
+        """Get cached deviceagent data.
+
+        Args:
+            idx_device: Device idx
+            idx_agent: Agent idx
+
+        Returns:
+            value: Dict of deviceagent data, None if not cached
+
+        """
+        # Return
+        value = self._count(
+            self._deviceagents.get((idx_device, idx_agent)))
+        return value
+
+    def set_deviceagent(self, idx_device, idx_agent, data):
+        """Cache deviceagent data.
+
+        Args:
+            idx_device: Device idx
+            idx_agent: Agent idx
+            data: Dict of deviceagent data
+
+        Returns:
+            None
+
+        """
+        # Only cache rows that exist
+        if bool(data.get('exists')) is True:
+            self._deviceagents.set((idx_device, idx_agent), data)
+
+    def clear(self):
+        """Empty the cache.
+
+        Args:
+            None
+
+        Returns:
+            None
+
+        """
+        # Clear
+        self._agents.clear()
+        self._devices.clear()
+        self._deviceagents.clear()
+
+    def invalidate(self, row):
+        """Forget the cached identities of the table of a changed row.
+
+        Args:
+            row: Agent, AgentName, Device or DeviceAgent ORM object
+
+        Returns:
+            None
+
+        """
+        # Agent data includes the agent name
+        if isinstance(row, (Agent, AgentName)) is True:
+            self._agents.clear()
+        elif isinstance(row, Device) is True:
+            self._devices.clear()
+        elif isinstance(row, DeviceAgent) is True:
+            self._deviceagents.clear()
+
+    def hit_rate(self):
+        """Get the cache hit rate.
+
+        Args:
+            None
+
+        Returns:
+            value: Fraction of lookups answered from the cache
+
+        """
+        # Initialize key variables
+        value = 0
+        total = self._hits + self._misses
+        if total > 0:
+            value = self._hits / total
+        return value
+
+    def preload(self):
+        """Populate the cache with a single database query.
+
+        Args:
+            None
+
+        Returns:
+            count: Number of deviceagent entries loaded
+
+        """
+        # Initialize key variables
+        count = 0
+
+        # Establish a database session
+        database = db.Database()
+        session = database.session()
+        result = session.query(
+            Agent.idx_agent, Agent.idx_agentname, Agent.id_agent,
+            Agent.enabled.label('agent_enabled'), AgentName.name,
+            Device.idx_device, Device.devicename, Device.description,
+            Device.enabled.label('device_enabled'),
+            DeviceAgent.idx_deviceagent,
+            DeviceAgent.enabled.label('deviceagent_enabled')).filter(
+                Agent.idx_agentname == AgentName.idx_agentname,
+                DeviceAgent.idx_agent == Agent.idx_agent,
+                DeviceAgent.idx_device == Device.idx_device)
+
+        # Massage data
+        for instance in result:
+            id_agent = general.decode(instance.id_agent)
+            devicename = general.decode(instance.devicename)
+            self.set_agent(id_agent, {
+                'idx_agent': instance.idx_agent,
+                'idx_agentname': instance.idx_agentname,
+                'id_agent': id_agent,
+                'enabled': bool(instance.agent_enabled),
+                'agent': general.decode(instance.name),
+                'exists': True})
+            self.set_device(devicename, {
+                'idx_device': instance.idx_device,
+                'devicename': devicename,
+                'description': general.decode(instance.description),
+                'enabled': bool(instance.device_enabled),
+                'exists': True})
+            self.set_deviceagent(instance.idx_device, instance.idx_agent, {
+                'idx_deviceagent': instance.idx_deviceagent,
+                'idx_device': instance.idx_device,
+                'idx_agent': instance.idx_agent,
+                'enabled': bool(instance.deviceagent_enabled),
+                'exists': True})
+            count += 1
+
+        # Return the session to the database pool after processing
+        database.close()
+
+        # Log
+        log_message = (
+            'Preloaded %s deviceagent identities into the cache.'
+            '') % (count)
+        log.log2debug(1150, log_message)
+
+        # Return
+        return count
+
+    def _count(self, value):
+        """Update hit and miss counters.
+
+        Args:
+            value: Value returned by the cache
+
+        Returns:
+            value: Value returned by the cache
+
+        """
+        # Update counters
+        if value is None:
+            self._misses += 1
+        else:
+            self._hits += 1
+        return value
+
+
+def identity_map():
+    """Get the identity map of this process, creating it on first use.
+
+    Args:
+        None
+
+    Returns:
+        result: IdentityMap object
+
+    """
+    # Initialize key variables
+    global _IDENTITY
+
+    # Create the map
+    with _LOCK:
+        if _IDENTITY is None:
+            config = configuration.Config()
+            _IDENTITY = IdentityMap(
+                size=config.identity_cache_size(),
+                ttl=config.identity_cache_ttl())
+        result = _IDENTITY
+    return result
+
+
+def _invalidate(mapper, connection, target):
+    """Forget cached identities when the ORM changes their rows.
+
+    Args:
+        mapper: Mapper of the row
+        connection: Database connection used
+        target: Changed ORM object
+
+    Returns:
+        None
+
+    """
+    # Nothing is cached before the map is created
+    if _IDENTITY is not None:
+        _IDENTITY.invalidate(target)
+
+
+# Process-local identity map. See identity_map()
+_IDENTITY = None
+_LOCK = threading.Lock()
+
+# Invalidate the map when rows change
+for _table in [Agent, AgentName, Device, DeviceAgent]:
+    for _name in ['after_update', 'after_delete']:
+        event.listen(_table, _name, _invalidate)
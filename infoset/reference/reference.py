@@ -15,7 +15,6 @@ from random import random
 import tempfile
 import time
 from collections import defaultdict
-from copy import deepcopy
 import json
 
 # pip3 libraries
@@ -25,6 +24,9 @@ import requests
 from infoset.utils import log
 from infoset.utils import general
 from infoset.utils import daemon
+from infoset.utils import payload
+from infoset.utils import aggregate
+from infoset.utils import compression
 from infoset.utils.configuration import Config
 
 
@@ -163,6 +165,8 @@ class ReferenceSampleAPI(object):
         """
         # Initialize key variables
         self.config = config
+        self.encoding = compression.content_encoding(
+            config.agent_compression())
         fixed_uri = config.api_server_uri().lstrip('/').rstrip('/')
 
         # Create API URL
@@ -234,8 +238,16 @@ class ReferenceSampleAPI(object):
 
         # Create API URL
         url = self._url(uri)
+
+        # Compress the data
+        headers = {'Content-Type': 'application/json'}
+        if self.encoding != 'identity':
+            headers['Content-Encoding'] = self.encoding
+        body = compression.compress(json.dumps(data).encode(), self.encoding)
+
+        # Post
         try:
-            result = requests.post(url, json=data)
+            result = requests.post(url, data=body, headers=headers)
             response = True
         except:
             response = False
@@ -279,6 +291,15 @@ class ReferenceSampleAgent(object):
         # Create an object for API interaction
         self._api = ReferenceSampleAPI(config)
 
+        # Build the data to post without copying it
+        self.payload = payload.Payload()
+        self.payload_version = config.agent_payload_version()
+
+        # Summarize samples taken more often than the interval, and only
+        # post the summary
+        self.aggregate = config.agent_aggregate()
+        self.statistics = config.agent_aggregate_statistics()
+
         # Create the cache directory
         self.cache_dir = config.agent_cache_directory()
         if os.path.exists(self.cache_dir) is False:
@@ -313,28 +334,23 @@ class ReferenceSampleAgent(object):
             None
 
         """
-        # Initialize data
-        data = deepcopy(data_in)
-
         # Validate base_type
-        if len(data) != 1 or isinstance(data, defaultdict) is False:
-            log_message = ('Agent data "%s" is invalid') % (data)
+        if len(data_in) != 1 or isinstance(data_in, defaultdict) is False:
+            log_message = ('Agent data "%s" is invalid') % (data_in)
             log.log2die(1005, log_message)
 
         ######################################################################
         # Get a description to use for label value. You could do a lookup in
         # a table based on the spoken language of the environment based on the
-        # label and assign the translated result to data[label]['description']
+        # label and use the translated result as the description
         ######################################################################
-        for label in data.keys():
-            data[label]['description'] = label
-            break
+        for label, label_dict in data_in.items():
+            columns = self.payload.label(
+                label, label_dict['base_type'], label)
 
-        # Add data to appropriate self.data key
-        if data[label]['base_type'] is not None:
-            self.data['timeseries'].update(data)
-        else:
-            self.data['timefixed'].update(data)
+            # Add data
+            for (index, value, source) in label_dict['data']:
+                self.payload.append(columns, index, value, source)
 
     def populate_single(self, label, value, base_type=None, source=None):
         """Add a single value to the data to be posted by the agent.
@@ -359,13 +375,9 @@ class ReferenceSampleAgent(object):
             None
 
         """
-        # Initialize key variables
-        data = defaultdict(lambda: defaultdict(dict))
-        data[label]['base_type'] = base_type
-        data[label]['data'] = [[0, value, source]]
-
         # Update
-        self.populate(data)
+        columns = self.payload.label(label, base_type, label)
+        self.payload.append(columns, 0, value, source)
 
     def populate_named_tuple(self, named_tuple, prefix='', base_type=1):
         """Post system data to the central server.
@@ -397,15 +409,9 @@ class ReferenceSampleAgent(object):
             else:
                 new_label = label
 
-            # Initialize data
-            data = defaultdict(lambda: defaultdict(dict))
-
-            # Add data
-            data[new_label]['data'] = [[0, value, None]]
-            data[new_label]['base_type'] = base_type
-
             # Update
-            self.populate(data)
+            columns = self.payload.label(new_label, base_type, new_label)
+            self.payload.append(columns, 0, value, None)
 
     def populate_dict(self, data_in, prefix='', base_type=1):
         """Populate agent with data that's a dict keyed by [label][source].
@@ -432,32 +438,18 @@ class ReferenceSampleAgent(object):
             None
 
         """
-        # Initialize data
-        data_input = deepcopy(data_in)
-
         # Iterate over labels
-        for label in data_input.keys():
-            # Initialize tuple list to use by agent.populate
-            value_sources = []
+        for label, sources in data_in.items():
             if (bool(prefix)) is True:
                 new_label = ('%s_%s') % (prefix, label)
             else:
                 new_label = label
+            columns = self.payload.label(new_label, base_type, new_label)
 
-            # Initialize data
-            data = defaultdict(lambda: defaultdict(dict))
-            data[new_label]['base_type'] = base_type
-
-            # Append to tuple list
+            # Add data
             # (Sorting is important to keep consistent ordering)
-            for source, value in sorted(data_input[label].items()):
-                value_sources.append(
-                    [source, value, source]
-                )
-            data[new_label]['data'] = value_sources
-
-            # Update
-            self.populate(data)
+            for source, value in sorted(sources.items()):
+                self.payload.append(columns, source, value, source)
 
     def polled_data(self):
         """Return data that should be posted.
@@ -466,31 +458,41 @@ class ReferenceSampleAgent(object):
             None
 
         Returns:
-            None
+            data: Data in the configured agent_payload_version format
 
         """
         # Return
-        return self.data
+        data = self.payload.data(self.data, self.payload_version)
+        return data
 
     def post(self, save=True, data=None):
         """Post data to central server.
 
         Args:
             save: When True, save data to cache directory if postinf fails
-            data: Data to post. If None, then uses self.data
+            data: Data to post. If None, then uses polled_data(). It is
+                only posted when its interval is over if agent_aggregate is
+                True
 
         Returns:
-            success: "True: if successful
+            success: "True: if successful, or if the data is held until the
+                end of its interval
 
         """
         # Initialize key variables
         success = False
-        timestamp = self.data['timestamp']
         id_agent = self.data['id_agent']
 
         # Create data to post
         if data is None:
-            data = self.data
+            data = self.polled_data()
+            if self.aggregate is True:
+                data = aggregate.aggregator(
+                    id_agent, self.data['devicename'],
+                    self.statistics).add(data)
+                if data is None:
+                    return True
+        timestamp = data['timestamp']
 
         # Post data save to cache if this fails
         uri = ('/receive/%s') % (id_agent)
@@ -506,12 +508,11 @@ class ReferenceSampleAgent(object):
             # Save data if requested
             if save is True:
                 # Create a unique very long filename to reduce risk of
-                filename = ('%s/%s_%s.json') % (
+                filename = ('%s/%s_%s') % (
                     self.cache_dir, timestamp, self.cache_suffix)
 
                 # Save data
-                with open(filename, 'w') as f_handle:
-                    json.dump(data, f_handle)
+                compression.write_json(filename, data, self._api.encoding)
 
             # Log message
             log_message = (
@@ -541,28 +542,28 @@ class ReferenceSampleAgent(object):
             self.cache_dir) if os.path.isfile(
                 os.path.join(self.cache_dir, filename))]
         filenames = [
-            filename for filename in all_filenames if filename.endswith(
-                self.cache_suffix)]
+            filename for filename in all_filenames if (
+                compression.uncompressed_name(filename).endswith(
+                    self.cache_suffix))]
 
         # Read cache file in sorted order.
         # NOTE: We must post data in timestamp sorted order.
-        for filename in filenames.sorted():
+        for filename in sorted(filenames):
             # Only post files for our own UID value
             if id_agent not in filename:
                 continue
 
             # Get the full filepath for the cache file and post
             filepath = os.path.join(self.cache_dir, filename)
-            with open(filepath, 'r') as f_handle:
-                try:
-                    data = json.load(f_handle)
-                except:
-                    # Log removal
-                    log_message = (
-                        'Error reading previously cached agent data file %s '
-                        'for agent %s. May be corrupted.'
-                        '') % (filepath, self.name())
-                    log.log2die(1058, log_message)
+            try:
+                data = compression.read_json(filepath)
+            except:
+                # Log removal
+                log_message = (
+                    'Error reading previously cached agent data file %s '
+                    'for agent %s. May be corrupted.'
+                    '') % (filepath, self.name())
+                log.log2die(1058, log_message)
 
             # Post file
             success = self.post(save=False, data=data)
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""Test the Admission class in the infoset.api.admission module."""
+
+import unittest
+import os
+import sys
+
+# PIP libraries
+import redis
+
+# Try to create a working PYTHONPATH
+_TEST_DIRECTORY = os.path.dirname(os.path.realpath(__file__))
+_LIB_DIRECTORY = os.path.abspath(os.path.join(_TEST_DIRECTORY, os.pardir))
+_ROOT_DIRECTORY = os.path.abspath(os.path.join(_LIB_DIRECTORY, os.pardir))
+if _TEST_DIRECTORY.endswith('/infoset/test') is True:
+    sys.path.append(_ROOT_DIRECTORY)
+else:
+    print(
+        'This script is not installed in the "infoset-ng/bin" directory. '
+        'Please fix.')
+    sys.exit(2)
+
+# Import infoset stuff
+from infoset.api import admission
+from infoset.utils import configuration
+from infoset.test import unittest_setup
+
+
+class TestAdmission(unittest.TestCase):
+    """Checks all functions and methods."""
+
+    #########################################################################
+    # General object setup
+    #########################################################################
+
+    def setUp(self):
+        """Create an Admission object for a queue we control."""
+        self.depth = 0
+        self.config = configuration.Config()
+        self.config.api_queue_high_water = lambda: 10
+        self.config.api_queue_low_water = lambda: 5
+        self.admission = admission.Admission(self.config, self._depth)
+
+    def _depth(self):
+        """Get the length of the queue."""
+        if self.depth is None:
+            raise redis.ConnectionError('Unavailable')
+        return self.depth
+
+    def _admit(self, depth):
+        """Admit a post, ignoring the cached length of the queue."""
+        self.depth = depth
+        self.admission._checked = 0
+        return self.admission.admit('id_agent')
+
+    def test_admit(self):
+        """Testing method admit."""
+        # Posts are accepted below the high water mark
+        self.assertEqual(self._admit(9), None)
+
+        # And rejected from it until the low water mark is reached
+        self.assertEqual(self._admit(10), 429)
+        self.assertEqual(self._admit(6), 429)
+        self.assertEqual(self._admit(5), None)
+        self.assertEqual(self._admit(9), None)
+
+        # The length of the queue is cached
+        self.depth = 100
+        self.assertEqual(self.admission.admit('id_agent'), None)
+
+        # Posts are rejected if the queue can't be reached
+        self.assertEqual(self._admit(None), 503)
+
+        # Posts are never rejected if there is no high water mark
+        self.config.api_queue_high_water = lambda: 0
+        self.admission = admission.Admission(self.config, self._depth)
+        self.assertEqual(self._admit(1000000), None)
+
+    def test_rejected(self):
+        """Testing method rejected."""
+        # Rejected posts are counted by agent
+        self._admit(10)
+        self.admission.admit('other')
+        self.admission.reject('other')
+        self.assertEqual(
+            self.admission.rejected(), {'id_agent': 1, 'other': 2})
+
+
+if __name__ == '__main__':
+    # Test the environment variables
+    unittest_setup.ready()
+
+    # Do the unit test
+    unittest.main()
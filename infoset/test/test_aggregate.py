@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""Test the aggregate library in the infoset.utils module."""
+
+import unittest
+import os
+import sys
+
+# Try to create a working PYTHONPATH
+_TEST_DIRECTORY = os.path.dirname(os.path.realpath(__file__))
+_LIB_DIRECTORY = os.path.abspath(os.path.join(_TEST_DIRECTORY, os.pardir))
+_ROOT_DIRECTORY = os.path.abspath(os.path.join(_LIB_DIRECTORY, os.pardir))
+if _TEST_DIRECTORY.endswith('/infoset/test') is True:
+    sys.path.append(_ROOT_DIRECTORY)
+else:
+    print(
+        'This script is not installed in the "infoset-ng/bin" directory. '
+        'Please fix.')
+    sys.exit(2)
+
+# Import infoset stuff
+from infoset.utils import aggregate
+from infoset.utils import payload
+from infoset.test import unittest_setup
+
+
+def _data(timestamp, gauge, counter, version=payload.VERSION):
+    """Create agent data with a gauge, a counter and a string."""
+    builder = payload.Payload()
+    columns = builder.label('cpu', 1, 'CPU')
+    builder.append(columns, 0, gauge, None)
+    columns = builder.label('packets', 32, 'Packets')
+    builder.append(columns, 'eth0', counter, 'eth0')
+    columns = builder.label('version', None, 'Kernel Type')
+    builder.append(columns, 0, 'version %s' % gauge, None)
+    main = {
+        'timestamp': timestamp,
+        'id_agent': 'abc',
+        'agent': 'unittest',
+        'devicename': 'unittest_device'}
+    return builder.data(main, version)
+
+
+def _values(data):
+    """Get the values of agent data keyed by agent label."""
+    result = {}
+    for data_type in ['timeseries', 'timefixed']:
+        for label, label_dict in data.get(data_type, {}).items():
+            result[label] = [
+                value for (_, value, _) in payload.datapoints(
+                    data, label_dict)]
+    return result
+
+
+class TestAggregator(unittest.TestCase):
+    """Checks all functions and methods."""
+
+    #########################################################################
+    # General object setup
+    #########################################################################
+
+    def test_add(self):
+        """Testing method add."""
+        for version in [1, payload.VERSION]:
+            # Samples are held until the interval is over
+            aggregator = aggregate.Aggregator()
+            samples = [(2, 100), (4, 150), (9, 200)]
+            for offset, (gauge, counter) in enumerate(samples):
+                result = aggregator.add(
+                    _data(300, gauge, counter, version), now=1000 + offset)
+                self.assertEqual(result, None)
+
+            # Then summarized
+            result = aggregator.add(
+                _data(600, 1, 300, version), now=1300)
+            self.assertEqual(payload.version(result), version)
+            self.assertEqual(result['timestamp'], 300)
+            self.assertEqual(result['devicename'], 'unittest_device')
+            self.assertEqual(
+                _values(result),
+                {'cpu': [5], 'packets': [200], 'version': ['version 9']})
+            self.assertEqual(
+                result['timeseries']['packets']['base_type'], 32)
+
+    def test_statistics(self):
+        """Testing statistic labels."""
+        # Statistics of gauges, and the rates of counters, are added
+        aggregator = aggregate.Aggregator(aggregate.STATISTICS)
+        aggregator.add(_data(0, 10, 4294967000), now=950)
+        samples = [(2, 100), (4, 150), (9, 200)]
+        for offset, (gauge, counter) in enumerate(samples):
+            aggregator.add(_data(300, gauge, counter), now=1000 + offset)
+        result = _values(aggregator.add(_data(600, 1, 300), now=1300))
+        self.assertEqual(result['cpu_min'], [2])
+        self.assertEqual(result['cpu_max'], [9])
+        self.assertEqual(result['cpu_avg'], [5])
+        self.assertEqual(result['cpu_last'], [9])
+
+        # Rates allow for counters that wrapped
+        self.assertEqual(
+            result['packets_min'], [(2 ** 32 - 4294967000 + 100) / 50])
+        self.assertEqual(result['packets_max'], [50])
+        self.assertEqual('packets_last' in result, False)
+        self.assertEqual('version_min' in result, False)
+        result = _values(aggregator.add(_data(900, 1, 300), now=1600))
+        self.assertEqual(result['packets_avg'], [(300 - 200) / 298])
+
+        # Statistics are left out if there are no numeric samples
+        aggregator = aggregate.Aggregator(['max'])
+        aggregator.add(_data(300, 'high', 1), now=1000)
+        result = _values(aggregator.add(_data(600, 1, 2), now=1300))
+        self.assertEqual(result['cpu'], ['high'])
+        self.assertEqual('cpu_max' in result, False)
+        self.assertEqual('packets_max' in result, False)
+
+    def test_aggregator(self):
+        """Testing function aggregator."""
+        # Aggregators are kept for each device
+        result = aggregate.aggregator('abc', 'unittest_device')
+        self.assertIs(aggregate.aggregator('abc', 'unittest_device'), result)
+        self.assertIsNot(aggregate.aggregator('abc', 'other_device'), result)
+
+
+if __name__ == '__main__':
+    # Test the environment variables
+    unittest_setup.ready()
+
+    # Do the unit test
+    unittest.main()
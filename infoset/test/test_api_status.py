@@ -42,6 +42,15 @@ class APITestCase(unittest.TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertEqual(response.data, expected)
 
+    def test_writer(self):
+        """Testing method / function writer."""
+        # Initializing key variables
+        response = self.API.get('/infoset/api/v1/status/writer')
+
+        # Verify reponses
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(isinstance(response.get_json(), dict), True)
+
 
 if __name__ == '__main__':
     # Test the environment variables
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""Test the _Writer class in the infoset.cache.cache module."""
+
+import unittest
+import tempfile
+import shutil
+import sqlite3
+import socket
+import os
+import sys
+
+# Try to create a working PYTHONPATH
+_TEST_DIRECTORY = os.path.dirname(os.path.realpath(__file__))
+_LIB_DIRECTORY = os.path.abspath(os.path.join(_TEST_DIRECTORY, os.pardir))
+_ROOT_DIRECTORY = os.path.abspath(os.path.join(_LIB_DIRECTORY, os.pardir))
+if _TEST_DIRECTORY.endswith('/infoset/test') is True:
+    sys.path.append(_ROOT_DIRECTORY)
+else:
+    print(
+        'This script is not installed in the "infoset-ng/bin" directory. '
+        'Please fix.')
+    sys.exit(2)
+
+# Import infoset stuff
+from infoset.cache import cache
+from infoset.db import db
+from infoset.utils import configuration
+from infoset.test import unittest_setup
+
+
+class TestWriter(unittest.TestCase):
+    """Checks all functions and methods."""
+
+    #########################################################################
+    # General object setup
+    #########################################################################
+
+    def setUp(self):
+        """Create a _Writer that doesn't use the database."""
+        self.cache_dir = tempfile.mkdtemp()
+        self.written = []
+        self.busy = 0
+        self.broken = []
+        self._write_batches = cache._write_batches
+        cache._write_batches = self._write
+        self.config = configuration.Config()
+        self.config.db_busy_delay = lambda: 0
+        self.writer = cache._Writer(self.config, 4)
+        self.writer.start()
+
+    def tearDown(self):
+        """Restore the cache module and delete the cache directory."""
+        self.writer.close()
+        cache._write_batches = self._write_batches
+        shutil.rmtree(self.cache_dir)
+
+    def _write(self, group, batch_size):
+        """Record the batches written, while the database isn't busy."""
+        if self.busy > 0:
+            self.busy -= 1
+            error = sqlite3.OperationalError('database is locked')
+            if db.busy(error) is True:
+                raise db.DatabaseBusy(str(error))
+        for (agent_data, _, _) in group:
+            if agent_data['id_agent'] in self.broken:
+                raise SystemExit(2)
+        self.written.append(
+            [agent_data['id_agent'] for (agent_data, _, _) in group])
+        return (True, 0)
+
+    def _batch(self, id_agent, filename=None):
+        """Create a batch with a cache file."""
+        if filename is None:
+            filename = id_agent
+        filepath = os.path.join(self.cache_dir, filename)
+        open(filepath, 'w').close()
+        agent_data = {
+            'id_agent': id_agent, 'devicename': 'unittest_device'}
+        return (agent_data, [filepath], 1)
+
+    def test_flush(self):
+        """Testing method flush."""
+        # Batches are written in order, and their files purged
+        for id_agent in ['a', 'b', 'c']:
+            self.writer.batches.put(self._batch(id_agent))
+        self.writer.flush()
+        self.assertEqual(sum(self.written, []), ['a', 'b', 'c'])
+        self.assertEqual(os.listdir(self.cache_dir), [])
+
+    def test__write(self):
+        """Testing method _write."""
+        # Writes are retried while the database is busy
+        retries = self.config.db_busy_retries()
+        self.busy = retries
+        self.writer.batches.put(self._batch('a'))
+        self.writer.flush()
+        self.assertEqual(self.written, [['a']])
+        self.assertEqual(self.writer.busy, retries)
+
+        # Files are left if it stays busy, with later batches of the agent
+        self.writer.close()
+        self.writer = cache._Writer(self.config, 1)
+        self.writer.start()
+        self.busy = retries + 1
+        self.writer.batches.put(self._batch('b'))
+        self.writer.batches.put(self._batch('b', filename='b2'))
+        self.writer.batches.put(self._batch('c'))
+        self.writer.flush()
+        self.assertEqual(self.written, [['a'], ['c']])
+        self.assertEqual(sorted(os.listdir(self.cache_dir)), ['b', 'b2'])
+
+        # Until the next run
+        self.written = []
+        self.writer.batches.put(self._batch('b'))
+        self.writer.flush()
+        self.assertEqual(self.written, [['b']])
+
+    def test__run(self):
+        """Testing method _run."""
+        # Files are left if writing fails, with later batches of the agent
+        self.writer.close()
+        self.writer = cache._Writer(self.config, 1)
+        self.writer.start()
+        self.broken = ['b']
+        self.writer.batches.put(self._batch('b'))
+        self.writer.batches.put(self._batch('b', filename='b2'))
+        self.writer.batches.put(self._batch('c'))
+        self.writer.flush()
+        self.assertEqual(self.written, [['c']])
+        self.assertEqual(sorted(os.listdir(self.cache_dir)), ['b', 'b2'])
+
+    def test_writer_status(self):
+        """Testing function writer_status."""
+        # The busy errors of each ingester are reported
+        self.busy = 1
+        self.writer.batches.put(self._batch('a'))
+        self.writer.flush()
+        result = cache.writer_status(self.config)
+        name = ('%s-%s') % (socket.gethostname(), os.getpid())
+        self.assertEqual(result[name]['busy'], 1)
+        self.assertEqual(result[name]['busy_seconds'], 0)
+
+        # Until the ingester stops
+        self.writer.close()
+        self.assertEqual(name in cache.writer_status(self.config), False)
+
+
+if __name__ == '__main__':
+    # Test the environment variables
+    unittest_setup.ready()
+
+    # Do the unit test
+    unittest.main()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""Test the codec library in the infoset.utils module."""
+
+import unittest
+import os
+import sys
+import json
+
+# Try to create a working PYTHONPATH
+_TEST_DIRECTORY = os.path.dirname(os.path.realpath(__file__))
+_LIB_DIRECTORY = os.path.abspath(os.path.join(_TEST_DIRECTORY, os.pardir))
+_ROOT_DIRECTORY = os.path.abspath(os.path.join(_LIB_DIRECTORY, os.pardir))
+if _TEST_DIRECTORY.endswith('/infoset/test') is True:
+    sys.path.append(_ROOT_DIRECTORY)
+else:
+    print(
+        'This script is not installed in the "infoset-ng/bin" directory. '
+        'Please fix.')
+    sys.exit(2)
+
+# Import infoset stuff
+from infoset.utils import codec
+from infoset.test import unittest_setup
+
+
+class TestCodec(unittest.TestCase):
+    """Checks all functions and methods."""
+
+    #########################################################################
+    # General object setup
+    #########################################################################
+
+    data = unittest_setup.TestVariables().cache_data()
+
+    def test___init__(self):
+        """Testing method __init__."""
+        # Unknown codecs fall back to JSON
+        self.assertEqual(codec.Codec('zlib').name, 'zlib')
+        self.assertEqual(codec.Codec('bogus').name, 'json')
+
+    def test_encode(self):
+        """Testing method encode."""
+        # Encoded data is decoded to the original data
+        for name in ['json', 'zlib']:
+            value = codec.Codec(name).encode(self.data)
+            self.assertEqual(codec.decode(value), self.data)
+
+        # Compressed data is smaller
+        self.assertLess(
+            len(codec.Codec('zlib').encode(self.data)),
+            len(codec.Codec('json').encode(self.data)))
+
+    @unittest.skipIf(codec.msgpack is None, 'msgpack is not installed')
+    def test_encode_msgpack(self):
+        """Testing method encode with msgpack."""
+        value = codec.Codec('msgpack').encode(self.data)
+        self.assertEqual(codec.decode(value), self.data)
+
+        # Posted msgpack data
+        body = codec.msgpack.packb(self.data, use_bin_type=True)
+        value = codec.Codec('json').encode_body(body, 'application/msgpack')
+        self.assertEqual(codec.decode(value), self.data)
+
+    def test_encode_body(self):
+        """Testing method encode_body."""
+        # The body is stored as it is
+        body = json.dumps(self.data).encode()
+        value = codec.Codec('json').encode_body(body, 'application/json')
+        self.assertEqual(value[1:], body)
+        self.assertEqual(codec.decode(value), self.data)
+
+        # JSON bodies remain JSON with the msgpack codec
+        value = codec.Codec('msgpack').encode_body(body)
+        self.assertEqual(codec.decode(value), self.data)
+
+        value = codec.Codec('zlib').encode_body(body)
+        self.assertEqual(codec.decode(value), self.data)
+
+    def test_decode(self):
+        """Testing function decode."""
+        # Untagged JSON
+        self.assertEqual(codec.decode(json.dumps(self.data)), self.data)
+
+        # Bad data
+        for value in [b'', b'jnot json', b'zbogus']:
+            with self.assertRaises(ValueError):
+                codec.decode(value)
+
+
+if __name__ == '__main__':
+    # Test the environment variables
+    unittest_setup.ready()
+
+    # Do the unit test
+    unittest.main()
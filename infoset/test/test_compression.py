@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""Test the compression library in the infoset.utils module."""
+
+import unittest
+import tempfile
+import shutil
+import os
+import sys
+import io
+import json
+
+# Try to create a working PYTHONPATH
+_TEST_DIRECTORY = os.path.dirname(os.path.realpath(__file__))
+_LIB_DIRECTORY = os.path.abspath(os.path.join(_TEST_DIRECTORY, os.pardir))
+_ROOT_DIRECTORY = os.path.abspath(os.path.join(_LIB_DIRECTORY, os.pardir))
+if _TEST_DIRECTORY.endswith('/infoset/test') is True:
+    sys.path.append(_ROOT_DIRECTORY)
+else:
+    print(
+        'This script is not installed in the "infoset-ng/bin" directory. '
+        'Please fix.')
+    sys.exit(2)
+
+# Import infoset stuff
+from infoset.utils import compression
+from infoset.test import unittest_setup
+
+
+class TestCompression(unittest.TestCase):
+    """Checks all functions and methods."""
+
+    #########################################################################
+    # General object setup
+    #########################################################################
+
+    data = unittest_setup.TestVariables().cache_data()
+    body = json.dumps(data).encode()
+
+    def _encodings(self):
+        """Get the encodings to test."""
+        return compression.encodings()
+
+    def test_content_encoding(self):
+        """Testing function content_encoding."""
+        self.assertEqual(compression.content_encoding('gzip'), 'gzip')
+        self.assertEqual(compression.content_encoding('none'), 'identity')
+        expected = 'zstd'
+        if compression.zstandard is None:
+            expected = 'gzip'
+        self.assertEqual(compression.content_encoding('zstd'), expected)
+
+    def test_compress(self):
+        """Testing function compress."""
+        # Compressed data is decompressed to the original data
+        for encoding in self._encodings():
+            value = compression.compress(self.body, encoding)
+            result = compression.decompress(
+                io.BytesIO(value), encoding, len(self.body))
+            self.assertEqual(result, self.body)
+
+        # Compressed data is smaller
+        self.assertLess(
+            len(compression.compress(self.body, 'gzip')), len(self.body))
+
+    def test_decompress(self):
+        """Testing function decompress."""
+        for encoding in self._encodings():
+            # Data larger than the limit isn't returned
+            value = compression.compress(self.body, encoding)
+            result = compression.decompress(
+                io.BytesIO(value), encoding, len(self.body) - 1)
+            self.assertEqual(result, None)
+
+        # Data that can't be decompressed
+        with self.assertRaises(ValueError):
+            compression.decompress(io.BytesIO(b'bogus'), 'gzip', 100)
+
+        # A small body can't be decompressed into a huge one
+        value = compression.compress(b'0' * 10000000, 'gzip')
+        self.assertLess(len(value), 100000)
+        result = compression.decompress(io.BytesIO(value), 'gzip', 1000000)
+        self.assertEqual(result, None)
+
+    def test_write_json(self):
+        """Testing function write_json."""
+        directory = tempfile.mkdtemp()
+        for encoding in self._encodings():
+            # Files get the suffix of the encoding
+            filepath = ('%s/%s.json') % (directory, encoding)
+            result = compression.write_json(filepath, self.data, encoding)
+            self.assertEqual(
+                result, filepath + compression.SUFFIXES.get(encoding, ''))
+            self.assertEqual(
+                compression.uncompressed_name(result), filepath)
+
+            # And are read back
+            self.assertEqual(compression.read_json(result), self.data)
+
+        # Only the files are left
+        self.assertEqual(len(os.listdir(directory)), len(self._encodings()))
+        shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    # Test the environment variables
+    unittest_setup.ready()
+
+    # Do the unit test
+    unittest.main()
@@ -230,6 +230,272 @@ main:
         self.assertEqual(result, 20)
         self.assertEqual(result, self.good_dict['main']['ingest_pool_size'])
 
+    def test_ingest_batch_size(self):
+        """Testing method ingest_batch_size."""
+        # Testing ingest_batch_size with good_dict
+        # key not present, so the default is returned
+        result = self.config.ingest_batch_size()
+        self.assertEqual(result, 5000)
+
+    def test_ingest_single_writer(self):
+        """Testing method ingest_single_writer."""
+        # Testing ingest_single_writer with good_dict
+        # key not present, so the default is returned
+        result = self.config.ingest_single_writer()
+        self.assertEqual(result, True)
+
+    def test_db_busy_timeout(self):
+        """Testing method db_busy_timeout."""
+        # Testing db_busy_timeout with good_dict
+        # key not present, so the default is returned
+        result = self.config.db_busy_timeout()
+        self.assertEqual(result, 5.0)
+
+    def test_db_busy_retries(self):
+        """Testing method db_busy_retries."""
+        # Testing db_busy_retries with good_dict
+        # key not present, so the default is returned
+        result = self.config.db_busy_retries()
+        self.assertEqual(result, 4)
+
+    def test_db_busy_delay(self):
+        """Testing method db_busy_delay."""
+        # Testing db_busy_delay with good_dict
+        # key not present, so the default is returned
+        result = self.config.db_busy_delay()
+        self.assertEqual(result, 0.5)
+
+    def test_ingest_chunk_size(self):
+        """Testing method ingest_chunk_size."""
+        # Testing ingest_chunk_size with good_dict
+        # key not present, so the default is returned
+        result = self.config.ingest_chunk_size()
+        self.assertEqual(result, 100)
+
+    def test_ingest_flush_files(self):
+        """Testing method ingest_flush_files."""
+        # Testing ingest_flush_files with good_dict
+        # key not present, so the default is returned
+        result = self.config.ingest_flush_files()
+        self.assertEqual(result, 50)
+
+    def test_ingest_flush_datapoints(self):
+        """Testing method ingest_flush_datapoints."""
+        # Testing ingest_flush_datapoints with good_dict
+        # key not present, so the default is returned
+        result = self.config.ingest_flush_datapoints()
+        self.assertEqual(result, 100000)
+
+    def test_ingest_shards(self):
+        """Testing method ingest_shards."""
+        # Testing ingest_shards with good_dict
+        # key not present, so the default is returned
+        result = self.config.ingest_shards()
+        self.assertEqual(result, 1)
+
+    def test_ingest_lease_timeout(self):
+        """Testing method ingest_lease_timeout."""
+        # Testing ingest_lease_timeout with good_dict
+        # key not present, so the default is returned
+        result = self.config.ingest_lease_timeout()
+        self.assertEqual(result, 60)
+
+    def test_ingest_cache_watcher(self):
+        """Testing method ingest_cache_watcher."""
+        # Testing ingest_cache_watcher with good_dict
+        # key not present, so the default is returned
+        result = self.config.ingest_cache_watcher()
+        self.assertEqual(result, False)
+
+    def test_identity_cache_size(self):
+        """Testing method identity_cache_size."""
+        # Testing identity_cache_size with good_dict
+        # key not present, so the default is returned
+        result = self.config.identity_cache_size()
+        self.assertEqual(result, 10000)
+
+    def test_identity_cache_ttl(self):
+        """Testing method identity_cache_ttl."""
+        # Testing identity_cache_ttl with good_dict
+        # key not present, so the default is returned
+        result = self.config.identity_cache_ttl()
+        self.assertEqual(result, 3600)
+
+    def test_datapoint_id_cache_size(self):
+        """Testing method datapoint_id_cache_size."""
+        # Testing datapoint_id_cache_size with good_dict
+        # key not present, so the default is returned
+        result = self.config.datapoint_id_cache_size()
+        self.assertEqual(result, 100000)
+
+    def test_redis_codec(self):
+        """Testing method redis_codec."""
+        # Testing redis_codec with good_dict
+        # key not present, so the default is returned
+        result = self.config.redis_codec()
+        self.assertEqual(result, 'json')
+
+    def test_redis_post_ttl(self):
+        """Testing method redis_post_ttl."""
+        # Testing redis_post_ttl with good_dict
+        # key not present, so the default is returned
+        result = self.config.redis_post_ttl()
+        self.assertEqual(result, 86400)
+
+    def test_celery_batch_size(self):
+        """Testing method celery_batch_size."""
+        # Testing celery_batch_size with good_dict
+        # key not present, so the default is returned
+        result = self.config.celery_batch_size()
+        self.assertEqual(result, 500)
+
+    def test_celery_batch_linger(self):
+        """Testing method celery_batch_linger."""
+        # Testing celery_batch_linger with good_dict
+        # key not present, so the default is returned
+        result = self.config.celery_batch_linger()
+        self.assertEqual(result, 1.0)
+
+    def test_ingest_stream(self):
+        """Testing method ingest_stream."""
+        # Testing ingest_stream with good_dict
+        # key not present, so the default is returned
+        result = self.config.ingest_stream()
+        self.assertEqual(result, False)
+
+    def test_ingest_stream_maxlen(self):
+        """Testing method ingest_stream_maxlen."""
+        # Testing ingest_stream_maxlen with good_dict
+        # key not present, so the default is returned
+        result = self.config.ingest_stream_maxlen()
+        self.assertEqual(result, 1000000)
+
+    def test_ingest_stream_claim_idle(self):
+        """Testing method ingest_stream_claim_idle."""
+        # Testing ingest_stream_claim_idle with good_dict
+        # key not present, so the default is returned
+        result = self.config.ingest_stream_claim_idle()
+        self.assertEqual(result, 60)
+
+    def test_ingest_stream_max_deliveries(self):
+        """Testing method ingest_stream_max_deliveries."""
+        # Testing ingest_stream_max_deliveries with good_dict
+        # key not present, so the default is returned
+        result = self.config.ingest_stream_max_deliveries()
+        self.assertEqual(result, 5)
+
+    def test_api_ingest_mode(self):
+        """Testing method api_ingest_mode."""
+        # Testing api_ingest_mode with good_dict
+        # key not present, so the default is returned
+        result = self.config.api_ingest_mode()
+        self.assertEqual(result, 'celery')
+
+    def test_embedded_queue_size(self):
+        """Testing method embedded_queue_size."""
+        # Testing embedded_queue_size with good_dict
+        # key not present, so the default is returned
+        result = self.config.embedded_queue_size()
+        self.assertEqual(result, 10000)
+
+    def test_embedded_queue_threads(self):
+        """Testing method embedded_queue_threads."""
+        # Testing embedded_queue_threads with good_dict
+        # key not present, so the default is returned
+        result = self.config.embedded_queue_threads()
+        self.assertEqual(result, 1)
+
+    def test_api_queue_high_water(self):
+        """Testing method api_queue_high_water."""
+        # Testing api_queue_high_water with good_dict
+        # key not present, so the default is returned
+        result = self.config.api_queue_high_water()
+        self.assertEqual(result, 100000)
+
+    def test_api_queue_low_water(self):
+        """Testing method api_queue_low_water."""
+        # Testing api_queue_low_water with good_dict
+        # key not present, so the default is returned
+        result = self.config.api_queue_low_water()
+        self.assertEqual(result, 80000)
+
+    def test_api_retry_after(self):
+        """Testing method api_retry_after."""
+        # Testing api_retry_after with good_dict
+        # key not present, so the default is returned
+        result = self.config.api_retry_after()
+        self.assertEqual(result, 60)
+
+    def test_api_max_body_size(self):
+        """Testing method api_max_body_size."""
+        # Testing api_max_body_size with good_dict
+        # key not present, so the default is returned
+        result = self.config.api_max_body_size()
+        self.assertEqual(result, 67108864)
+
+    def test_agent_bulk_size(self):
+        """Testing method agent_bulk_size."""
+        # Testing agent_bulk_size with good_dict
+        # key not present, so the default is returned
+        result = self.config.agent_bulk_size()
+        self.assertEqual(result, 100)
+
+    def test_agent_purge_threads(self):
+        """Testing method agent_purge_threads."""
+        # Testing agent_purge_threads with good_dict
+        # key not present, so the default is returned
+        result = self.config.agent_purge_threads()
+        self.assertEqual(result, 4)
+
+    def test_agent_compression(self):
+        """Testing method agent_compression."""
+        # Testing agent_compression with good_dict
+        # key not present, so the default is returned
+        result = self.config.agent_compression()
+        self.assertEqual(result, 'none')
+
+    def test_agent_payload_version(self):
+        """Testing method agent_payload_version."""
+        # Testing agent_payload_version with good_dict
+        # key not present, so the default is returned
+        result = self.config.agent_payload_version()
+        self.assertEqual(result, 1)
+
+    def test_agent_aggregate(self):
+        """Testing method agent_aggregate."""
+        # Testing agent_aggregate with good_dict
+        # key not present, so the default is returned
+        result = self.config.agent_aggregate()
+        self.assertEqual(result, False)
+
+    def test_agent_aggregate_statistics(self):
+        """Testing method agent_aggregate_statistics."""
+        # Testing agent_aggregate_statistics with good_dict
+        # key not present, so the default is returned
+        result = self.config.agent_aggregate_statistics()
+        self.assertEqual(result, [])
+
+    def test_agent_keyframe_interval(self):
+        """Testing method agent_keyframe_interval."""
+        # Testing agent_keyframe_interval with good_dict
+        # key not present, so the default is returned
+        result = self.config.agent_keyframe_interval()
+        self.assertEqual(result, 0)
+
+    def test_agent_spool_segment_size(self):
+        """Testing method agent_spool_segment_size."""
+        # Testing agent_spool_segment_size with good_dict
+        # key not present, so the default is returned
+        result = self.config.agent_spool_segment_size()
+        self.assertEqual(result, 4194304)
+
+    def test_agent_spool_sync_records(self):
+        """Testing method agent_spool_sync_records."""
+        # Testing agent_spool_sync_records with good_dict
+        # key not present, so the default is returned
+        result = self.config.agent_spool_sync_records()
+        self.assertEqual(result, 16)
+
     def test_bind_port(self):
         """Testing method bind_port."""
         # Testing bind_port with good_dictionary
@@ -19,6 +19,7 @@ else:
 
 # Import infoset stuff
 from infoset.db import db_deviceagent
+from infoset.utils import general
 from infoset.test import unittest_setup_db
 from infoset.test import unittest_setup
 
@@ -243,6 +244,18 @@ class TestFunctions(unittest.TestCase):
         result = db_deviceagent.device_agent_exists(None, None)
         self.assertEqual(result, False)
 
+    def test_last_timestamp(self):
+        """Testing function last_timestamp."""
+        # Testing with known good value
+        result = db_deviceagent.last_timestamp(
+            self.database.id_agent(), self.database.devicename())
+        self.assertEqual(result, self.expected['last_timestamp'])
+
+        # Testing with unknown device
+        result = db_deviceagent.last_timestamp(
+            self.database.id_agent(), general.randomstring())
+        self.assertEqual(result, None)
+
     def test_all_device_indices(self):
         """Testing function all_device_indices."""
         # Testing with known good value
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""Test the db_identity library in the infoset.db module."""
+
+import unittest
+import time
+import os
+import sys
+
+# Try to create a working PYTHONPATH
+_TEST_DIRECTORY = os.path.dirname(os.path.realpath(__file__))
+_LIB_DIRECTORY = os.path.abspath(os.path.join(_TEST_DIRECTORY, os.pardir))
+_ROOT_DIRECTORY = os.path.abspath(os.path.join(_LIB_DIRECTORY, os.pardir))
+if _TEST_DIRECTORY.endswith('/infoset/test') is True:
+    sys.path.append(_ROOT_DIRECTORY)
+else:
+    print(
+        'This script is not installed in the "infoset-ng/bin" directory. '
+        'Please fix.')
+    sys.exit(2)
+
+# Import infoset stuff
+from infoset.db import db_identity
+from infoset.db import db_agent
+from infoset.db import db_device
+from infoset.db import db_deviceagent
+from infoset.db.db_orm import AgentName, Device
+from infoset.test import unittest_setup_db
+from infoset.test import unittest_setup
+
+
+class TestIdentityMap(unittest.TestCase):
+    """Checks all functions and methods."""
+
+    #########################################################################
+    # General object setup
+    #########################################################################
+
+    agent = {
+        'idx_agent': 2, 'idx_agentname': 3, 'id_agent': 'abc',
+        'enabled': True, 'agent': 'test', 'exists': True}
+
+    def test_agent(self):
+        """Testing method agent."""
+        # Test cached value
+        identity = db_identity.IdentityMap()
+        identity.set_agent('abc', self.agent)
+        self.assertEqual(identity.agent('abc'), self.agent)
+
+        # Test uncached value
+        self.assertEqual(identity.agent('bogus'), None)
+
+        # Values that don't exist in the database are not cached
+        identity.set_agent('missing', {'exists': False})
+        self.assertEqual(identity.agent('missing'), None)
+
+    def test_device(self):
+        """Testing method device."""
+        # Test cached value
+        identity = db_identity.IdentityMap()
+        expected = {'idx_device': 4, 'exists': True}
+        identity.set_device('device', expected)
+        self.assertEqual(identity.device('device'), expected)
+        self.assertEqual(identity.device('bogus'), None)
+
+    def test_deviceagent(self):
+        """Testing method deviceagent."""
+        # Test cached value
+        identity = db_identity.IdentityMap()
+        expected = {'idx_deviceagent': 5, 'exists': True}
+        identity.set_deviceagent(4, 2, expected)
+        self.assertEqual(identity.deviceagent(4, 2), expected)
+        self.assertEqual(identity.deviceagent(2, 4), None)
+
+    def test_size(self):
+        """Testing the bounded size of the cache."""
+        # Least recently used entries are evicted first
+        identity = db_identity.IdentityMap(size=2)
+        identity.set_agent('a', self.agent)
+        identity.set_agent('b', self.agent)
+        identity.agent('a')
+        identity.set_agent('c', self.agent)
+        self.assertNotEqual(identity.agent('a'), None)
+        self.assertEqual(identity.agent('b'), None)
+        self.assertNotEqual(identity.agent('c'), None)
+
+    def test_ttl(self):
+        """Testing the expiry of cache entries."""
+        identity = db_identity.IdentityMap(ttl=0.01)
+        identity.set_agent('abc', self.agent)
+        time.sleep(0.02)
+        self.assertEqual(identity.agent('abc'), None)
+
+    def test_clear(self):
+        """Testing method clear."""
+        identity = db_identity.IdentityMap()
+        identity.set_agent('abc', self.agent)
+        identity.clear()
+        self.assertEqual(identity.agent('abc'), None)
+
+    def test_invalidate(self):
+        """Testing method invalidate."""
+        # Only the map of the table of the row is cleared
+        identity = db_identity.IdentityMap()
+        identity.set_agent('abc', self.agent)
+        identity.set_device('device', {'idx_device': 4, 'exists': True})
+        identity.invalidate(Device())
+        self.assertEqual(identity.device('device'), None)
+        self.assertEqual(identity.agent('abc'), self.agent)
+
+        # Agent data includes the agent name
+        identity.invalidate(AgentName())
+        self.assertEqual(identity.agent('abc'), None)
+
+    def test_hit_rate(self):
+        """Testing method hit_rate."""
+        identity = db_identity.IdentityMap()
+        self.assertEqual(identity.hit_rate(), 0)
+        identity.set_agent('abc', self.agent)
+        identity.agent('abc')
+        identity.agent('bogus')
+        self.assertEqual(identity.hit_rate(), 0.5)
+
+
+class TestIdentity(unittest.TestCase):
+    """Checks all functions and methods."""
+
+    #########################################################################
+    # General object setup
+    #########################################################################
+
+    def test_identity_map(self):
+        """Testing function identity_map."""
+        # The map of the process is created once
+        result = db_identity.identity_map()
+        self.assertEqual(isinstance(result, db_identity.IdentityMap), True)
+        self.assertEqual(db_identity.identity_map() is result, True)
+
+
+class TestPreload(unittest.TestCase):
+    """Checks all functions and methods."""
+
+    #########################################################################
+    # General object setup
+    #########################################################################
+
+    # Setup database based on the config
+    database = unittest_setup_db.TestData()
+
+    def test_preload(self):
+        """Testing method preload."""
+        # Load the cache
+        db_identity.identity_map().clear()
+        result = db_identity.identity_map().preload()
+        self.assertEqual(result > 0, True)
+
+        # Lookups must match those from the database
+        agent = db_identity.identity_map().agent(self.database.id_agent())
+        self.assertEqual(agent['idx_agent'], self.database.idx_agent())
+        self.assertEqual(
+            agent['idx_agent'],
+            db_agent.GetIDAgent(self.database.id_agent()).idx_agent())
+
+        device = db_identity.identity_map().device(self.database.devicename())
+        self.assertEqual(device['idx_device'], self.database.idx_device())
+        self.assertEqual(
+            device['idx_device'],
+            db_device.GetDevice(self.database.devicename()).idx_device())
+
+        result = db_deviceagent.idx_deviceagent(
+            self.database.idx_device(), self.database.idx_agent())
+        self.assertEqual(result, self.database.idx_deviceagent())
+
+
+if __name__ == '__main__':
+    # Test the environment variables
+    unittest_setup.ready()
+
+    # Do the unit test
+    unittest.main()
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""Test the delta library in the infoset.utils module."""
+
+import unittest
+import os
+import sys
+
+# Try to create a working PYTHONPATH
+_TEST_DIRECTORY = os.path.dirname(os.path.realpath(__file__))
+_LIB_DIRECTORY = os.path.abspath(os.path.join(_TEST_DIRECTORY, os.pardir))
+_ROOT_DIRECTORY = os.path.abspath(os.path.join(_LIB_DIRECTORY, os.pardir))
+if _TEST_DIRECTORY.endswith('/infoset/test') is True:
+    sys.path.append(_ROOT_DIRECTORY)
+else:
+    print(
+        'This script is not installed in the "infoset-ng/bin" directory. '
+        'Please fix.')
+    sys.exit(2)
+
+# Import infoset stuff
+from infoset.utils import delta
+from infoset.utils import payload
+from infoset.test import unittest_setup
+
+
+def _data(timestamp, values, version=payload.VERSION, labels=None):
+    """Create agent data with the values of two interfaces."""
+    builder = payload.Payload()
+    if labels is None:
+        labels = ['packets_recv', 'packets_sent']
+    for label in labels:
+        columns = builder.label(label, 64, label)
+        for source, value in sorted(values.items()):
+            builder.append(columns, source, value, source)
+    columns = builder.label('version', None, 'Kernel Type')
+    builder.append(columns, 0, '#62-Ubuntu SMP', None)
+    main = {
+        'timestamp': timestamp,
+        'id_agent': 'abc',
+        'agent': 'unittest',
+        'devicename': 'unittest_device'}
+    return builder.data(main, version)
+
+
+def _values(data):
+    """Get the datapoints of agent data as a dict."""
+    result = {}
+    for data_type in ['timeseries', 'timefixed']:
+        for label, label_dict in data.get(data_type, {}).items():
+            result[label] = sorted(
+                tuple(datapoint) for datapoint in payload.datapoints(
+                    data, label_dict))
+    return result
+
+
+class TestSender(unittest.TestCase):
+    """Checks all functions and methods."""
+
+    #########################################################################
+    # General object setup
+    #########################################################################
+
+    def test_prepare(self):
+        """Testing method prepare."""
+        # The first post is a keyframe
+        sender = delta.Sender('unittest_device', 3)
+        data = _data(300, {'lo': 1, 'eth0': 2})
+        (body, headers) = sender.prepare(data)
+        self.assertIs(body, data)
+        self.assertEqual(headers[delta.SEQUENCE], '1')
+        self.assertEqual(headers[delta.KEYFRAME], '1')
+        self.assertEqual(len(headers[delta.DEVICE]), 40)
+        sender.posted(data, headers, True)
+
+        # The next posts have the changes, until the next keyframe is due
+        data = _data(600, {'lo': 1, 'eth0': 5})
+        (body, headers) = sender.prepare(data)
+        self.assertEqual(headers[delta.SEQUENCE], '2')
+        self.assertEqual(headers[delta.KEYFRAME], '1')
+        self.assertEqual(
+            _values(body), {
+                'packets_recv': [('eth0', 5, 'eth0')],
+                'packets_sent': [('eth0', 5, 'eth0')]})
+        sender.posted(data, headers, True)
+        (body, headers) = sender.prepare(data)
+        self.assertEqual(headers[delta.KEYFRAME], '1')
+        self.assertEqual(_values(body), {})
+        sender.posted(data, headers, True)
+        (body, headers) = sender.prepare(data)
+        self.assertEqual(headers[delta.SEQUENCE], '4')
+        self.assertEqual(headers[delta.KEYFRAME], '4')
+        sender.posted(data, headers, True)
+
+        # Keyframes follow failed posts, or are requested
+        (body, headers) = sender.prepare(data)
+        self.assertEqual(headers[delta.KEYFRAME], '4')
+        sender.posted(data, headers, False)
+        (body, headers) = sender.prepare(data)
+        self.assertEqual(headers[delta.SEQUENCE], '6')
+        self.assertEqual(headers[delta.KEYFRAME], '6')
+        sender.posted(data, headers, True)
+        (body, headers) = sender.prepare(data, keyframe=True)
+        self.assertEqual(headers[delta.KEYFRAME], '7')
+
+    def test_sender(self):
+        """Testing function sender."""
+        # Senders are kept for each device
+        result = delta.sender('abc', 'unittest_device', 3)
+        self.assertIs(delta.sender('abc', 'unittest_device', 3), result)
+        self.assertIsNot(delta.sender('abc', 'other_device', 3), result)
+
+
+class TestFunctions(unittest.TestCase):
+    """Checks all functions and methods."""
+
+    #########################################################################
+    # General object setup
+    #########################################################################
+
+    previous = _data(300, {'lo': 1, 'eth0': 2})
+
+    def test_changes(self):
+        """Testing function changes."""
+        for version in [1, payload.VERSION]:
+            # Only changed datapoints are kept, with the main keys
+            data = _data(600, {'lo': 1, 'eth0': 3, 'eth1': 4}, version)
+            result = delta.changes(self.previous, data)
+            self.assertEqual(payload.version(result), version)
+            self.assertEqual(result['timestamp'], 600)
+            self.assertEqual(
+                _values(result)['packets_sent'],
+                [('eth0', 3, 'eth0'), ('eth1', 4, 'eth1')])
+            self.assertEqual('timefixed' in result, False)
+
+        # Keyframes are required if datapoints disappear
+        data = _data(600, {'lo': 1})
+        self.assertEqual(delta.changes(self.previous, data), None)
+
+        # Or agent labels disappear or change
+        data = _data(600, {'lo': 1, 'eth0': 2}, labels=['packets_recv'])
+        self.assertEqual(delta.changes(self.previous, data), None)
+        data = _data(600, {'lo': 1, 'eth0': 2})
+        data['timeseries']['packets_recv']['base_type'] = 32
+        self.assertEqual(delta.changes(self.previous, data), None)
+
+        # Or indexes can't be compared
+        data = _data(600, {'lo': 1, 'eth0': 2})
+        data['timeseries']['packets_recv']['index'][0] = ['eth0']
+        self.assertEqual(delta.changes(self.previous, data), None)
+
+        # New agent labels are included
+        data = _data(
+            600, {'lo': 1, 'eth0': 2},
+            labels=['packets_recv', 'packets_sent', 'errors'])
+        result = delta.changes(self.previous, data)
+        self.assertEqual(sorted(_values(result)), ['errors'])
+
+    def test_merge(self):
+        """Testing function merge."""
+        for version in [1, payload.VERSION]:
+            # Merging the changes rebuilds the data
+            data = _data(
+                600, {'lo': 1, 'eth0': 3, 'eth1': 4}, version,
+                labels=['packets_recv', 'packets_sent', 'errors'])
+            result = delta.merge(
+                self.previous, delta.changes(self.previous, data))
+            self.assertEqual(payload.version(result), version)
+            self.assertEqual(result['timestamp'], 600)
+            self.assertEqual(_values(result), _values(data))
+
+        # Invalid changes are rejected
+        changes = delta.changes(self.previous, data)
+        changes['timeseries']['packets_recv']['index'][0] = ['eth0']
+        with self.assertRaises(TypeError):
+            delta.merge(self.previous, changes)
+
+
+if __name__ == '__main__':
+    # Test the environment variables
+    unittest_setup.ready()
+
+    # Do the unit test
+    unittest.main()
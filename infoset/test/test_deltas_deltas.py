@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""Test the Deltas class in the infoset.api.deltas module."""
+
+import unittest
+import os
+import sys
+import json
+
+# Try to create a working PYTHONPATH
+_TEST_DIRECTORY = os.path.dirname(os.path.realpath(__file__))
+_LIB_DIRECTORY = os.path.abspath(os.path.join(_TEST_DIRECTORY, os.pardir))
+_ROOT_DIRECTORY = os.path.abspath(os.path.join(_LIB_DIRECTORY, os.pardir))
+if _TEST_DIRECTORY.endswith('/infoset/test') is True:
+    sys.path.append(_ROOT_DIRECTORY)
+else:
+    print(
+        'This script is not installed in the "infoset-ng/bin" directory. '
+        'Please fix.')
+    sys.exit(2)
+
+# Import infoset stuff
+from infoset.api import deltas
+from infoset.utils import delta
+from infoset.utils import payload
+from infoset.test import unittest_setup
+
+
+class TestDeltas(unittest.TestCase):
+    """Checks all functions and methods."""
+
+    #########################################################################
+    # General object setup
+    #########################################################################
+
+    def setUp(self):
+        """Create a Deltas object and a Sender."""
+        self.deltas = deltas.Deltas(deltas.LocalStore())
+        self.sender = delta.Sender('unittest_device', 10)
+
+    def _data(self, timestamp, value):
+        """Create agent data."""
+        builder = payload.Payload()
+        columns = builder.label('packets_recv', 64, 'packets_recv')
+        builder.append(columns, 'lo', 1, 'lo')
+        builder.append(columns, 'eth0', value, 'eth0')
+        main = {
+            'timestamp': timestamp,
+            'id_agent': 'abc',
+            'agent': 'unittest',
+            'devicename': 'unittest_device'}
+        return builder.data(main)
+
+    def _post(self, data, keyframe=False):
+        """Post data through the Sender."""
+        (body, headers) = self.sender.prepare(data, keyframe=keyframe)
+        result = self.deltas.receive(
+            'abc', headers, json.dumps(body).encode(), 'application/json')
+        self.sender.posted(data, headers, result[0] is None)
+        return (result, headers)
+
+    def test_receive(self):
+        """Testing method receive."""
+        # Posts without sequence numbers are accepted as they are
+        result = self.deltas.receive('abc', {}, b'{}', 'application/json')
+        self.assertEqual(result, (None, b'{}', 'application/json'))
+
+        # Keyframes are accepted as they are
+        data = self._data(300, 2)
+        ((status, body, _), _) = self._post(data)
+        self.assertEqual(status, None)
+        self.assertEqual(json.loads(body.decode()), data)
+
+        # Delta posts are rebuilt
+        for timestamp in [600, 900]:
+            data = self._data(timestamp, timestamp)
+            ((status, body, content_type), headers) = self._post(data)
+            self.assertNotEqual(headers[delta.SEQUENCE],
+                                headers[delta.KEYFRAME])
+            self.assertEqual(status, None)
+            self.assertEqual(content_type, 'application/json')
+            self.assertEqual(json.loads(body.decode()), data)
+
+        # Keyframes are requested if a post is missing
+        data = self._data(1200, 3)
+        (_, headers) = self.sender.prepare(data)
+        self.sender.posted(data, headers, True)
+        ((status, body, _), _) = self._post(self._data(1500, 4))
+        self.assertEqual(status, delta.RESEND)
+        self.assertEqual(body, None)
+
+        # Or if the keyframe is unknown
+        ((status, _, _), _) = self._post(self._data(1500, 4))
+        self.assertEqual(status, None)
+        self.deltas = deltas.Deltas(deltas.LocalStore())
+        ((status, _, _), _) = self._post(self._data(1800, 5))
+        self.assertEqual(status, delta.RESEND)
+        ((status, _, _), _) = self._post(self._data(1800, 5), keyframe=True)
+        self.assertEqual(status, None)
+
+    def test_receive_invalid(self):
+        """Testing method receive with invalid posts."""
+        # Invalid headers are rejected
+        (_, headers) = self.sender.prepare(self._data(300, 2))
+        for key, value in [
+                (delta.DEVICE, '../../etc'),
+                (delta.SEQUENCE, 'x'),
+                (delta.KEYFRAME, '0')]:
+            invalid = dict(headers)
+            invalid[key] = value
+            result = self.deltas.receive(
+                'abc', invalid, b'{}', 'application/json')
+            self.assertEqual(result, (400, None, None))
+
+        # So are delta posts that can't be rebuilt
+        self._post(self._data(300, 2))
+        (_, headers) = self.sender.prepare(self._data(600, 3))
+        result = self.deltas.receive(
+            'abc', headers, b'[1, 2', 'application/json')
+        self.assertEqual(result, (400, None, None))
+
+
+if __name__ == '__main__':
+    # Test the environment variables
+    unittest_setup.ready()
+
+    # Do the unit test
+    unittest.main()
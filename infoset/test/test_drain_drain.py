@@ -23,6 +23,7 @@ else:
 # Infoset imports
 from infoset.utils import general
 from infoset.cache import drain
+from infoset.utils import payload
 from infoset.test import unittest_setup
 
 
@@ -245,6 +246,16 @@ class TestDrain(unittest.TestCase):
         self.assertEqual(len(results), len(sources))
         self.assertEqual(len(results), found)
 
+    def test_columnar(self):
+        """Testing columnar data."""
+        # Columnar data is drained like the same data in version 1
+        ingest = drain.Drain(
+            self.filepath, data=payload.columnar(self.data))
+        self.assertEqual(ingest.valid(), True)
+        self.assertEqual(ingest.timeseries(), self.ingest.timeseries())
+        self.assertEqual(ingest.timefixed(), self.ingest.timefixed())
+        self.assertEqual(ingest.sources(), self.ingest.sources())
+
     def test_purge(self):
         """Testing function purge."""
         directory = tempfile.mkdtemp()
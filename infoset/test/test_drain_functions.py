@@ -48,6 +48,56 @@ class TestFunctions(unittest.TestCase):
             '9af342e9f23a5e2ff09d8a799a2b9f5234b'
             'addc31f3c09b309be9dfe6801ee40')
 
+        # Cached results must be the same
+        result = drain._id_datapoint(
+            id_agent, label, index, agent_name, devicename)
+        self.assertEqual(
+            result,
+            '9af342e9f23a5e2ff09d8a799a2b9f5234b'
+            'addc31f3c09b309be9dfe6801ee40')
+
+        # Values of different types create different IDs
+        self.assertNotEqual(
+            drain._id_datapoint(id_agent, label, 1, agent_name, devicename),
+            drain._id_datapoint(id_agent, label, 1.0, agent_name, devicename))
+
+        # Values that can't be cached are hashed
+        result = drain._id_datapoint(
+            id_agent, label, [1], agent_name, devicename)
+        self.assertEqual(
+            result,
+            drain._hash_id_datapoint(
+                id_agent, label, [1], agent_name, devicename))
+
+    def test_id_datapoint_cache_info(self):
+        """Testing function id_datapoint_cache_info."""
+        # Initialize key variables
+        before = drain.id_datapoint_cache_info()
+
+        # Test
+        drain._id_datapoint('a', 'b', 'cache_info', 'd', 'e')
+        drain._id_datapoint('a', 'b', 'cache_info', 'd', 'e')
+        result = drain.id_datapoint_cache_info()
+        self.assertEqual(result['hits'] - before['hits'], 1)
+        self.assertEqual(result['misses'] - before['misses'], 1)
+        self.assertEqual(result['hit_rate'] > 0, True)
+        self.assertEqual(result['maxsize'], 100000)
+
+    def test__id_datapoint_cache(self):
+        """Testing function _id_datapoint_cache."""
+        # Initialize key variables
+        original = drain._ID_DATAPOINT_CACHE
+
+        # Test that the cache is created on first use and then reused
+        drain._ID_DATAPOINT_CACHE = None
+        try:
+            result = drain._id_datapoint_cache()
+            self.assertEqual(result is drain._ID_DATAPOINT_CACHE, True)
+            self.assertEqual(result is drain._id_datapoint_cache(), True)
+            self.assertEqual(result.cache_info().maxsize, 100000)
+        finally:
+            drain._ID_DATAPOINT_CACHE = original
+
     def test__main_keys(self):
         """Testing function _main_keys."""
         # Initialize key variables
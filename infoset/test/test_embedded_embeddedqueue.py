@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""Test the EmbeddedQueue class in the infoset.cache.embedded module."""
+
+import unittest
+import tempfile
+import shutil
+import json
+import time
+import threading
+import os
+import sys
+
+# Try to create a working PYTHONPATH
+_TEST_DIRECTORY = os.path.dirname(os.path.realpath(__file__))
+_LIB_DIRECTORY = os.path.abspath(os.path.join(_TEST_DIRECTORY, os.pardir))
+_ROOT_DIRECTORY = os.path.abspath(os.path.join(_LIB_DIRECTORY, os.pardir))
+if _TEST_DIRECTORY.endswith('/infoset/test') is True:
+    sys.path.append(_ROOT_DIRECTORY)
+else:
+    print(
+        'This script is not installed in the "infoset-ng/bin" directory. '
+        'Please fix.')
+    sys.exit(2)
+
+# Import infoset stuff
+from infoset.cache import cache
+from infoset.cache import embedded
+from infoset.utils import configuration
+from infoset.utils import general
+from infoset.test import unittest_setup
+
+
+class TestEmbeddedQueue(unittest.TestCase):
+    """Checks all functions and methods."""
+
+    # Initialize key variables
+    data = unittest_setup.TestVariables().cache_data()
+
+    #########################################################################
+    # General object setup
+    #########################################################################
+
+    def setUp(self):
+        """Create a queue using a temporary cache directory."""
+        self.cache_dir = tempfile.mkdtemp()
+        self.config = configuration.Config()
+        self.config.ingest_cache_directory = lambda: self.cache_dir
+        self.config.embedded_queue_size = lambda: 1
+        self.config.celery_batch_size = lambda: 2
+        self.config.celery_batch_linger = lambda: 0.1
+        self.queue = embedded.EmbeddedQueue(self.config)
+
+        # Don't start the ingest threads
+        self.queue._pid = os.getpid()
+
+    def tearDown(self):
+        """Delete the cache directory."""
+        self.queue.close()
+        shutil.rmtree(self.cache_dir)
+
+    def _filenames(self):
+        """Get the names of the files in the cache directory."""
+        return sorted(os.listdir(self.cache_dir))
+
+    def test_put(self):
+        """Testing method put."""
+        body = json.dumps(self.data).encode()
+
+        # Posts are queued until the queue is full
+        self.assertEqual(self.queue.put(body), True)
+        self.assertEqual(self._filenames(), [])
+
+        # Then they are written to the cache directory
+        self.assertEqual(self.queue.put(body), False)
+        self.assertEqual(len(self._filenames()), 1)
+
+    def test_close(self):
+        """Testing method close."""
+        # Queued posts are written to the cache directory
+        self.queue.put(json.dumps(self.data).encode())
+        self.queue.close()
+        self.assertEqual(len(self._filenames()), 1)
+
+        # As are posts received afterwards
+        data = dict(self.data)
+        data['timestamp'] += 300
+        self.assertEqual(self.queue.put(json.dumps(data).encode()), False)
+        self.assertEqual(len(self._filenames()), 2)
+
+    def test__batch(self):
+        """Testing method _batch."""
+        # Batches are no larger than celery_batch_size
+        self.config.embedded_queue_size = lambda: 10
+        self.queue = embedded.EmbeddedQueue(self.config)
+        for value in [b'j1', b'j2', b'j3']:
+            self.queue._queue.put(value)
+        self.assertEqual(self.queue._batch(), [b'j1', b'j2'])
+        self.assertEqual(self.queue._batch(), [b'j3'])
+        self.assertEqual(self.queue._batch(), [])
+
+    def test__run(self):
+        """Testing method _run."""
+        # Initialize key variables
+        process = cache.ProcessRedisBatch.process
+        cache.ProcessRedisBatch.process = lambda _: sys.exit(2)
+        self.config.embedded_queue_size = lambda: 10
+        self.queue = embedded.EmbeddedQueue(self.config)
+        thread = threading.Thread(target=self.queue._run, daemon=True)
+        thread.start()
+
+        # Batches that fail are written to the cache directory, even if
+        # log2die was called, and the thread keeps ingesting
+        try:
+            for count in [1, 2]:
+                data = dict(self.data)
+                data['timestamp'] += 300 * count
+                self.queue._queue.put(b'j' + json.dumps(data).encode())
+                stop = time.time() + 5
+                while len(self._filenames()) < count and time.time() < stop:
+                    time.sleep(0.05)
+                self.assertEqual(len(self._filenames()), count)
+                self.assertEqual(thread.is_alive(), True)
+        finally:
+            cache.ProcessRedisBatch.process = process
+            self.queue._stopping.set()
+            thread.join()
+
+    def test_spill(self):
+        """Testing function spill."""
+        # Valid posts are written with the name used by agents
+        value = b'j' + json.dumps(self.data).encode()
+        filepaths = embedded.spill(self.cache_dir, value)
+        expected = ('%s/%s_%s_%s.json') % (
+            self.cache_dir, self.data['timestamp'], self.data['id_agent'],
+            general.hashstring(self.data['devicename'], sha=1))
+        self.assertEqual(filepaths, [expected])
+        self.assertEqual(self._filenames(), [os.path.basename(expected)])
+        with open(expected, 'r') as f_handle:
+            self.assertEqual(json.load(f_handle), self.data)
+
+        # Invalid posts aren't
+        self.assertEqual(embedded.spill(self.cache_dir, b'j{}'), [])
+        self.assertEqual(embedded.spill(self.cache_dir, b'bogus'), [])
+        self.assertEqual(len(self._filenames()), 1)
+
+        # Posts received in bulk are written to a file each
+        data = dict(self.data)
+        data['timestamp'] += 300
+        value = b'j' + json.dumps([data, {}]).encode()
+        self.assertEqual(len(embedded.spill(self.cache_dir, value)), 1)
+        self.assertEqual(len(self._filenames()), 2)
+
+
+if __name__ == '__main__':
+    # Test the environment variables
+    unittest_setup.ready()
+
+    # Do the unit test
+    unittest.main()
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""Test the ShardLeases class in the infoset.cache.lease module."""
+
+import unittest
+import multiprocessing
+import tempfile
+import shutil
+import time
+import os
+import sys
+
+# Try to create a working PYTHONPATH
+_TEST_DIRECTORY = os.path.dirname(os.path.realpath(__file__))
+_LIB_DIRECTORY = os.path.abspath(os.path.join(_TEST_DIRECTORY, os.pardir))
+_ROOT_DIRECTORY = os.path.abspath(os.path.join(_LIB_DIRECTORY, os.pardir))
+if _TEST_DIRECTORY.endswith('/infoset/test') is True:
+    sys.path.append(_ROOT_DIRECTORY)
+else:
+    print(
+        'This script is not installed in the "infoset-ng/bin" directory. '
+        'Please fix.')
+    sys.exit(2)
+
+# Import infoset stuff
+from infoset.cache import lease
+from infoset.test import unittest_setup
+
+
+def _other_ingester(connection, directory, shards, timeout):
+    """Run the commands of a test in another process.
+
+    fcntl locks are held by processes, so a second ingester must be a
+    separate process.
+
+    """
+    # Process commands until told to stop
+    leases = lease.ShardLeases(directory, shards=shards, timeout=timeout)
+    while True:
+        command = connection.recv()
+        if command == 'acquire':
+            connection.send(leases.acquire())
+        elif command == 'heartbeat':
+            connection.send(leases.heartbeat())
+        else:
+            leases.release()
+            connection.send(None)
+            break
+
+
+class TestShardLeases(unittest.TestCase):
+    """Checks all functions and methods."""
+
+    #########################################################################
+    # General object setup
+    #########################################################################
+
+    def setUp(self):
+        """Create a lease directory."""
+        self.directory = tempfile.mkdtemp()
+        self.process = None
+
+    def tearDown(self):
+        """Stop the other ingester and delete the lease directory."""
+        if self.process is not None:
+            self._command('stop')
+            self.process.join()
+        shutil.rmtree(self.directory)
+
+    def _start(self, shards, timeout=60):
+        """Start another ingester."""
+        (self.connection, child) = multiprocessing.Pipe()
+        self.process = multiprocessing.Process(
+            target=_other_ingester,
+            args=(child, self.directory, shards, timeout))
+        self.process.start()
+
+    def _command(self, command):
+        """Run a command in the other ingester."""
+        self.connection.send(command)
+        return self.connection.recv()
+
+    def test_acquire(self):
+        """Testing method acquire."""
+        # A single ingester gets all the shards
+        leases = lease.ShardLeases(self.directory, shards=4)
+        self.assertEqual(leases.acquire(), [0, 1, 2, 3])
+        self.assertEqual(leases.owns('ffffffff'), True)
+        leases.release()
+
+    def test_fair_share(self):
+        """Testing the sharing of shards between ingesters."""
+        # The first ingester gets all the shards
+        self._start(4)
+        self.assertEqual(self._command('acquire'), [0, 1, 2, 3])
+
+        # It gives up half when another ingester appears
+        leases = lease.ShardLeases(self.directory, shards=4)
+        self.assertEqual(leases.acquire(), [])
+        self.assertEqual(self._command('acquire'), [0, 1])
+        self.assertEqual(leases.acquire(), [2, 3])
+        self.assertEqual(leases.owns('00000000'), False)
+        self.assertEqual(leases.owns('00000003'), True)
+        leases.release()
+
+    def test_release(self):
+        """Testing method release."""
+        # Released shards are available to others
+        self._start(2)
+        self._command('acquire')
+        leases = lease.ShardLeases(self.directory, shards=2)
+        self.assertEqual(leases.acquire(), [])
+        self._command('stop')
+        self.process.join()
+        self.process = None
+        self.assertEqual(leases.acquire(), [0, 1])
+        leases.release()
+
+    def test_takeover(self):
+        """Testing the takeover of leases without heartbeats."""
+        # The other ingester stops sending heartbeats
+        self._start(1, timeout=0.2)
+        self.assertEqual(self._command('acquire'), [0])
+        time.sleep(0.5)
+
+        # Its lease is taken over
+        leases = lease.ShardLeases(self.directory, shards=1, timeout=0.2)
+        self.assertEqual(leases.acquire(), [0])
+
+        # It notices when it tries to send a heartbeat
+        self.assertEqual(self._command('heartbeat'), [])
+        leases.release()
+
+    def test_checkin(self):
+        """Testing method checkin."""
+        # Heartbeats are sent while the ingest loop checks in
+        leases = lease.ShardLeases(self.directory, shards=1, timeout=0.3)
+        self.assertEqual(leases.acquire(), [0])
+        leases.start()
+        for _ in range(4):
+            time.sleep(0.15)
+            leases.checkin()
+        (_, heartbeat) = lease._read(leases._lease_file(0))
+        self.assertLess(time.time() - heartbeat, 0.3)
+
+        # But not if it hangs, so its lease is taken over
+        time.sleep(1)
+        (_, heartbeat) = lease._read(leases._lease_file(0))
+        self.assertGreater(time.time() - heartbeat, 0.3)
+        self._start(1, timeout=0.3)
+        self.assertEqual(self._command('acquire'), [0])
+        leases.release()
+
+    def test_shard(self):
+        """Testing function shard."""
+        self.assertEqual(lease.shard('00000005abc', 4), 1)
+        self.assertEqual(lease.shard('ffffffff', 1), 0)
+
+
+if __name__ == '__main__':
+    # Test the environment variables
+    unittest_setup.ready()
+
+    # Do the unit test
+    unittest.main()
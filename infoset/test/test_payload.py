@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""Test the payload library in the infoset.utils module."""
+
+import unittest
+import os
+import sys
+import json
+
+# Try to create a working PYTHONPATH
+_TEST_DIRECTORY = os.path.dirname(os.path.realpath(__file__))
+_LIB_DIRECTORY = os.path.abspath(os.path.join(_TEST_DIRECTORY, os.pardir))
+_ROOT_DIRECTORY = os.path.abspath(os.path.join(_LIB_DIRECTORY, os.pardir))
+if _TEST_DIRECTORY.endswith('/infoset/test') is True:
+    sys.path.append(_ROOT_DIRECTORY)
+else:
+    print(
+        'This script is not installed in the "infoset-ng/bin" directory. '
+        'Please fix.')
+    sys.exit(2)
+
+# Import infoset stuff
+from infoset.utils import payload
+from infoset.test import unittest_setup
+
+
+class TestPayload(unittest.TestCase):
+    """Checks all functions and methods."""
+
+    #########################################################################
+    # General object setup
+    #########################################################################
+
+    data = unittest_setup.TestVariables().cache_data()
+    main = {
+        'timestamp': 1481561700,
+        'id_agent': 'abc',
+        'agent': 'unittest',
+        'devicename': 'unittest_device'}
+
+    def _builder(self):
+        """Create a Payload with data from two interfaces."""
+        builder = payload.Payload()
+        for label in ['packets_recv', 'packets_sent']:
+            columns = builder.label(label, 64, label)
+            for source in ['lo', 'p10p1']:
+                builder.append(columns, source, 10, source)
+        columns = builder.label('version', None, 'Kernel Type')
+        builder.append(columns, 0, '#62-Ubuntu SMP', None)
+        return builder
+
+    def test_label(self):
+        """Testing method label."""
+        # Labels are added to the data type of their base_type
+        builder = self._builder()
+        self.assertEqual(
+            sorted(builder.labels['timeseries']),
+            ['packets_recv', 'packets_sent'])
+        self.assertEqual(sorted(builder.labels['timefixed']), ['version'])
+
+        # Labels are replaced
+        builder.label('packets_recv', 64, 'Packets (In)')
+        self.assertEqual(
+            builder.labels['timeseries']['packets_recv']['index'], [])
+
+    def test_append(self):
+        """Testing method append."""
+        # Sources are only listed once
+        builder = self._builder()
+        self.assertEqual(builder.sources, ['lo', 'p10p1', None])
+        self.assertEqual(
+            builder.labels['timeseries']['packets_sent'], {
+                'base_type': 64,
+                'description': 'packets_sent',
+                'index': ['lo', 'p10p1'],
+                'value': [10, 10],
+                'source': [0, 1]})
+
+    def test_data(self):
+        """Testing method data."""
+        # Version 2 data uses the lists of the builder
+        builder = self._builder()
+        result = builder.data(self.main)
+        self.assertEqual(result['version'], payload.VERSION)
+        self.assertIs(result['sources'], builder.sources)
+        self.assertEqual(result['id_agent'], 'abc')
+
+        # Version 1 data lists datapoints
+        result = builder.data(self.main, version=1)
+        self.assertEqual('version' in result, False)
+        self.assertEqual(
+            result['timefixed']['version'], {
+                'base_type': None,
+                'description': 'Kernel Type',
+                'data': [[0, '#62-Ubuntu SMP', None]]})
+
+        # Data types without labels are left out
+        result = payload.Payload().data(self.main)
+        self.assertEqual('timeseries' in result, False)
+
+        # Version 2 data of devices with many interfaces is smaller
+        builder = payload.Payload()
+        for label in ['ifInOctets', 'ifOutOctets', 'ifInErrors']:
+            columns = builder.label(label, 64, label)
+            for index in range(1000):
+                builder.append(
+                    columns, index, 123456789, 'GigabitEthernet0/%s' % index)
+        self.assertLess(
+            len(json.dumps(builder.data(self.main))),
+            len(json.dumps(builder.data(self.main, version=1))))
+
+    def test_columnar(self):
+        """Testing function columnar."""
+        # Columnar data has the same datapoints
+        result = payload.columnar(self.data)
+        self.assertEqual(payload.version(result), payload.VERSION)
+        for data_type in ['timeseries', 'timefixed']:
+            self.assertEqual(
+                sorted(result[data_type]), sorted(self.data[data_type]))
+            for label, label_dict in self.data[data_type].items():
+                self.assertEqual(
+                    [list(_) for _ in payload.datapoints(
+                        result, result[data_type][label])],
+                    label_dict['data'])
+
+    def test_datapoints(self):
+        """Testing function datapoints."""
+        # Version 1 datapoints are returned as they are
+        label_dict = self.data['timeseries']['packets_recv']
+        self.assertIs(payload.datapoints(self.data, label_dict),
+                      label_dict['data'])
+
+
+if __name__ == '__main__':
+    # Test the environment variables
+    unittest_setup.ready()
+
+    # Do the unit test
+    unittest.main()
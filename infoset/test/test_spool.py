@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""Test the spool library in the infoset.utils module."""
+
+import unittest
+import tempfile
+import shutil
+import os
+import sys
+from copy import deepcopy
+
+# Try to create a working PYTHONPATH
+_TEST_DIRECTORY = os.path.dirname(os.path.realpath(__file__))
+_LIB_DIRECTORY = os.path.abspath(os.path.join(_TEST_DIRECTORY, os.pardir))
+_ROOT_DIRECTORY = os.path.abspath(os.path.join(_LIB_DIRECTORY, os.pardir))
+if _TEST_DIRECTORY.endswith('/infoset/test') is True:
+    sys.path.append(_ROOT_DIRECTORY)
+else:
+    print(
+        'This script is not installed in the "infoset-ng/bin" directory. '
+        'Please fix.')
+    sys.exit(2)
+
+# Import infoset stuff
+from infoset.utils import spool
+from infoset.test import unittest_setup
+
+
+class TestSpool(unittest.TestCase):
+    """Checks all functions and methods."""
+
+    #########################################################################
+    # General object setup
+    #########################################################################
+
+    data = unittest_setup.TestVariables().cache_data()
+
+    def setUp(self):
+        """Create a spool in a temporary directory."""
+        self.directory = tempfile.mkdtemp()
+        self.spool = self._spool()
+
+    def tearDown(self):
+        """Delete the temporary directory."""
+        self.spool.close()
+        shutil.rmtree(self.directory)
+
+    def _spool(self, segment_size=4194304, compress=False):
+        """Create a spool."""
+        return spool.Spool(
+            self.directory, 'abc', '123', segment_size=segment_size,
+            sync_records=2, compress=compress)
+
+    def _data(self, timestamp):
+        """Create data with a timestamp."""
+        data = deepcopy(self.data)
+        data['timestamp'] = timestamp
+        return data
+
+    def _segments(self):
+        """Get the segment files."""
+        return sorted(
+            os.path.join(self.directory, filename)
+            for filename in os.listdir(self.directory)
+            if filename.endswith(spool.SUFFIX) is True)
+
+    def test_append(self):
+        """Testing method append."""
+        # Data is appended to a single segment named after the first data
+        for timestamp in range(300, 310):
+            filepath = self.spool.append(self._data(timestamp))
+        self.assertEqual(self._segments(), [filepath])
+        self.assertEqual(
+            os.path.basename(filepath), '300_abc_123%s' % (spool.SUFFIX))
+
+        # Segments are appended to after the spool is reopened
+        self.spool.close()
+        self.spool = self._spool()
+        self.assertEqual(self.spool.append(self._data(310)), filepath)
+        result = [data for (_, data) in self.spool.read(filepath)]
+        self.assertEqual(result, [self._data(_) for _ in range(300, 311)])
+
+    def test_append_rotation(self):
+        """Testing method append with rotation."""
+        # Segments are rotated once they are full
+        self.spool = self._spool(segment_size=1, compress=True)
+        for timestamp in range(300, 303):
+            self.spool.append(self._data(timestamp))
+        segments = self._segments()
+        self.assertEqual(len(segments), 3)
+        for (timestamp, filepath) in zip(range(300, 303), segments):
+            self.assertEqual(
+                [data for (_, data) in spool.records(filepath)],
+                [self._data(timestamp)])
+
+    def test_consumed(self):
+        """Testing method consumed."""
+        # Read segments are read again from the recorded offset
+        for timestamp in range(300, 303):
+            filepath = self.spool.append(self._data(timestamp))
+        records = self.spool.read(filepath)
+        self.spool.consumed(filepath, records[0][0])
+        self.spool.close()
+        self.spool = self._spool()
+        records = self.spool.read(filepath)
+        self.assertEqual(
+            [data for (_, data) in records],
+            [self._data(301), self._data(302)])
+
+        # Segments are deleted once completely read
+        self.spool.consumed(filepath, records[-1][0])
+        self.assertEqual(self._segments(), [])
+        self.assertEqual(self.spool.index['offsets'], {})
+
+        # And new ones started
+        filepath = self.spool.append(self._data(303))
+        self.assertEqual(
+            os.path.basename(filepath), '303_abc_123%s' % (spool.SUFFIX))
+
+    def test_records(self):
+        """Testing function records."""
+        # Damaged records are skipped
+        for timestamp in range(300, 303):
+            filepath = self.spool.append(self._data(timestamp))
+        self.spool.close()
+        with open(filepath, 'rb') as f_handle:
+            value = bytearray(f_handle.read())
+        value[len(value) // 2] ^= 0xff
+        with open(filepath, 'wb') as f_handle:
+            f_handle.write(value[:-1])
+        result = list(spool.records(filepath))
+        self.assertEqual(
+            [data for (_, data) in result],
+            [self._data(300), None, None])
+
+        # The offset of the end of the file is always reached
+        self.assertEqual(result[-1][0], len(value) - 1)
+
+
+if __name__ == '__main__':
+    # Test the environment variables
+    unittest_setup.ready()
+
+    # Do the unit test
+    unittest.main()
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""Test the IngestStream class in the infoset.cache.stream module.
+
+A local redis-server is required.
+
+"""
+
+import unittest
+import time
+import os
+import sys
+
+# PIP libraries
+import redis
+
+# Try to create a working PYTHONPATH
+_TEST_DIRECTORY = os.path.dirname(os.path.realpath(__file__))
+_LIB_DIRECTORY = os.path.abspath(os.path.join(_TEST_DIRECTORY, os.pardir))
+_ROOT_DIRECTORY = os.path.abspath(os.path.join(_LIB_DIRECTORY, os.pardir))
+if _TEST_DIRECTORY.endswith('/infoset/test') is True:
+    sys.path.append(_ROOT_DIRECTORY)
+else:
+    print(
+        'This script is not installed in the "infoset-ng/bin" directory. '
+        'Please fix.')
+    sys.exit(2)
+
+# Import infoset stuff
+from infoset.cache import stream
+from infoset.utils import configuration
+from infoset.test import unittest_setup
+
+
+def _redis_available():
+    """Determine whether a redis-server can be used."""
+    config = configuration.Config()
+    try:
+        redis.StrictRedis(
+            host=config.redis_hostname(), port=config.redis_port()).ping()
+    except redis.RedisError:
+        return False
+    return True
+
+
+@unittest.skipIf(_redis_available() is False, 'redis-server is not running')
+class TestIngestStream(unittest.TestCase):
+    """Checks all functions and methods."""
+
+    #########################################################################
+    # General object setup
+    #########################################################################
+
+    def setUp(self):
+        """Start with an empty stream."""
+        self.config = configuration.Config()
+        self.config.ingest_stream_claim_idle = lambda: 0.1
+        self.config.ingest_stream_max_deliveries = lambda: 2
+        self.stream = stream.IngestStream(self.config, consumer='first')
+        self.stream.redis.delete(stream._STREAM, stream._DEAD)
+
+    def tearDown(self):
+        """Delete the stream."""
+        self.stream.redis.delete(stream._STREAM, stream._DEAD)
+
+    def test_add_many(self):
+        """Testing method add_many."""
+        entry_ids = self.stream.add_many([(b'{}', None), (b'{}', None)])
+        self.assertEqual(len(entry_ids), 2)
+        self.assertEqual(self.stream.redis.xlen(stream._STREAM), 2)
+
+    def test_read(self):
+        """Testing method read."""
+        # Posts are only read once
+        self.stream.add(b'{"key": 1}')
+        entries = self.stream.read(10)
+        self.assertEqual(len(entries), 1)
+        self.assertEqual(entries[0][1], b'j{"key": 1}')
+        self.assertEqual(self.stream.read(10), [])
+
+        # Posts that aren't acknowledged are reclaimed by others
+        other = stream.IngestStream(self.config, consumer='second')
+        self.assertEqual(other.read(10), [])
+        time.sleep(0.2)
+        self.assertEqual(other.read(10), entries)
+
+    def test_ack(self):
+        """Testing method ack."""
+        # Acknowledged posts are deleted
+        self.stream.add(b'{}')
+        entries = self.stream.read(10)
+        self.stream.ack([entry_id for (entry_id, _) in entries])
+        self.assertEqual(self.stream.redis.xlen(stream._STREAM), 0)
+        time.sleep(0.2)
+        self.assertEqual(self.stream.read(10), [])
+
+    def test_dead_letter(self):
+        """Testing the dead letter stream."""
+        # Posts are reclaimed until they have been read too often
+        self.stream.add(b'{"key": 1}')
+        entries = self.stream.read(10)
+        time.sleep(0.2)
+        self.assertEqual(self.stream.read(10), entries)
+        time.sleep(0.2)
+        self.assertEqual(self.stream.read(10), [])
+
+        # They are then moved to the dead letter stream
+        self.assertEqual(self.stream.redis.xlen(stream._STREAM), 0)
+        dead = self.stream.redis.xrange(stream._DEAD)
+        self.assertEqual(len(dead), 1)
+        self.assertEqual(dead[0][1][stream._FIELD], b'j{"key": 1}')
+
+    def test_process(self):
+        """Testing method process."""
+        # Invalid posts are ingested, and therefore acknowledged
+        self.stream.add_many([(b'{}', None), (b'bogus', None)])
+        self.assertEqual(self.stream.process(), 2)
+        self.assertEqual(self.stream.redis.xlen(stream._STREAM), 0)
+
+
+if __name__ == '__main__':
+    # Test the environment variables
+    unittest_setup.ready()
+
+    # Do the unit test
+    unittest.main()
@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""Test the CheckPayload class in the infoset.cache.validate module."""
+
+# Standard imports
+import unittest
+import copy
+import os
+import sys
+
+# Try to create a working PYTHONPATH
+_TEST_DIRECTORY = os.path.dirname(os.path.realpath(__file__))
+_LIB_DIRECTORY = os.path.abspath(os.path.join(_TEST_DIRECTORY, os.pardir))
+_ROOT_DIRECTORY = os.path.abspath(os.path.join(_LIB_DIRECTORY, os.pardir))
+if _TEST_DIRECTORY.endswith('/infoset/test') is True:
+    sys.path.append(_ROOT_DIRECTORY)
+else:
+    print(
+        'This script is not installed in the "infoset-ng/bin" directory. '
+        'Please fix.')
+    sys.exit(2)
+
+# Infoset imports
+from infoset.cache import validate
+from infoset.utils import payload
+from infoset.test import unittest_setup
+
+
+class TestCheckPayload(unittest.TestCase):
+    """Checks all functions and methods."""
+    # Initialize key variables
+    data = unittest_setup.TestVariables().cache_data()
+
+    def _label(self, data_dict, data_type):
+        """Get the data of the first agent label of a data type."""
+        for _, label_dict in sorted(data_dict[data_type].items()):
+            return label_dict
+
+    def _error(self, data_dict):
+        """Get the error code for data."""
+        error = validate._payload_error(data_dict)
+        if error is not None:
+            return error[0]
+        return None
+
+    def test_valid(self):
+        """Testing function valid."""
+        # Test with good data
+        data_dict = copy.deepcopy(self.data)
+        result = validate._CheckPayload(data_dict)
+        self.assertEqual(result.valid(), True)
+
+        # Test with good data (missing one time keys)
+        for key in ['timefixed', 'timeseries']:
+            data_dict = copy.deepcopy(self.data)
+            data_dict.pop(key, None)
+            result = validate._CheckPayload(data_dict)
+            self.assertEqual(result.valid(), True)
+
+        # Test with value that is not a dict
+        result = validate._CheckPayload('string')
+        self.assertEqual(result.valid(), False)
+
+        # Test with bad data (main key is integer)
+        data_dict = copy.deepcopy(self.data)
+        data_dict['devicename'] = 0
+        result = validate._CheckPayload(data_dict)
+        self.assertEqual(result.valid(), False)
+
+        # Test with bad data (no time keys)
+        data_dict = copy.deepcopy(self.data)
+        data_dict.pop('timefixed', None)
+        data_dict.pop('timeseries', None)
+        result = validate._CheckPayload(data_dict)
+        self.assertEqual(result.valid(), False)
+
+        # Test with bad data (no keys under agent_label)
+        data_dict = copy.deepcopy(self.data)
+        self._label(data_dict, 'timeseries').pop('data', None)
+        result = validate._CheckPayload(data_dict)
+        self.assertEqual(result.valid(), False)
+
+        # Test with bad data (base_type is non-numeric string)
+        data_dict = copy.deepcopy(self.data)
+        self._label(data_dict, 'timeseries')['base_type'] = 'string'
+        result = validate._CheckPayload(data_dict)
+        self.assertEqual(result.valid(), False)
+
+        # Test with bad data ('data' value is non numeric)
+        data_dict = copy.deepcopy(self.data)
+        self._label(data_dict, 'timeseries')['data'][0][1] = 'string'
+        result = validate._CheckPayload(data_dict)
+        self.assertEqual(result.valid(), False)
+
+        # Test with bad data (not enough values in a datapoint)
+        data_dict = copy.deepcopy(self.data)
+        self._label(data_dict, 'timeseries')['data'][0].pop()
+        result = validate._CheckPayload(data_dict)
+        self.assertEqual(result.valid(), False)
+
+    def test__payload_error(self):
+        """Testing function _payload_error."""
+        # Test with good data
+        data_dict = copy.deepcopy(self.data)
+        self.assertEqual(self._error(data_dict), None)
+
+        # Test with value that is not a dict
+        self.assertEqual(self._error('string'), 1121)
+
+        # Test with missing main keys, or main keys of the wrong type
+        for key, value in [
+                ('timestamp', 'string'), ('id_agent', 0), ('agent', 0),
+                ('devicename', 0)]:
+            data_dict = copy.deepcopy(self.data)
+            data_dict[key] = value
+            self.assertEqual(self._error(data_dict), 1000)
+            data_dict.pop(key, None)
+            self.assertEqual(self._error(data_dict), 1000)
+
+        # Test with bad data (no time keys)
+        data_dict = copy.deepcopy(self.data)
+        data_dict.pop('timefixed', None)
+        data_dict.pop('timeseries', None)
+        self.assertEqual(self._error(data_dict), 1003)
+
+        # Test with bad data (data types that aren't dicts)
+        for data_type in ['timeseries', 'timefixed']:
+            data_dict = copy.deepcopy(self.data)
+            data_dict[data_type] = []
+            self.assertEqual(self._error(data_dict), 1165)
+
+        # Test with bad data (no keys under agent_label)
+        for key in ['base_type', 'description', 'data']:
+            data_dict = copy.deepcopy(self.data)
+            self._label(data_dict, 'timeseries').pop(key, None)
+            self.assertEqual(self._error(data_dict), 1115)
+
+        # Test with bad data (agent_label that isn't a dict)
+        data_dict = copy.deepcopy(self.data)
+        data_dict['timefixed']['bogus'] = 'string'
+        self.assertEqual(self._error(data_dict), 1115)
+
+        # Test with bad data (base_type is non-numeric string)
+        data_dict = copy.deepcopy(self.data)
+        self._label(data_dict, 'timeseries')['base_type'] = 'string'
+        self.assertEqual(self._error(data_dict), 1120)
+
+        # Test with bad data ('data' value is non numeric)
+        data_dict = copy.deepcopy(self.data)
+        self._label(data_dict, 'timeseries')['data'][0][1] = 'string'
+        self.assertEqual(self._error(data_dict), 1119)
+
+        # Test with bad data (datapoints without three values)
+        for data_type in ['timeseries', 'timefixed']:
+            for datapoint in [[1, 2], [1, 2, 3, 4], None]:
+                data_dict = copy.deepcopy(self.data)
+                self._label(data_dict, data_type)['data'].append(datapoint)
+                self.assertEqual(self._error(data_dict), 1114)
+
+        # Test with good data ('data' value of timefixed is non numeric)
+        data_dict = copy.deepcopy(self.data)
+        self._label(data_dict, 'timefixed')['data'][0][1] = 'string'
+        self.assertEqual(self._error(data_dict), None)
+
+    def test__payload_error_columnar(self):
+        """Testing function _payload_error with columnar data."""
+        # Test with good data
+        data_dict = payload.columnar(self.data)
+        self.assertEqual(self._error(data_dict), None)
+
+        # Test with an unsupported version
+        data_dict = payload.columnar(self.data)
+        data_dict['version'] = 3
+        self.assertEqual(self._error(data_dict), 1189)
+
+        # Test with bad data (sources aren't a list)
+        data_dict = payload.columnar(self.data)
+        data_dict['sources'] = None
+        self.assertEqual(self._error(data_dict), 1190)
+
+        # Test with bad data (no keys under agent_label)
+        for key in ['base_type', 'description', 'index', 'value', 'source']:
+            data_dict = payload.columnar(self.data)
+            self._label(data_dict, 'timeseries').pop(key, None)
+            self.assertEqual(self._error(data_dict), 1115)
+
+        # Test with bad data (value is non numeric)
+        data_dict = payload.columnar(self.data)
+        self._label(data_dict, 'timeseries')['value'][0] = '1'
+        self.assertEqual(self._error(data_dict), 1119)
+
+        # Test with bad data (lists of different lengths)
+        for key in ['index', 'value', 'source']:
+            data_dict = payload.columnar(self.data)
+            self._label(data_dict, 'timefixed')[key].append(0)
+            self.assertEqual(self._error(data_dict), 1114)
+
+        # Test with bad data (sources that aren't in the list of sources)
+        for position in [0, -1, 100, '0', None]:
+            data_dict = payload.columnar(self.data)
+            label_dict = self._label(data_dict, 'timefixed')
+            label_dict['index'].append(1)
+            label_dict['value'].append('string')
+            label_dict['source'].append(position)
+            expected = 1114
+            if position == 0:
+                expected = None
+            self.assertEqual(self._error(data_dict), expected)
+
+        # Test with bad data (lists that aren't lists)
+        data_dict = payload.columnar(self.data)
+        self._label(data_dict, 'timeseries')['index'] = None
+        self.assertEqual(self._error(data_dict), 1114)
+
+
+if __name__ == '__main__':
+    # Test the environment variables
+    unittest_setup.ready()
+
+    # Do the unit test
+    unittest.main()
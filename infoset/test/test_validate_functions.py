@@ -89,6 +89,17 @@ class TestGeneral(unittest.TestCase):
         result = validate._valid_filename(filename)
         self.assertEqual(result, True)
 
+    def test_payload_ok(self):
+        """Testing function payload_ok."""
+        # Test with good data
+        data = unittest_setup.TestVariables().cache_data()
+        self.assertEqual(validate.payload_ok(data), True)
+
+        # Test with bad data
+        data.pop('timestamp', None)
+        self.assertEqual(validate.payload_ok(data), False)
+        self.assertEqual(validate.payload_ok('string'), False)
+
     def test__read_data_from_file(self):
         """Testing function _read_data_from_file."""
         # Create filename
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""Test the ValidateBatch class in the infoset.cache.validate module."""
+
+# Standard imports
+import unittest
+import copy
+import os
+import sys
+
+# Try to create a working PYTHONPATH
+_TEST_DIRECTORY = os.path.dirname(os.path.realpath(__file__))
+_LIB_DIRECTORY = os.path.abspath(os.path.join(_TEST_DIRECTORY, os.pardir))
+_ROOT_DIRECTORY = os.path.abspath(os.path.join(_LIB_DIRECTORY, os.pardir))
+if _TEST_DIRECTORY.endswith('/infoset/test') is True:
+    sys.path.append(_ROOT_DIRECTORY)
+else:
+    print(
+        'This script is not installed in the "infoset-ng/bin" directory. '
+        'Please fix.')
+    sys.exit(2)
+
+# Infoset imports
+from infoset.cache import validate
+from infoset.test import unittest_setup_db
+from infoset.test import unittest_setup
+
+
+class TestValidateBatch(unittest.TestCase):
+    """Checks all functions and methods."""
+
+    # Initialize key variables
+    data = unittest_setup.TestVariables().cache_data()
+
+    def _data(self, database, offset):
+        """Create data for the device / agent in the database."""
+        data_dict = copy.deepcopy(self.data)
+        data_dict['timestamp'] = database.timestamp() + offset
+        data_dict['devicename'] = database.devicename()
+        data_dict['agent'] = database.agent()
+        data_dict['id_agent'] = database.id_agent()
+        return data_dict
+
+    def test_getinfo(self):
+        """Testing function getinfo."""
+        # Drop the database and create tables
+        database = unittest_setup_db.TestData()
+        batch = validate.ValidateBatch()
+
+        # Data already in the database is a duplicate
+        self.assertEqual(batch.getinfo(data=self._data(database, 0)), False)
+
+        # Newer data is valid, but only once
+        data_dict = self._data(database, 300)
+        self.assertEqual(batch.getinfo(data=data_dict), data_dict)
+        self.assertEqual(batch.getinfo(data=data_dict), False)
+
+        # Data out of order is valid if it isn't in the database
+        data_dict = self._data(database, 600)
+        self.assertEqual(batch.getinfo(data=data_dict), data_dict)
+        data_dict = self._data(database, 150)
+        self.assertEqual(batch.getinfo(data=data_dict), data_dict)
+
+        # Invalid data
+        self.assertEqual(batch.getinfo(data='string'), False)
+
+        # Data for a new device / agent is valid
+        self.assertEqual(batch.getinfo(data=self.data), self.data)
+
+    def test_lookups(self):
+        """Testing function lookups."""
+        # Drop the database and create tables
+        database = unittest_setup_db.TestData()
+        batch = validate.ValidateBatch()
+
+        # The database is only queried once per device / agent
+        for offset in range(300, 3000, 300):
+            batch.getinfo(data=self._data(database, offset))
+        self.assertEqual(batch.lookups(), 1)
+        batch.getinfo(data=self.data)
+        self.assertEqual(batch.lookups(), 2)
+
+
+if __name__ == '__main__':
+    # Test the environment variables
+    unittest_setup.ready()
+
+    # Do the unit test
+    unittest.main()
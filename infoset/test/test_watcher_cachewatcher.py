@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""Test the CacheWatcher class in the infoset.cache.watcher module."""
+
+import unittest
+import tempfile
+import shutil
+import os
+import sys
+
+# Try to create a working PYTHONPATH
+_TEST_DIRECTORY = os.path.dirname(os.path.realpath(__file__))
+_LIB_DIRECTORY = os.path.abspath(os.path.join(_TEST_DIRECTORY, os.pardir))
+_ROOT_DIRECTORY = os.path.abspath(os.path.join(_LIB_DIRECTORY, os.pardir))
+if _TEST_DIRECTORY.endswith('/infoset/test') is True:
+    sys.path.append(_ROOT_DIRECTORY)
+else:
+    print(
+        'This script is not installed in the "infoset-ng/bin" directory. '
+        'Please fix.')
+    sys.exit(2)
+
+# Import infoset stuff
+from infoset.cache import watcher
+from infoset.test import unittest_setup
+
+
+class TestCacheWatcher(unittest.TestCase):
+    """Checks all functions and methods."""
+
+    #########################################################################
+    # General object setup
+    #########################################################################
+
+    def setUp(self):
+        """Create a cache directory."""
+        self.cache_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        """Delete the cache directory."""
+        shutil.rmtree(self.cache_dir)
+
+    def _create(self, filename, directory=None):
+        """Create a cache file."""
+        if directory is None:
+            directory = self.cache_dir
+        filepath = os.path.join(directory, filename)
+        with open(filepath, 'w') as f_handle:
+            f_handle.write('{}')
+        return filepath
+
+    def test_rescan(self):
+        """Testing method rescan."""
+        # Files found by scanning are only ready once they are old enough
+        self._create('2_abc_123.json')
+        self._create('1_abc_123.json')
+        self._create('bogus.json')
+        cache_watcher = watcher.CacheWatcher(self.cache_dir)
+        self.assertEqual(len(cache_watcher), 0)
+        cache_watcher.close()
+
+        cache_watcher = watcher.CacheWatcher(self.cache_dir, age=0)
+        self.assertEqual(len(cache_watcher), 2)
+        cache_watcher.close()
+
+    def test_poll(self):
+        """Testing method poll."""
+        # Files are ready as soon as they are written
+        cache_watcher = watcher.CacheWatcher(self.cache_dir)
+        self.assertEqual(cache_watcher.poll(), 0)
+        filepath = self._create('1_abc_123.json')
+        self._create('bogus.json')
+        self.assertEqual(cache_watcher.poll(), 1)
+
+        # Files renamed into the directory are ready
+        staging = tempfile.mkdtemp(dir=self.cache_dir)
+        os.rename(
+            self._create('2_abc_123.json', directory=staging),
+            os.path.join(self.cache_dir, '2_abc_123.json'))
+        self.assertEqual(cache_watcher.poll(), 2)
+
+        # Deleted files are removed
+        os.remove(filepath)
+        self.assertEqual(cache_watcher.poll(), 1)
+        cache_watcher.close()
+
+    def test_wait(self):
+        """Testing method wait."""
+        # Nothing new happens
+        cache_watcher = watcher.CacheWatcher(self.cache_dir)
+        self.assertEqual(cache_watcher.wait(0.1), 0)
+
+        # Existing ready files don't end the wait
+        self._create('1_abc_123.json')
+        self.assertEqual(cache_watcher.wait(0.1), 1)
+        self.assertEqual(cache_watcher.wait(0.1), 1)
+        cache_watcher.close()
+
+    def test_metadata(self):
+        """Testing method metadata."""
+        # Files are grouped by devicehash and id_agent in timestamp order
+        cache_watcher = watcher.CacheWatcher(self.cache_dir)
+        self._create('3_abc_123.json')
+        self._create('1_abc_123.json')
+        self._create('2_def_123.json')
+        result = cache_watcher.metadata()
+        self.assertEqual(sorted(result['123'].keys()), ['abc', 'def'])
+        self.assertEqual(
+            [item['timestamp'] for item in result['123']['abc']], [1, 3])
+        self.assertEqual(
+            result['123']['def'][0]['filepath'],
+            os.path.join(self.cache_dir, '2_def_123.json'))
+        cache_watcher.close()
+
+    def test_parse_filename(self):
+        """Testing function parse_filename."""
+        self.assertEqual(
+            watcher.parse_filename('1_abc_123.json'), (1, 'abc', '123'))
+        self.assertEqual(
+            watcher.parse_filename('1_abc_123.seg'), (1, 'abc', '123'))
+        self.assertEqual(watcher.parse_filename('1_abc_123.json.tmp'), None)
+        self.assertEqual(watcher.parse_filename('abc_abc_123.json'), None)
+
+
+if __name__ == '__main__':
+    # Test the environment variables
+    unittest_setup.ready()
+
+    # Do the unit test
+    unittest.main()
@@ -31,6 +31,7 @@ from infoset.db import URL, TEST_ENGINE
 from infoset.db import db
 from infoset.db import db_agent
 from infoset.db import db_device
+from infoset.db import db_identity
 from infoset.db import db_deviceagent as hagent
 
 
@@ -400,6 +401,9 @@ def initialize_db():
     setup_database.create()
     setup_database.create_tables()
 
+    # Cached identities are no longer valid
+    db_identity.identity_map().clear()
+
 
 def _timestamps():
     """Create a list of timestamps staring starting 30 minutes ago.
@@ -0,0 +1,351 @@
+#!/usr/bin/env python3
+"""Aggregation of agent data sampled more often than the interval.
+
+Agents may poll devices several times per interval. The samples of each
+interval are summarized, and only the summary is posted, once the first
+sample of the next interval arrives:
+
+    Gauges (base_type 1): The average of the samples
+    Counters (base_type 32 and 64): The last sample
+    Timefixed data: The last sample
+
+Optional statistic labels, named "<label>_<statistic>", add the "min",
+"max", "avg" and "last" of the samples of gauges, and the "min", "max" and
+"avg" per second rates of counters between samples. They are posted as
+gauges.
+
+"""
+
+# Standard libraries
+import threading
+import time
+
+# Infoset libraries
+from infoset.utils import payload
+
+# Statistics that may be added as agent labels
+STATISTICS = ['min', 'max', 'avg', 'last']
+
+# Aggregators of this process, so that they outlive agent objects
+_AGGREGATORS = {}
+_AGGREGATORS_LOCK = threading.Lock()
+
+
+class Aggregator(object):
+    """Summarize the samples of a device for each interval.
+
+    Args:
+        None
+
+    Returns:
+        None
+
+    Methods:
+
+    """
+
+    def __init__(self, statistics=None):
+        """Function for intializing the class.
+
+        Args:
+            statistics: List of STATISTICS to add as agent labels
+
+        Returns:
+            None
+
+        """
+        # Initialize key variables
+        self.statistics = []
+        if statistics is not None:
+            self.statistics = statistics
+        self.timestamp = None
+        self._main = {}
+        self._version = 1
+        self._labels = {}
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def add(self, data, now=None):
+        """Add a sample.
+
+        Args:
+            data: Agent data of the sample. Its timestamp is that of the
+                interval
+            now: Time of the sample in seconds. The current time if None
+
+        Returns:
+            result: Summary of the previous interval if the sample is the
+                first of a new one, otherwise None
+
+        """
+        # Initialize key variables
+        result = None
+        if now is None:
+            now = time.time()
+
+        with self._lock:
+            # Summarize the previous interval
+            if self.timestamp is not None and (
+                    data['timestamp'] != self.timestamp):
+                result = self._summary()
+                self._labels = {}
+
+            # Add the datapoints
+            self.timestamp = data['timestamp']
+            self._version = payload.version(data)
+            self._main = {
+                key: value for (key, value) in data.items()
+                if key not in [
+                    'version', 'sources', 'timeseries', 'timefixed']}
+            for data_type in ['timeseries', 'timefixed']:
+                for label, label_dict in data.get(data_type, {}).items():
+                    self._add(data_type, label, data, label_dict, now)
+
+        # Return
+        return result
+
+    def _add(self, data_type, label, data, label_dict, now):
+        """Add the datapoints of an agent label.
+
+        Args:
+            data_type: "timeseries" or "timefixed"
+            label: Agent label
+            data: Agent data of the sample
+            label_dict: Dict of the agent label
+            now: Time of the sample in seconds
+
+        Returns:
+            None
+
+        """
+        # Initialize key variables
+        base_type = label_dict['base_type']
+        key = (data_type, label)
+        datapoints = {}
+        if key in self._labels:
+            datapoints = self._labels[key][2]
+        self._labels[key] = (
+            base_type, label_dict['description'], datapoints)
+
+        for (index, value, source) in payload.datapoints(data, label_dict):
+            try:
+                datapoint = datapoints.get(index)
+            except TypeError:
+                continue
+            if datapoint is None:
+                datapoint = _Datapoint()
+                datapoints[index] = datapoint
+
+            # Get the rate of counters since the previous sample
+            rate = None
+            if base_type in [32, 64]:
+                rate = self._rate(label, index, value, base_type, now)
+            datapoint.add(value, source, rate)
+
+    def _rate(self, label, index, value, base_type, now):
+        """Get the per second rate of a counter since its previous sample.
+
+        Args:
+            label: Agent label
+            index: Index of the datapoint
+            value: Value of the counter
+            base_type: 32 or 64
+            now: Time of the sample in seconds
+
+        Returns:
+            rate: Rate. None if there is no previous sample
+
+        """
+        # Initialize key variables
+        rate = None
+        key = (label, index)
+        previous = self._counters.get(key)
+        try:
+            value = float(value)
+        except (TypeError, ValueError):
+            self._counters.pop(key, None)
+            return None
+        self._counters[key] = (value, now)
+
+        # Allow for counters that wrapped
+        if previous is not None and now > previous[1]:
+            delta = value - previous[0]
+            if delta < 0:
+                delta += 2 ** base_type
+            rate = delta / (now - previous[1])
+
+        # Return
+        return rate
+
+    def _summary(self):
+        """Summarize the current interval.
+
+        Args:
+            None
+
+        Returns:
+            result: Agent data
+
+        """
+        # Initialize key variables
+        builder = payload.Payload()
+        main = dict(self._main)
+        main['timestamp'] = self.timestamp
+
+        for (data_type, label), (base_type, description, datapoints) in (
+                sorted(self._labels.items())):
+            # Add the summary of each datapoint
+            columns = builder.label(
+                label, base_type, description, data_type=data_type)
+            for index, datapoint in datapoints.items():
+                value = datapoint.last
+                if base_type == 1 and datapoint.numeric is True:
+                    value = datapoint.total / datapoint.count
+                builder.append(columns, index, value, datapoint.source)
+
+            # Add statistic labels
+            if data_type != 'timeseries':
+                continue
+            for statistic in self.statistics:
+                values = [
+                    (index, datapoint.statistic(statistic, base_type),
+                     datapoint.source)
+                    for index, datapoint in datapoints.items()]
+                values = [_ for _ in values if _[1] is not None]
+                if bool(values) is False:
+                    continue
+                columns = builder.label(
+                    '%s_%s' % (label, statistic), 1,
+                    '%s (%s)' % (description, statistic))
+                for datapoint in values:
+                    builder.append(columns, *datapoint)
+
+        # Return
+        result = builder.data(main, self._version)
+        return result
+
+
+class _Datapoint(object):
+    """Streaming statistics of the samples of a datapoint.
+
+    Args:
+        None
+
+    Returns:
+        None
+
+    Methods:
+
+    """
+
+    __slots__ = (
+        'source', 'last', 'count', 'total', 'minimum', 'maximum', 'numeric',
+        'rates')
+
+    def __init__(self):
+        """Function for intializing the class.
+
+        Args:
+            None
+
+        Returns:
+            None
+
+        """
+        # Initialize key variables
+        self.source = None
+        self.last = None
+        self.count = 0
+        self.total = 0
+        self.minimum = None
+        self.maximum = None
+        self.numeric = True
+        self.rates = None
+
+    def add(self, value, source, rate=None):
+        """Add a sample.
+
+        Args:
+            value: Value of the sample
+            source: Source of the sample
+            rate: Per second rate of counters since their previous sample
+
+        Returns:
+            None
+
+        """
+        # Keep the latest
+        self.source = source
+        self.last = value
+
+        # Keep rates of counters, and values of gauges
+        if rate is not None:
+            if self.rates is None:
+                self.rates = _Datapoint()
+            self.rates.add(rate, source)
+        if self.numeric is False:
+            return
+        try:
+            value = float(value)
+        except (TypeError, ValueError):
+            self.numeric = False
+            return
+        self.count += 1
+        self.total += value
+        if self.minimum is None or value < self.minimum:
+            self.minimum = value
+        if self.maximum is None or value > self.maximum:
+            self.maximum = value
+
+    def statistic(self, statistic, base_type):
+        """Get a statistic of the samples.
+
+        Args:
+            statistic: Name of the statistic in STATISTICS
+            base_type: base_type of the datapoint
+
+        Returns:
+            value: Value. None if there is none
+
+        """
+        # Use the rates of counters
+        source = self
+        if base_type in [32, 64]:
+            source = self.rates
+            if statistic == 'last':
+                return None
+        if source is None or source.numeric is False or (
+                source.count == 0):
+            return None
+
+        # Return
+        if statistic == 'min':
+            value = source.minimum
+        elif statistic == 'max':
+            value = source.maximum
+        elif statistic == 'avg':
+            value = source.total / source.count
+        else:
+            value = float(source.last)
+        return value
+
+
+def aggregator(id_agent, devicename, statistics=None):
+    """Get the Aggregator of a device.
+
+    Args:
+        id_agent: Identifier of the agent
+        devicename: Devicename
+        statistics: List of STATISTICS to add as agent labels
+
+    Returns:
+        result: Aggregator object
+
+    """
+    # Return
+    key = (id_agent, devicename)
+    with _AGGREGATORS_LOCK:
+        if key not in _AGGREGATORS:
+            _AGGREGATORS[key] = Aggregator(statistics)
+        result = _AGGREGATORS[key]
+    return result
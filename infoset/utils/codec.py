@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""Codecs for agent data held in Redis.
+
+Encoded data starts with a one byte tag identifying how it was encoded.
+Data can therefore always be decoded, whatever codec is configured.
+
+"""
+
+# Standard libraries
+import json
+import zlib
+
+# PIP libraries
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+# Infoset libraries
+from infoset.utils import log
+
+# Tags
+_JSON = b'j'
+_MSGPACK = b'm'
+_ZLIB = b'z'
+
+# Content types of posted msgpack data
+MSGPACK_TYPES = ['application/msgpack', 'application/x-msgpack']
+
+
+class Codec(object):
+    """Encode agent data for storage in Redis.
+
+    Codecs:
+
+    json: JSON
+    msgpack: msgpack. Requires the msgpack package
+    zlib: zlib compressed data
+
+    Args:
+        None
+
+    Returns:
+        None
+
+    Methods:
+
+    """
+
+    def __init__(self, name='json'):
+        """Function for intializing the class.
+
+        Args:
+            name: Name of codec
+
+        Returns:
+            None
+
+        """
+        # Initialize key variables
+        self.name = name
+
+        # Fall back to JSON if the codec can't be used
+        if name not in ['json', 'msgpack', 'zlib']:
+            log_message = (
+                'Unknown Redis codec "%s". Using "json".') % (name)
+            log.log2warning(1166, log_message)
+            self.name = 'json'
+        elif name == 'msgpack' and msgpack is None:
+            log_message = (
+                'The msgpack package is not installed. Using the "json" '
+                'Redis codec.')
+            log.log2warning(1167, log_message)
+            self.name = 'json'
+
+    def encode(self, data):
+        """Encode data.
+
+        Args:
+            data: Data dict
+
+        Returns:
+            value: Encoded data
+
+        """
+        # Encode
+        if self.name == 'msgpack':
+            value = _MSGPACK + msgpack.packb(data, use_bin_type=True)
+        else:
+            value = _JSON + json.dumps(data).encode()
+
+        # Return
+        value = self._compress(value)
+        return value
+
+    def encode_body(self, body, content_type=None):
+        """Encode the body of a POST without decoding it.
+
+        JSON bodies stay JSON, even with the msgpack codec, as converting
+        them would require decoding them first.
+
+        Args:
+            body: Body of POST
+            content_type: Content type of the body
+
+        Returns:
+            value: Encoded data
+
+        """
+        # Encode
+        if content_type in MSGPACK_TYPES:
+            value = _MSGPACK + body
+        else:
+            value = _JSON + body
+
+        # Return
+        value = self._compress(value)
+        return value
+
+    def _compress(self, value):
+        """Compress encoded data if required by the codec.
+
+        Args:
+            value: Encoded data
+
+        Returns:
+            value: Encoded data
+
+        """
+        # Compress
+        if self.name == 'zlib':
+            value = _ZLIB + zlib.compress(value)
+        return value
+
+
+def decode(value):
+    """Decode agent data.
+
+    Args:
+        value: Data encoded by a Codec. Untagged JSON is also accepted.
+
+    Returns:
+        data: Data dict
+
+    """
+    # Initialize key variables
+    if isinstance(value, str) is True:
+        value = value.encode()
+    tag = value[:1]
+
+    # Decode
+    try:
+        if tag == _ZLIB:
+            data = decode(zlib.decompress(value[1:]))
+        elif tag == _JSON:
+            data = json.loads(value[1:].decode())
+        elif tag == _MSGPACK:
+            if msgpack is None:
+                raise ValueError('The msgpack package is not installed')
+            data = msgpack.unpackb(value[1:], raw=False)
+        else:
+            data = json.loads(value.decode())
+    except (ValueError, zlib.error) as exception_error:
+        raise ValueError(
+            ('Unable to decode agent data: %s') % (exception_error))
+
+    # Return
+    return data
+
+
+def codec(config):
+    """Create a Codec from the configuration.
+
+    Args:
+        config: Configuration object
+
+    Returns:
+        result: Codec object
+
+    """
+    # Return
+    result = Codec(config.redis_codec())
+    return result
@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""Compression of agent data posted to the API and cached by agents.
+
+Encodings use the names of the HTTP Content-Encoding header. zstd requires
+the zstandard package.
+
+"""
+
+# Standard libraries
+import os
+import gzip
+import json
+import zlib
+import tempfile
+
+# PIP libraries
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Infoset libraries
+from infoset.utils import log
+
+# Suffixes of compressed agent cache files
+SUFFIXES = {'gzip': '.gz', 'zstd': '.zst'}
+
+# Number of bytes decompressed at a time
+_CHUNK = 65536
+
+
+def encodings():
+    """Get the encodings that can be decompressed.
+
+    Args:
+        None
+
+    Returns:
+        result: List of encodings
+
+    """
+    # Return
+    result = ['identity', 'gzip']
+    if zstandard is not None:
+        result.append('zstd')
+    return result
+
+
+def content_encoding(name):
+    """Get the encoding to use for a configured compression.
+
+    Args:
+        name: Configured compression. "none", "gzip" or "zstd"
+
+    Returns:
+        result: Encoding
+
+    """
+    # Get result
+    if name == 'zstd' and zstandard is None:
+        log_message = (
+            'The zstandard package is not installed. Using gzip compression.')
+        log.log2warning(1182, log_message)
+        result = 'gzip'
+    elif name in SUFFIXES:
+        result = name
+    else:
+        result = 'identity'
+    return result
+
+
+def compress(body, encoding):
+    """Compress data.
+
+    Args:
+        body: Data bytes
+        encoding: Encoding
+
+    Returns:
+        result: Compressed data bytes
+
+    """
+    # Compress
+    if encoding == 'gzip':
+        result = gzip.compress(body, compresslevel=6)
+    elif encoding == 'zstd':
+        result = zstandard.ZstdCompressor(level=3).compress(body)
+    else:
+        result = body
+    return result
+
+
+def decompress(stream, encoding, limit):
+    """Read and decompress data a chunk at a time.
+
+    Reading stops as soon as more than limit bytes have been decompressed,
+    so that small bodies that decompress to huge ones can't exhaust memory.
+
+    Args:
+        stream: File-like object with the compressed data
+        encoding: Encoding
+        limit: Maximum number of decompressed bytes
+
+    Returns:
+        result: Decompressed data bytes, None if larger than limit
+
+    """
+    # Initialize key variables
+    chunks = []
+    size = 0
+    errors = (OSError, EOFError, zlib.error)
+    if zstandard is not None:
+        errors += (zstandard.ZstdError,)
+
+    # Read
+    try:
+        source = _reader(stream, encoding)
+        while True:
+            chunk = source.read(min(_CHUNK, limit + 1 - size))
+            if bool(chunk) is False:
+                break
+            size += len(chunk)
+            if size > limit:
+                return None
+            chunks.append(chunk)
+    except errors as exception_error:
+        raise ValueError(
+            ('Unable to decompress %s data: %s') % (encoding, exception_error))
+
+    # Return
+    result = b''.join(chunks)
+    return result
+
+
+def write_json(filepath, data, encoding):
+    """Write data to an agent cache file, compressing it if required.
+
+    Args:
+        filepath: Name of file, without the suffix of the encoding
+        data: Data dict
+        encoding: Encoding
+
+    Returns:
+        filepath: Name of the file written
+
+    """
+    # Initialize key variables
+    filepath = ('%s%s') % (filepath, SUFFIXES.get(encoding, ''))
+    body = compress(json.dumps(data).encode(), encoding)
+
+    # Write the file atomically so it is never read in part
+    (f_descriptor, tmp_filepath) = tempfile.mkstemp(
+        dir=os.path.dirname(filepath) or '.', prefix='.', suffix='.tmp')
+    with os.fdopen(f_descriptor, 'wb') as f_handle:
+        f_handle.write(body)
+    os.rename(tmp_filepath, filepath)
+
+    # Return
+    return filepath
+
+
+def read_json(filepath):
+    """Read data from an agent cache file, decompressing it if required.
+
+    Args:
+        filepath: Name of file
+
+    Returns:
+        data: Data dict
+
+    """
+    # Read
+    with open(filepath, 'rb') as f_handle:
+        body = _reader(f_handle, _file_encoding(filepath)).read()
+
+    # Return
+    data = json.loads(body.decode())
+    return data
+
+
+def uncompressed_name(filename):
+    """Remove the suffix of the encoding from the name of a cache file.
+
+    Args:
+        filename: Name of file
+
+    Returns:
+        result: Name of file
+
+    """
+    # Return
+    result = filename
+    for suffix in SUFFIXES.values():
+        if filename.endswith(suffix) is True:
+            result = filename[:-len(suffix)]
+    return result
+
+
+def _file_encoding(filepath):
+    """Get the encoding of an agent cache file from its suffix.
+
+    Args:
+        filepath: Name of file
+
+    Returns:
+        result: Encoding
+
+    """
+    # Return
+    result = 'identity'
+    for (name, suffix) in SUFFIXES.items():
+        if filepath.endswith(suffix) is True:
+            result = name
+    return result
+
+
+def _reader(stream, encoding):
+    """Wrap a file-like object to decompress its data when read.
+
+    Args:
+        stream: File-like object
+        encoding: Encoding
+
+    Returns:
+        result: File-like object
+
+    """
+    # Return
+    if encoding == 'gzip':
+        result = gzip.GzipFile(fileobj=stream, mode='rb')
+    elif encoding == 'zstd':
+        result = zstandard.ZstdDecompressor().stream_reader(stream)
+    else:
+        result = stream
+    return result
@@ -6,6 +6,7 @@ import os
 
 # Import project libraries
 from infoset.utils import general
+from infoset.utils import aggregate
 from infoset.utils import log
 
 
@@ -75,6 +76,81 @@ class Config(object):
         # Return
         return value
 
+    def db_busy_timeout(self):
+        """Get db_busy_timeout.
+
+        The number of seconds database connections wait for others to
+        unlock the SQLite database before failing.
+
+        Args:
+            None
+
+        Returns:
+            result: result
+
+        """
+        # Get result
+        key = 'main'
+        sub_key = 'db_busy_timeout'
+        intermediate = _key_sub_key(key, sub_key, self.config_dict, die=False)
+
+        # Default to 5
+        if intermediate is None:
+            result = 5.0
+        else:
+            result = max(0.0, float(intermediate))
+        return result
+
+    def db_busy_retries(self):
+        """Get db_busy_retries.
+
+        The number of times the ingester retries writing data while the
+        SQLite database stays busy for db_busy_timeout seconds.
+
+        Args:
+            None
+
+        Returns:
+            result: result
+
+        """
+        # Get result
+        key = 'main'
+        sub_key = 'db_busy_retries'
+        intermediate = _key_sub_key(key, sub_key, self.config_dict, die=False)
+
+        # Default to 4
+        if intermediate is None:
+            result = 4
+        else:
+            result = max(0, int(intermediate))
+        return result
+
+    def db_busy_delay(self):
+        """Get db_busy_delay.
+
+        The number of seconds the ingester waits before the first retry
+        while the database is busy. The delay doubles with each retry.
+
+        Args:
+            None
+
+        Returns:
+            result: result
+
+        """
+        # Get result
+        key = 'main'
+        sub_key = 'db_busy_delay'
+        intermediate = _key_sub_key(key, sub_key, self.config_dict, die=False)
+
+        # Default to 0.5
+        if intermediate is None:
+            result = 0.5
+        else:
+            result = max(0.0, float(intermediate))
+        return result
+
     def ingest_cache_directory(self):
         """Determine the ingest_cache_directory.
 
@@ -122,6 +198,46 @@ class Config(object):
         # Return
         return value
 
+    def ingest_status_directory(self):
+        """Determine the ingest_status_directory.
+
+        Args:
+            None
+
+        Returns:
+            value: configured ingest_status_directory
+
+        """
+        # Get parameter
+        value = ('%s/status') % (self.ingest_cache_directory())
+
+        # Check if value exists
+        if os.path.exists(value) is False:
+            os.makedirs(value, mode=0o755)
+
+        # Return
+        return value
+
+    def ingest_lease_directory(self):
+        """Determine the ingest_lease_directory.
+
+        Args:
+            None
+
+        Returns:
+            value: configured ingest_lease_directory
+
+        """
+        # Get parameter
+        value = ('%s/leases') % (self.ingest_cache_directory())
+
+        # Check if value exists
+        if os.path.exists(value) is False:
+            os.makedirs(value, mode=0o755)
+
+        # Return
+        return value
+
     def db_name(self):
         """Get db_name.
 
@@ -308,8 +424,11 @@ class Config(object):
             result = int(intermediate)
         return result
 
-    def sqlalchemy_pool_size(self):
-        """Get sqlalchemy_pool_size.
+    def ingest_cache_watcher(self):
+        """Get ingest_cache_watcher.
+
+        If True the ingester tracks new cache files using Linux inotify
+        events instead of scanning the ingest_cache_directory.
 
         Args:
             None
@@ -320,18 +439,196 @@ class Config(object):
         """
         # Get result
         key = 'main'
-        sub_key = 'sqlalchemy_pool_size'
+        sub_key = 'ingest_cache_watcher'
         intermediate = _key_sub_key(key, sub_key, self.config_dict, die=False)
 
-        # Set default
+        # Default to False
         if intermediate is None:
-            result = 10
+            result = False
+        else:
+            result = bool(intermediate)
+        return result
+
+    def ingest_single_writer(self):
+        """Get ingest_single_writer.
+
+        If True the ingester's processes only read and validate cache files,
+        and a single writer adds their data to the database.
+
+        Args:
+            None
+
+        Returns:
+            result: result
+
+        """
+        # Get result
+        key = 'main'
+        sub_key = 'ingest_single_writer'
+        intermediate = _key_sub_key(key, sub_key, self.config_dict, die=False)
+
+        # Default to True
+        if intermediate is None:
+            result = True
+        else:
+            result = bool(intermediate)
+        return result
+
+    def ingest_chunk_size(self):
+        """Get ingest_chunk_size.
+
+        The maximum number of an agent's cache files processed by an
+        ingest process before the files of other agents get a turn.
+
+        Args:
+            None
+
+        Returns:
+            result: result
+
+        """
+        # Get result
+        key = 'main'
+        sub_key = 'ingest_chunk_size'
+        intermediate = _key_sub_key(key, sub_key, self.config_dict, die=False)
+
+        # Default to 100
+        if intermediate is None:
+            result = 100
+        else:
+            result = max(1, int(intermediate))
+        return result
+
+    def ingest_flush_files(self):
+        """Get ingest_flush_files.
+
+        The maximum number of an agent's cache files read before their data
+        is written to the database and the files are deleted.
+
+        Args:
+            None
+
+        Returns:
+            result: result
+
+        """
+        # Get result
+        key = 'main'
+        sub_key = 'ingest_flush_files'
+        intermediate = _key_sub_key(key, sub_key, self.config_dict, die=False)
+
+        # Default to 50
+        if intermediate is None:
+            result = 50
+        else:
+            result = max(1, int(intermediate))
+        return result
+
+    def ingest_flush_datapoints(self):
+        """Get ingest_flush_datapoints.
+
+        The maximum number of datapoint values read from an agent's cache
+        files before they are written to the database.
+
+        Args:
+            None
+
+        Returns:
+            result: result
+
+        """
+        # Get result
+        key = 'main'
+        sub_key = 'ingest_flush_datapoints'
+        intermediate = _key_sub_key(key, sub_key, self.config_dict, die=False)
+
+        # Default to 100000
+        if intermediate is None:
+            result = 100000
+        else:
+            result = max(1, int(intermediate))
+        return result
+
+    def ingest_shards(self):
+        """Get ingest_shards.
+
+        The number of shards into which devices are split. Ingesters sharing
+        the ingest_cache_directory each process a share of the shards.
+
+        Args:
+            None
+
+        Returns:
+            result: result
+
+        """
+        # Get result
+        key = 'main'
+        sub_key = 'ingest_shards'
+        intermediate = _key_sub_key(key, sub_key, self.config_dict, die=False)
+
+        # Default to 1
+        if intermediate is None:
+            result = 1
+        else:
+            result = max(1, int(intermediate))
+        return result
+
+    def ingest_lease_timeout(self):
+        """Get ingest_lease_timeout.
+
+        The number of seconds without a heartbeat after which the shard
+        lease of an ingester is taken over by another.
+
+        Args:
+            None
+
+        Returns:
+            result: result
+
+        """
+        # Get result
+        key = 'main'
+        sub_key = 'ingest_lease_timeout'
+        intermediate = _key_sub_key(key, sub_key, self.config_dict, die=False)
+
+        # Default to 60
+        if intermediate is None:
+            result = 60
+        else:
+            result = max(1, int(intermediate))
+        return result
+
+    def ingest_batch_size(self):
+        """Get ingest_batch_size.
+
+        The maximum number of rows written to the database in a single
+        bulk INSERT statement.
+
+        Args:
+            None
+
+        Returns:
+            result: result
+
+        """
+        # Get result
+        key = 'main'
+        sub_key = 'ingest_batch_size'
+        intermediate = _key_sub_key(key, sub_key, self.config_dict, die=False)
+
+        # Default to 5000
+        if intermediate is None:
+            result = 5000
         else:
             result = int(intermediate)
         return result
 
-    def memcached_port(self):
-        """Get memcached_port.
+    def identity_cache_size(self):
+        """Get identity_cache_size.
+
+        The maximum number of agent, device and deviceagent identities
+        each process keeps in memory to avoid database lookups.
 
         Args:
             None
@@ -342,18 +639,21 @@ class Config(object):
         """
         # Get result
         key = 'main'
-        sub_key = 'memcached_port'
+        sub_key = 'identity_cache_size'
         intermediate = _key_sub_key(key, sub_key, self.config_dict, die=False)
 
-        # Set default
+        # Default to 10000
         if intermediate is None:
-            result = 11211
+            result = 10000
         else:
             result = int(intermediate)
         return result
 
-    def memcached_hostname(self):
-        """Get memcached_hostname.
+    def identity_cache_ttl(self):
+        """Get identity_cache_ttl.
+
+        The number of seconds each process keeps agent, device and
+        deviceagent identities in memory.
 
         Args:
             None
@@ -364,16 +664,21 @@ class Config(object):
         """
         # Get result
         key = 'main'
-        sub_key = 'memcached_hostname'
-        result = _key_sub_key(key, sub_key, self.config_dict, die=False)
+        sub_key = 'identity_cache_ttl'
+        intermediate = _key_sub_key(key, sub_key, self.config_dict, die=False)
 
-        # Default to localhost
-        if result is None:
-            result = 'localhost'
+        # Default to 3600
+        if intermediate is None:
+            result = 3600
+        else:
+            result = int(intermediate)
         return result
 
-    def redis_hostname(self):
-        """Get redis_hostname.
+    def datapoint_id_cache_size(self):
+        """Get datapoint_id_cache_size.
+
+        The maximum number of datapoint IDs each process keeps in memory
+        to avoid hashing the same datapoint data for every cache file.
 
         Args:
             None
@@ -384,16 +689,18 @@ class Config(object):
         """
         # Get result
         key = 'main'
-        sub_key = 'redis_hostname'
-        result = _key_sub_key(key, sub_key, self.config_dict, die=False)
+        sub_key = 'datapoint_id_cache_size'
+        intermediate = _key_sub_key(key, sub_key, self.config_dict, die=False)
 
-        # Default to localhost
-        if result is None:
-            result = 'localhost'
+        # Default to 100000
+        if intermediate is None:
+            result = 100000
+        else:
+            result = int(intermediate)
         return result
 
-    def redis_port(self):
-        """Get memcached_port.
+    def sqlalchemy_pool_size(self):
+        """Get sqlalchemy_pool_size.
 
         Args:
             None
@@ -404,18 +711,18 @@ class Config(object):
         """
         # Get result
         key = 'main'
-        sub_key = 'redis_port'
+        sub_key = 'sqlalchemy_pool_size'
         intermediate = _key_sub_key(key, sub_key, self.config_dict, die=False)
 
         # Set default
         if intermediate is None:
-            result = 6379
+            result = 10
         else:
             result = int(intermediate)
         return result
 
-    def redis_url(self):
-        """Get redis url.
+    def memcached_port(self):
+        """Get memcached_port.
 
         Args:
             None
@@ -424,8 +731,727 @@ class Config(object):
             result: result
 
         """
+        # Get result
+        key = 'main'
+        sub_key = 'memcached_port'
+        intermediate = _key_sub_key(key, sub_key, self.config_dict, die=False)
 
-        return ("redis://%s:%s/0") % (self.redis_hostname(), self.redis_port())
+        # Set default
+        if intermediate is None:
+            result = 11211
+        else:
+            result = int(intermediate)
+        return result
+
+    def memcached_hostname(self):
+        """Get memcached_hostname.
+
+        Args:
+            None
+
+        Returns:
+            result: result
+
+        """
+        # Get result
+        key = 'main'
+        sub_key = 'memcached_hostname'
+        result = _key_sub_key(key, sub_key, self.config_dict, die=False)
+
+        # Default to localhost
+        if result is None:
+            result = 'localhost'
+        return result
+
+    def redis_hostname(self):
+        """Get redis_hostname.
+
+        Args:
+            None
+
+        Returns:
+            result: result
+
+        """
+        # Get result
+        key = 'main'
+        sub_key = 'redis_hostname'
+        result = _key_sub_key(key, sub_key, self.config_dict, die=False)
+
+        # Default to localhost
+        if result is None:
+            result = 'localhost'
+        return result
+
+    def redis_port(self):
+        """Get memcached_port.
+
+        Args:
+            None
+
+        Returns:
+            result: result
+
+        """
+        # Get result
+        key = 'main'
+        sub_key = 'redis_port'
+        intermediate = _key_sub_key(key, sub_key, self.config_dict, die=False)
+
+        # Set default
+        if intermediate is None:
+            result = 6379
+        else:
+            result = int(intermediate)
+        return result
+
+    def redis_codec(self):
+        """Get redis_codec.
+
+        The codec used to encode agent data held in Redis.
+
+        Args:
+            None
+
+        Returns:
+            result: result
+
+        """
+        # Get result
+        key = 'main'
+        sub_key = 'redis_codec'
+        result = _key_sub_key(key, sub_key, self.config_dict, die=False)
+
+        # Default to json
+        if result is None:
+            result = 'json'
+        return result
+
+    def redis_url(self):
+        """Get redis url.
+
+        Args:
+            None
+
+        Returns:
+            result: result
+
+        """
+
+        return ("redis://%s:%s/0") % (self.redis_hostname(), self.redis_port())
+
+    def redis_post_ttl(self):
+        """Get redis_post_ttl.
+
+        The number of seconds agent posts are kept in Redis waiting to be
+        ingested.
+
+        Args:
+            None
+
+        Returns:
+            result: result
+
+        """
+        # Get result
+        key = 'main'
+        sub_key = 'redis_post_ttl'
+        intermediate = _key_sub_key(key, sub_key, self.config_dict, die=False)
+
+        # Default to a day
+        if intermediate is None:
+            result = 86400
+        else:
+            result = max(1, int(intermediate))
+        return result
+
+    def celery_batch_size(self):
+        """Get celery_batch_size.
+
+        The maximum number of agent posts ingested together by the
+        Celery worker.
+
+        Args:
+            None
+
+        Returns:
+            result: result
+
+        """
+        # Get result
+        key = 'main'
+        sub_key = 'celery_batch_size'
+        intermediate = _key_sub_key(key, sub_key, self.config_dict, die=False)
+
+        # Default to 500
+        if intermediate is None:
+            result = 500
+        else:
+            result = int(intermediate)
+        return result
+
+    def celery_batch_linger(self):
+        """Get celery_batch_linger.
+
+        The maximum number of seconds agent posts wait for others to be
+        ingested with.
+
+        Args:
+            None
+
+        Returns:
+            result: result
+
+        """
+        # Get result
+        key = 'main'
+        sub_key = 'celery_batch_linger'
+        intermediate = _key_sub_key(key, sub_key, self.config_dict, die=False)
+
+        # Default to 1 second
+        if intermediate is None:
+            result = 1.0
+        else:
+            result = float(intermediate)
+        return result
+
+    def ingest_stream(self):
+        """Get ingest_stream.
+
+        If True agent posts are queued in a Redis stream read by the
+        ingester, instead of being ingested by Celery tasks.
+
+        Args:
+            None
+
+        Returns:
+            result: result
+
+        """
+        # Get result
+        key = 'main'
+        sub_key = 'ingest_stream'
+        intermediate = _key_sub_key(key, sub_key, self.config_dict, die=False)
+
+        # Default to False
+        if intermediate is None:
+            result = False
+        else:
+            result = bool(intermediate)
+        return result
+
+    def ingest_stream_maxlen(self):
+        """Get ingest_stream_maxlen.
+
+        The approximate maximum number of agent posts kept in the ingest
+        stream. The oldest posts are discarded when it is full.
+
+        Args:
+            None
+
+        Returns:
+            result: result
+
+        """
+        # Get result
+        key = 'main'
+        sub_key = 'ingest_stream_maxlen'
+        intermediate = _key_sub_key(key, sub_key, self.config_dict, die=False)
+
+        # Default to 1000000
+        if intermediate is None:
+            result = 1000000
+        else:
+            result = int(intermediate)
+        return result
+
+    def ingest_stream_claim_idle(self):
+        """Get ingest_stream_claim_idle.
+
+        The number of seconds after which agent posts read, but not
+        acknowledged, by an ingester are reclaimed by another.
+
+        Args:
+            None
+
+        Returns:
+            result: result
+
+        """
+        # Get result
+        key = 'main'
+        sub_key = 'ingest_stream_claim_idle'
+        intermediate = _key_sub_key(key, sub_key, self.config_dict, die=False)
+
+        # Default to 60
+        if intermediate is None:
+            result = 60
+        else:
+            result = float(intermediate)
+        return result
+
+    def ingest_stream_max_deliveries(self):
+        """Get ingest_stream_max_deliveries.
+
+        The number of times agent posts in the ingest stream are read
+        before they are moved to the dead letter stream, if they are never
+        acknowledged.
+
+        Args:
+            None
+
+        Returns:
+            result: result
+
+        """
+        # Get result
+        key = 'main'
+        sub_key = 'ingest_stream_max_deliveries'
+        intermediate = _key_sub_key(key, sub_key, self.config_dict, die=False)
+
+        # Default to 5
+        if intermediate is None:
+            result = 5
+        else:
+            result = max(1, int(intermediate))
+        return result
+
+    def api_ingest_mode(self):
+        """Get api_ingest_mode.
+
+        How the API queues agent posts for ingesting. "celery" uses Celery
+        tasks, "stream" the Redis ingest stream, and "embedded" a queue
+        ingested by threads in the API process, which needs no Redis.
+
+        Args:
+            None
+
+        Returns:
+            result: result
+
+        """
+        # Get result
+        key = 'main'
+        sub_key = 'api_ingest_mode'
+        intermediate = _key_sub_key(key, sub_key, self.config_dict, die=False)
+
+        # Default to the ingest stream if enabled, otherwise Celery
+        if self.ingest_stream() is True:
+            default = 'stream'
+        else:
+            default = 'celery'
+        if intermediate is None:
+            result = default
+        else:
+            result = str(intermediate).lower()
+            if result not in ['celery', 'stream', 'embedded']:
+                log_message = (
+                    'Unknown api_ingest_mode "%s". Using "%s".'
+                    '') % (intermediate, default)
+                log.log2warning(1177, log_message)
+                result = default
+        return result
+
+    def embedded_queue_size(self):
+        """Get embedded_queue_size.
+
+        The maximum number of agent posts queued in the API process when
+        api_ingest_mode is "embedded". Posts that don't fit are written to
+        the ingest_cache_directory.
+
+        Args:
+            None
+
+        Returns:
+            result: result
+
+        """
+        # Get result
+        key = 'main'
+        sub_key = 'embedded_queue_size'
+        intermediate = _key_sub_key(key, sub_key, self.config_dict, die=False)
+
+        # Default to 10000
+        if intermediate is None:
+            result = 10000
+        else:
+            result = int(intermediate)
+        return result
+
+    def embedded_queue_threads(self):
+        """Get embedded_queue_threads.
+
+        The number of threads ingesting agent posts in the API process
+        when api_ingest_mode is "embedded".
+
+        Args:
+            None
+
+        Returns:
+            result: result
+
+        """
+        # Get result
+        key = 'main'
+        sub_key = 'embedded_queue_threads'
+        intermediate = _key_sub_key(key, sub_key, self.config_dict, die=False)
+
+        # Default to 1
+        if intermediate is None:
+            result = 1
+        else:
+            result = int(intermediate)
+        return result
+
+    def api_queue_high_water(self):
+        """Get api_queue_high_water.
+
+        The number of agent posts waiting to be ingested at which the API
+        starts rejecting posts. Posts are never rejected if 0.
+
+        Args:
+            None
+
+        Returns:
+            result: result
+
+        """
+        # Get result
+        key = 'main'
+        sub_key = 'api_queue_high_water'
+        intermediate = _key_sub_key(key, sub_key, self.config_dict, die=False)
+
+        # Default to 100000
+        if intermediate is None:
+            result = 100000
+        else:
+            result = int(intermediate)
+        return result
+
+    def api_queue_low_water(self):
+        """Get api_queue_low_water.
+
+        The number of agent posts waiting to be ingested at which the API
+        accepts posts again after rejecting them.
+
+        Args:
+            None
+
+        Returns:
+            result: result
+
+        """
+        # Get result
+        key = 'main'
+        sub_key = 'api_queue_low_water'
+        intermediate = _key_sub_key(key, sub_key, self.config_dict, die=False)
+
+        # Default to 80% of api_queue_high_water
+        if intermediate is None:
+            result = int(self.api_queue_high_water() * 0.8)
+        else:
+            result = int(intermediate)
+        return result
+
+    def api_retry_after(self):
+        """Get api_retry_after.
+
+        The number of seconds agents are asked to wait before posting
+        again when their posts are rejected.
+
+        Args:
+            None
+
+        Returns:
+            result: result
+
+        """
+        # Get result
+        key = 'main'
+        sub_key = 'api_retry_after'
+        intermediate = _key_sub_key(key, sub_key, self.config_dict, die=False)
+
+        # Default to 60
+        if intermediate is None:
+            result = 60
+        else:
+            result = int(intermediate)
+        return result
+
+    def api_max_body_size(self):
+        """Get api_max_body_size.
+
+        The maximum number of bytes of an agent post once decompressed.
+        Larger posts are rejected.
+
+        Args:
+            None
+
+        Returns:
+            result: result
+
+        """
+        # Get result
+        key = 'main'
+        sub_key = 'api_max_body_size'
+        intermediate = _key_sub_key(key, sub_key, self.config_dict, die=False)
+
+        # Default to 64MB
+        if intermediate is None:
+            result = 67108864
+        else:
+            result = int(intermediate)
+        return result
+
+    def agent_bulk_size(self):
+        """Get agent_bulk_size.
+
+        The maximum number of cache files agents post together when
+        purging their cache.
+
+        Args:
+            None
+
+        Returns:
+            result: result
+
+        """
+        # Get result
+        key = 'main'
+        sub_key = 'agent_bulk_size'
+        intermediate = _key_sub_key(key, sub_key, self.config_dict, die=False)
+
+        # Default to 100
+        if intermediate is None:
+            result = 100
+        else:
+            result = max(1, int(intermediate))
+        return result
+
+    def agent_purge_threads(self):
+        """Get agent_purge_threads.
+
+        The number of devices whose cache files agents post at once when
+        purging their cache.
+
+        Args:
+            None
+
+        Returns:
+            result: result
+
+        """
+        # Get result
+        key = 'main'
+        sub_key = 'agent_purge_threads'
+        intermediate = _key_sub_key(key, sub_key, self.config_dict, die=False)
+
+        # Default to 4
+        if intermediate is None:
+            result = 4
+        else:
+            result = max(1, int(intermediate))
+        return result
+
+    def agent_compression(self):
+        """Get agent_compression.
+
+        How agents compress the data they post and cache. "none", "gzip"
+        or "zstd".
+
+        Args:
+            None
+
+        Returns:
+            result: result
+
+        """
+        # Get result
+        key = 'main'
+        sub_key = 'agent_compression'
+        intermediate = _key_sub_key(key, sub_key, self.config_dict, die=False)
+
+        # Default to none
+        if intermediate is None:
+            result = 'none'
+        else:
+            result = str(intermediate).lower()
+            if result not in ['none', 'gzip', 'zstd']:
+                log_message = (
+                    'Unknown agent_compression "%s". Using "none".'
+                    '') % (intermediate)
+                log.log2warning(1181, log_message)
+                result = 'none'
+        return result
+
+    def agent_payload_version(self):
+        """Get agent_payload_version.
+
+        The version of the format of the data agents post. 1 or the
+        columnar 2.
+
+        Args:
+            None
+
+        Returns:
+            result: result
+
+        """
+        # Get result
+        key = 'main'
+        sub_key = 'agent_payload_version'
+        intermediate = _key_sub_key(key, sub_key, self.config_dict, die=False)
+
+        # Default to 1
+        if intermediate is None:
+            result = 1
+        else:
+            result = int(intermediate)
+            if result not in [1, 2]:
+                log_message = (
+                    'Unknown agent_payload_version "%s". Using 1.'
+                    '') % (intermediate)
+                log.log2warning(1191, log_message)
+                result = 1
+        return result
+
+    def agent_aggregate(self):
+        """Get agent_aggregate.
+
+        If True agents summarize the samples they take during each interval,
+        and post the summary once the interval is over.
+
+        Args:
+            None
+
+        Returns:
+            result: result
+
+        """
+        # Get result
+        key = 'main'
+        sub_key = 'agent_aggregate'
+        intermediate = _key_sub_key(key, sub_key, self.config_dict, die=False)
+
+        # Default to False
+        if intermediate is None:
+            result = False
+        else:
+            result = bool(intermediate)
+        return result
+
+    def agent_aggregate_statistics(self):
+        """Get agent_aggregate_statistics.
+
+        The statistics of the samples of each interval that agents post as
+        additional agent labels when agent_aggregate is True.
+
+        Args:
+            None
+
+        Returns:
+            result: result
+
+        """
+        # Initialize key variables
+        result = []
+
+        # Get result
+        key = 'main'
+        sub_key = 'agent_aggregate_statistics'
+        intermediate = _key_sub_key(key, sub_key, self.config_dict, die=False)
+
+        # Default to no statistics
+        if intermediate is None:
+            return result
+        if isinstance(intermediate, str) is True:
+            intermediate = intermediate.split(',')
+        for statistic in intermediate:
+            statistic = str(statistic).strip().lower()
+            if statistic in aggregate.STATISTICS:
+                result.append(statistic)
+            else:
+                log_message = (
+                    'Unknown agent_aggregate_statistics statistic "%s". '
+                    'Ignoring it.') % (statistic)
+                log.log2warning(1195, log_message)
+        return result
+
+    def agent_keyframe_interval(self):
+        """Get agent_keyframe_interval.
+
+        The number of posts from one complete post of a device to the next.
+        Posts in between only have the datapoints that changed. 0 disables
+        delta posts.
+
+        Args:
+            None
+
+        Returns:
+            result: result
+
+        """
+        # Get result
+        key = 'main'
+        sub_key = 'agent_keyframe_interval'
+        intermediate = _key_sub_key(key, sub_key, self.config_dict, die=False)
+
+        # Default to 0
+        if intermediate is None:
+            result = 0
+        else:
+            result = max(0, int(intermediate))
+        return result
+
+    def agent_spool_segment_size(self):
+        """Get agent_spool_segment_size.
+
+        The size in bytes at which agents start a new segment file when
+        spooling data the API can't accept.
+
+        Args:
+            None
+
+        Returns:
+            result: result
+
+        """
+        # Get result
+        key = 'main'
+        sub_key = 'agent_spool_segment_size'
+        intermediate = _key_sub_key(key, sub_key, self.config_dict, die=False)
+
+        # Default to 4MB
+        if intermediate is None:
+            result = 4194304
+        else:
+            result = max(1, int(intermediate))
+        return result
+
+    def agent_spool_sync_records(self):
+        """Get agent_spool_sync_records.
+
+        The number of records agents append to a spool segment between
+        writing it to disk.
+
+        Args:
+            None
+
+        Returns:
+            result: result
+
+        """
+        # Get result
+        key = 'main'
+        sub_key = 'agent_spool_sync_records'
+        intermediate = _key_sub_key(key, sub_key, self.config_dict, die=False)
+
+        # Default to 16
+        if intermediate is None:
+            result = 16
+        else:
+            result = max(1, int(intermediate))
+        return result
 
     def sqlalchemy_max_overflow(self):
         """Get sqlalchemy_max_overflow.
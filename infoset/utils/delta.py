@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+"""Delta posts of agent data.
+
+Agents may post only the datapoints that changed since their last post,
+or a complete keyframe. Posts are numbered in sequence for each device, and
+the numbers are sent in HTTP headers:
+
+    X-Infoset-Device: SHA1 hash of the devicename
+    X-Infoset-Sequence: Sequence number of the post
+    X-Infoset-Keyframe: Sequence number of the keyframe the post builds on.
+        The same as X-Infoset-Sequence for keyframes
+
+The body of a delta post is a payload of either version with the main keys
+of the new data and the datapoints that changed. The API rebuilds the
+complete data from it and the previous data, and asks for a keyframe with
+HTTP 409 if the previous post of the sequence is missing.
+
+Agents post keyframes when datapoints or agent labels disappear, as delta
+posts can't remove them.
+
+"""
+
+# Standard libraries
+import threading
+
+# Infoset libraries
+from infoset.utils import general
+from infoset.utils import payload
+
+# HTTP headers
+DEVICE = 'X-Infoset-Device'
+SEQUENCE = 'X-Infoset-Sequence'
+KEYFRAME = 'X-Infoset-Keyframe'
+
+# HTTP status code of servers asking for a keyframe
+RESEND = 409
+
+# Senders of this process, so that they outlive agent objects
+_SENDERS = {}
+_SENDERS_LOCK = threading.Lock()
+
+
+class Sender(object):
+    """Number the posts of a device, and create their delta posts.
+
+    Args:
+        None
+
+    Returns:
+        None
+
+    Methods:
+
+    """
+
+    def __init__(self, devicename, interval):
+        """Function for intializing the class.
+
+        Args:
+            devicename: Devicename
+            interval: Number of posts from one keyframe to the next
+
+        Returns:
+            None
+
+        """
+        # Initialize key variables
+        self.devicehash = general.hashstring(devicename, sha=1)
+        self.interval = interval
+        self.sequence = 0
+        self.keyframe = None
+        self._previous = None
+        self._lock = threading.Lock()
+
+    def prepare(self, data, keyframe=False):
+        """Create the next post of the device.
+
+        Args:
+            data: Complete data to post
+            keyframe: Post a keyframe if True
+
+        Returns:
+            (body, headers): Data to post and its HTTP headers
+
+        """
+        # Initialize key variables
+        with self._lock:
+            sequence = self.sequence + 1
+            body = None
+
+            # Post the changes if the previous post was accepted
+            if keyframe is False and self._previous is not None and (
+                    sequence - self.keyframe < self.interval):
+                body = changes(self._previous, data)
+
+        # Return
+        if body is None:
+            body = data
+            keyframe = sequence
+        else:
+            keyframe = self.keyframe
+        headers = {
+            DEVICE: self.devicehash,
+            SEQUENCE: str(sequence),
+            KEYFRAME: str(keyframe)}
+        return (body, headers)
+
+    def posted(self, data, headers, success):
+        """Record the result of posting data.
+
+        Args:
+            data: Complete data posted
+            headers: HTTP headers from prepare()
+            success: True if the post was accepted
+
+        Returns:
+            None
+
+        """
+        # The next post is a keyframe if this one failed
+        with self._lock:
+            self.sequence = int(headers[SEQUENCE])
+            if success is True:
+                self.keyframe = int(headers[KEYFRAME])
+                self._previous = data
+            else:
+                self._previous = None
+
+
+def sender(id_agent, devicename, interval):
+    """Get the Sender of a device.
+
+    Args:
+        id_agent: Identifier of the agent
+        devicename: Devicename
+        interval: Number of posts from one keyframe to the next
+
+    Returns:
+        result: Sender object
+
+    """
+    # Return
+    key = (id_agent, devicename)
+    with _SENDERS_LOCK:
+        if key not in _SENDERS:
+            _SENDERS[key] = Sender(devicename, interval)
+        result = _SENDERS[key]
+    return result
+
+
+def changes(previous, data):
+    """Create a delta post of the datapoints that changed.
+
+    Args:
+        previous: Data of the previous post
+        data: Data to post
+
+    Returns:
+        result: Delta post, None if a keyframe is required because agent
+            labels or datapoints have been removed or redefined
+
+    """
+    # Initialize key variables
+    builder = payload.Payload()
+
+    for data_type in ['timeseries', 'timefixed']:
+        labels = data.get(data_type, {})
+        previous_labels = previous.get(data_type, {})
+        if set(previous_labels) - set(labels):
+            return None
+
+        # Find the datapoints that changed
+        for label, label_dict in labels.items():
+            previous_dict = previous_labels.get(label)
+            if previous_dict is None:
+                old = {}
+            elif (previous_dict['base_type'] != label_dict['base_type'] or
+                  previous_dict['description'] !=
+                  label_dict['description']):
+                return None
+            else:
+                old = _datapoints(previous, previous_dict)
+            new = _datapoints(data, label_dict)
+            if new is None or old is None:
+                return None
+            if set(old) - set(new):
+                return None
+            changed = [
+                (index, value, source)
+                for (index, (value, source)) in new.items()
+                if old.get(index, new) != (value, source)]
+            if bool(changed) is False:
+                continue
+
+            # Add them
+            columns = builder.label(
+                label, label_dict['base_type'], label_dict['description'],
+                data_type=data_type)
+            for datapoint in changed:
+                builder.append(columns, *datapoint)
+
+    # Return
+    result = builder.data(_main(data), payload.version(data))
+    return result
+
+
+def merge(data, delta):
+    """Rebuild complete data from the previous data and a delta post.
+
+    Args:
+        data: Complete data of the previous post
+        delta: Delta post
+
+    Returns:
+        result: Complete data, in the version of the delta post
+
+    """
+    # Initialize key variables
+    builder = payload.Payload()
+
+    for data_type in ['timeseries', 'timefixed']:
+        labels = data.get(data_type, {})
+        changed = delta.get(data_type, {})
+
+        # Update the datapoints of existing agent labels, in order
+        for label, label_dict in labels.items():
+            columns = builder.label(
+                label, label_dict['base_type'], label_dict['description'],
+                data_type=data_type)
+            updates = {}
+            if label in changed:
+                updates = _datapoints(delta, changed[label])
+                if updates is None:
+                    raise TypeError(
+                        'Invalid indexes of agent label %s' % label)
+            for (index, value, source) in payload.datapoints(
+                    data, label_dict):
+                (value, source) = updates.pop(index, (value, source))
+                builder.append(columns, index, value, source)
+            for (index, (value, source)) in updates.items():
+                builder.append(columns, index, value, source)
+
+        # Add new agent labels
+        for label, label_dict in changed.items():
+            if label in labels:
+                continue
+            columns = builder.label(
+                label, label_dict['base_type'], label_dict['description'],
+                data_type=data_type)
+            for datapoint in payload.datapoints(delta, label_dict):
+                builder.append(columns, *datapoint)
+
+    # Return
+    result = builder.data(_main(delta), payload.version(delta))
+    return result
+
+
+def _datapoints(data, label_dict):
+    """Get the datapoints of an agent label keyed by index.
+
+    Args:
+        data: Payload dict
+        label_dict: Dict of the agent label
+
+    Returns:
+        result: Dict of (value, source) tuples keyed by index. None if
+            indexes can't be dict keys
+
+    """
+    # Return
+    try:
+        result = {
+            index: (value, source)
+            for (index, value, source) in payload.datapoints(
+                data, label_dict)}
+    except TypeError:
+        result = None
+    return result
+
+
+def _main(data):
+    """Get the main keys of a payload.
+
+    Args:
+        data: Payload dict
+
+    Returns:
+        result: Dict of main keys
+
+    """
+    # Return
+    result = {
+        key: value for (key, value) in data.items()
+        if key not in ['version', 'sources', 'timeseries', 'timefixed']}
+    return result
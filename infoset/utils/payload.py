@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+"""Formats of the data agents post.
+
+Version 1 lists the datapoints of each agent label, repeating the source of
+every datapoint:
+
+    "timeseries": {
+        label: {"base_type": 1, "description": label,
+                "data": [[index, value, source], ...]}}
+
+Version 2 is columnar. Payloads have a "version" key of 2, and list each
+source once in a "sources" key. Agent labels have parallel lists of the
+indexes and values of their datapoints, and of the positions of their
+sources in "sources":
+
+    "sources": [source, ...],
+    "timeseries": {
+        label: {"base_type": 1, "description": label,
+                "index": [index, ...], "value": [value, ...],
+                "source": [position, ...]}}
+
+The values of version 2 timeseries data must be numbers, not numeric
+strings. Both versions have the same main keys, and "timeseries" and
+"timefixed" data types. Payloads without a "version" key are version 1.
+
+"""
+
+# Version of columnar payloads
+VERSION = 2
+
+# Keys of the agent labels of each version
+LABEL_KEYS = {
+    1: ('base_type', 'description', 'data'),
+    VERSION: ('base_type', 'description', 'index', 'value', 'source')
+}
+
+
+class Payload(object):
+    """Build agent data a datapoint at a time.
+
+    Datapoints are appended to the lists of a version 2 payload, which are
+    converted to version 1 only if required.
+
+    Args:
+        None
+
+    Returns:
+        None
+
+    Methods:
+
+    """
+
+    def __init__(self):
+        """Function for intializing the class.
+
+        Args:
+            None
+
+        Returns:
+            None
+
+        """
+        # Initialize key variables
+        self.sources = []
+        self.labels = {'timeseries': {}, 'timefixed': {}}
+        self._positions = {}
+
+    def label(self, label, base_type, description, data_type=None):
+        """Start the datapoints of an agent label, replacing any others.
+
+        Args:
+            label: Agent label
+            base_type: SNMP style base_type. None for timefixed data
+            description: Description of the agent label
+            data_type: "timeseries" or "timefixed". Set by base_type if None
+
+        Returns:
+            columns: Dict of lists to pass to append()
+
+        """
+        # Initialize key variables
+        columns = {
+            'base_type': base_type,
+            'description': description,
+            'index': [],
+            'value': [],
+            'source': []
+        }
+
+        # Add the label
+        if data_type is None:
+            if base_type is None:
+                data_type = 'timefixed'
+            else:
+                data_type = 'timeseries'
+        self.labels[data_type][label] = columns
+        return columns
+
+    def append(self, columns, index, value, source):
+        """Append a datapoint to an agent label.
+
+        Args:
+            columns: Dict of lists returned by label()
+            index: Index of the datapoint
+            value: Value of the datapoint
+            source: Source of the datapoint
+
+        Returns:
+            None
+
+        """
+        # Get the position of the source, adding new ones
+        try:
+            position = self._positions.get(source)
+        except TypeError:
+            position = None
+        if position is None:
+            position = len(self.sources)
+            self.sources.append(source)
+            try:
+                self._positions[source] = position
+            except TypeError:
+                pass
+
+        # Append
+        columns['index'].append(index)
+        columns['value'].append(value)
+        columns['source'].append(position)
+
+    def data(self, main, version=VERSION):
+        """Create a payload.
+
+        The lists of the payload are those of the Payload object, and
+        aren't copied.
+
+        Args:
+            main: Dict of the main keys of the payload
+            version: Version of the payload
+
+        Returns:
+            result: Payload dict
+
+        """
+        # Initialize key variables
+        result = dict(main)
+        if version == VERSION:
+            result['version'] = VERSION
+            result['sources'] = self.sources
+
+        # Add the agent labels
+        for data_type, labels in self.labels.items():
+            if bool(labels) is False:
+                continue
+            if version == VERSION:
+                result[data_type] = labels
+                continue
+            result[data_type] = {}
+            for label, columns in labels.items():
+                result[data_type][label] = {
+                    'base_type': columns['base_type'],
+                    'description': columns['description'],
+                    'data': [
+                        list(datapoint) for datapoint in datapoints(
+                            result, columns, self.sources)]
+                }
+
+        # Return
+        return result
+
+
+def version(data):
+    """Get the version of a payload.
+
+    Args:
+        data: Payload dict
+
+    Returns:
+        result: Version
+
+    """
+    # Return
+    result = data.get('version', 1)
+    return result
+
+
+def datapoints(data, label_dict, sources=None):
+    """Get the datapoints of an agent label of a validated payload.
+
+    Args:
+        data: Payload dict
+        label_dict: Dict of the agent label
+        sources: Sources of version 2 datapoints. data['sources'] if None
+
+    Returns:
+        result: Iterable of (index, value, source) datapoints
+
+    """
+    # Return
+    if sources is None and version(data) == VERSION:
+        sources = data['sources']
+    if sources is None:
+        result = label_dict['data']
+    else:
+        result = zip(
+            label_dict['index'], label_dict['value'],
+            map(sources.__getitem__, label_dict['source']))
+    return result
+
+
+def columnar(data):
+    """Convert a validated payload to version 2.
+
+    Args:
+        data: Payload dict
+
+    Returns:
+        result: Version 2 payload dict
+
+    """
+    # Initialize key variables
+    builder = Payload()
+    main = {
+        key: value for (key, value) in data.items()
+        if key not in ['version', 'sources', 'timeseries', 'timefixed']}
+
+    # Add the datapoints of each agent label
+    for data_type in ['timeseries', 'timefixed']:
+        for label, label_dict in sorted(data.get(data_type, {}).items()):
+            columns = builder.label(
+                label, label_dict['base_type'], label_dict['description'],
+                data_type=data_type)
+            for datapoint in datapoints(data, label_dict):
+                builder.append(columns, *datapoint)
+
+    # Return
+    result = builder.data(main)
+    return result
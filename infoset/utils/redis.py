@@ -1,10 +1,16 @@
 # Redis library
 import redis
 import pickle
-import json
 
 # Infoset-ng imports
 from infoset.api import CONFIG
+from infoset.utils import codec
+
+# Keys of the lists of keys waiting to be ingested and being ingested, and
+# of the flag set while a batch is scheduled
+_PENDING = 'infoset-ng:pending'
+_PROCESSING = 'infoset-ng:processing'
+_SCHEDULED = 'infoset-ng:scheduled'
 
 
 class Redis(object):
@@ -20,7 +26,8 @@ class Redis(object):
         host = CONFIG.redis_hostname()
         port = CONFIG.redis_port()
         self.redis = redis.StrictRedis(
-            host=host, port=port, db=0, decode_responses=True)
+            host=host, port=port, db=0, decode_responses=False)
+        self.codec = codec.codec(CONFIG)
 
     def set(self, key, data):
         """Function for setting keys to redis instance.
@@ -32,7 +39,53 @@ class Redis(object):
             Text response of Received
 
         """
-        self.redis.set(str(key), json.dumps(data))
+        self.redis.set(str(key), self.codec.encode(data))
+
+    def set_body(self, key, body, content_type=None):
+        """Function for setting keys to the body of an agent POST.
+
+        The body is stored without being decoded. It expires after
+        redis_post_ttl seconds if it hasn't been ingested by then.
+
+        Args:
+            key: Key
+            body: Body of POST
+            content_type: Content type of the body
+
+        Returns:
+            None
+
+        """
+        self.redis.set(
+            str(key), self.codec.encode_body(body, content_type),
+            ex=CONFIG.redis_post_ttl())
+
+    def set_raw(self, key, value, expire=None):
+        """Function for setting keys to encoded data.
+
+        Args:
+            key: Key
+            value: Encoded data
+            expire: Number of seconds until the key expires. Never if None
+
+        Returns:
+            None
+
+        """
+        self.redis.set(str(key), value, ex=expire)
+
+    def get_raw(self, key):
+        """Function for getting encoded data from redis instance.
+
+        Args:
+            key: Key
+
+        Returns:
+            value: Encoded data. Decode with infoset.utils.codec.decode()
+
+        """
+        value = self.redis.get(key)
+        return value
 
     def get(self, key):
         """Function for getting data from redis instance.
@@ -44,5 +97,157 @@ class Redis(object):
             Text response of Received
 
         """
-        data = json.loads(self.redis.get(key))
+        data = codec.decode(self.get_raw(key))
         return data
+
+    def push(self, key):
+        """Add a key to the list of keys waiting to be ingested.
+
+        Args:
+            key: Key
+
+        Returns:
+            length: Number of keys waiting
+
+        """
+        length = self.redis.rpush(_PENDING, str(key))
+        return length
+
+    def pending(self):
+        """Get the number of keys waiting to be ingested.
+
+        Args:
+            None
+
+        Returns:
+            length: Number of keys waiting
+
+        """
+        length = self.redis.llen(_PENDING)
+        return length
+
+    def claim(self, count):
+        """Move the oldest keys waiting to be ingested to those being ingested.
+
+        The keys must be passed to ack() once ingested, or to requeue() if
+        they couldn't be.
+
+        Args:
+            count: Maximum number of keys
+
+        Returns:
+            keys: List of keys
+
+        """
+        pipeline = self.redis.pipeline(transaction=True)
+        for _ in range(count):
+            pipeline.lmove(_PENDING, _PROCESSING, 'LEFT', 'RIGHT')
+        keys = [key for key in pipeline.execute() if key is not None]
+        return keys
+
+    def ack(self, keys):
+        """Forget keys that have been ingested, and delete their posts.
+
+        Args:
+            keys: List of keys returned by claim()
+
+        Returns:
+            None
+
+        """
+        if bool(keys) is True:
+            pipeline = self.redis.pipeline(transaction=True)
+            for key in keys:
+                pipeline.lrem(_PROCESSING, 1, key)
+            pipeline.delete(*keys)
+            pipeline.execute()
+
+    def requeue(self, keys):
+        """Put keys that couldn't be ingested back in front of the others.
+
+        Args:
+            keys: List of keys returned by claim()
+
+        Returns:
+            None
+
+        """
+        if bool(keys) is True:
+            pipeline = self.redis.pipeline(transaction=True)
+            for key in keys:
+                pipeline.lrem(_PROCESSING, 1, key)
+            pipeline.lpush(_PENDING, *reversed(keys))
+            pipeline.execute()
+
+    def recover(self):
+        """Requeue all keys being ingested.
+
+        Only to be used when no posts are being ingested, for example
+        after the ingesting process died.
+
+        Args:
+            None
+
+        Returns:
+            count: Number of keys requeued
+
+        """
+        count = 0
+        while self.redis.lmove(
+                _PROCESSING, _PENDING, 'RIGHT', 'LEFT') is not None:
+            count += 1
+        return count
+
+    def get_many(self, keys):
+        """Function for getting encoded data for several keys.
+
+        Args:
+            keys: List of keys
+
+        Returns:
+            values: List of encoded data. None for keys that don't exist
+
+        """
+        values = []
+        if bool(keys) is True:
+            values = self.redis.mget(keys)
+        return values
+
+    def delete(self, keys):
+        """Function for deleting keys.
+
+        Args:
+            keys: List of keys
+
+        Returns:
+            None
+
+        """
+        if bool(keys) is True:
+            self.redis.delete(*keys)
+
+    def schedule(self, linger):
+        """Note that a batch has been scheduled.
+
+        Args:
+            linger: Number of seconds until the batch runs
+
+        Returns:
+            scheduled: True if no other batch was scheduled already
+
+        """
+        scheduled = self.redis.set(
+            _SCHEDULED, 1, nx=True, px=max(1, int(linger * 1000)))
+        return bool(scheduled)
+
+    def unschedule(self):
+        """Note that the scheduled batch is running.
+
+        Args:
+            None
+
+        Returns:
+            None
+
+        """
+        self.redis.delete(_SCHEDULED)
@@ -0,0 +1,379 @@
+#!/usr/bin/env python3
+"""Append-only spool of agent data that couldn't be posted.
+
+Each agent spools the data of a device to segment files. A segment is a
+series of records, each made of:
+
+    1) A 4 byte marker
+    2) The length of the encoded data as a 4 byte big-endian integer
+    3) The CRC32 of the encoded data as a 4 byte big-endian integer
+    4) The data, encoded by a Codec of the infoset.utils.codec module
+
+Segments are named "<timestamp>_<id_agent>_<devicehash>.seg" after the
+first data they hold, like agent cache files, so that the ingester can also
+read them from its cache directory. Records damaged by a crash while
+writing are skipped by searching for the marker of the next record.
+
+A small index file records the segment being appended to, and how much of
+each segment has already been posted.
+
+"""
+
+# Standard libraries
+import os
+import zlib
+import struct
+import atexit
+import threading
+
+# Infoset libraries
+from infoset.utils import log
+from infoset.utils import codec
+from infoset.utils import compression
+
+# Suffix of segment files
+SUFFIX = '.seg'
+
+# Record headers
+_MARKER = b'\xf0ISR'
+_HEADER = struct.Struct('>4sII')
+
+# Spools of this process, so that they outlive agent objects
+_SPOOLS = {}
+_SPOOLS_LOCK = threading.Lock()
+
+
+class Spool(object):
+    """Spool of the data of a device.
+
+    Segments are only appended to, and synced to disk every sync_records
+    records and when they are closed. A new segment is started once the
+    current one reaches segment_size bytes.
+
+    Args:
+        None
+
+    Returns:
+        None
+
+    Methods:
+
+    """
+
+    def __init__(
+            self, directory, id_agent, devicehash,
+            segment_size=4194304, sync_records=16, compress=False):
+        """Function for intializing the class.
+
+        Args:
+            directory: Directory of the segment files
+            id_agent: Identifier of the agent
+            devicehash: Hash of the devicename
+            segment_size: Size in bytes at which segments are rotated
+            sync_records: Number of records appended between syncs
+            compress: Compress records with zlib if True
+
+        Returns:
+            None
+
+        """
+        # Initialize key variables
+        self.directory = directory
+        self.id_agent = id_agent
+        self.devicehash = devicehash
+        self.segment_size = segment_size
+        self.sync_records = max(1, sync_records)
+        self.index_file = os.path.join(
+            directory, ('.spool_%s_%s.json') % (id_agent, devicehash))
+        self._fd = None
+        self._unsynced = 0
+        self._lock = threading.RLock()
+
+        # Encode records
+        if compress is True:
+            self.codec = codec.Codec('zlib')
+        else:
+            self.codec = codec.Codec('json')
+
+        # Read the index
+        try:
+            self.index = compression.read_json(self.index_file)
+        except:
+            self.index = {}
+        self.index.setdefault('active', None)
+        self.index.setdefault('offsets', {})
+
+    def append(self, data):
+        """Append data to the spool.
+
+        Args:
+            data: Data dict
+
+        Returns:
+            filepath: Segment file the data was appended to
+
+        """
+        # Initialize key variables
+        value = self.codec.encode(data)
+        record = _HEADER.pack(
+            _MARKER, len(value), zlib.crc32(value)) + value
+
+        # Append
+        with self._lock:
+            filepath = self._segment(data['timestamp'])
+            os.write(self._fd, record)
+            self._unsynced += 1
+            if self._unsynced >= self.sync_records:
+                self.sync()
+
+        # Return
+        return filepath
+
+    def read(self, filepath):
+        """Read the records of a segment that haven't been posted.
+
+        Args:
+            filepath: Segment file
+
+        Returns:
+            result: List of (offset, data) tuples from records()
+
+        """
+        # Return
+        with self._lock:
+            offset = self.index['offsets'].get(os.path.basename(filepath), 0)
+            result = list(records(filepath, offset))
+        return result
+
+    def consumed(self, filepath, offset=None):
+        """Record that a segment has been posted up to an offset.
+
+        Segments are deleted once they have been posted completely.
+
+        Args:
+            filepath: Segment file
+            offset: Offset from read(). The recorded offset if None
+
+        Returns:
+            None
+
+        """
+        # Initialize key variables
+        filename = os.path.basename(filepath)
+
+        with self._lock:
+            if offset is None:
+                offset = self.index['offsets'].get(filename, 0)
+
+            # Delete the segment if it has been posted completely. Data may
+            # have been appended since it was read
+            if offset >= os.path.getsize(filepath):
+                if filename == self.index['active']:
+                    self._close()
+                    self.index['active'] = None
+                os.remove(filepath)
+                self.index['offsets'].pop(filename, None)
+            else:
+                self.index['offsets'][filename] = offset
+            self._save()
+
+    def sync(self):
+        """Write appended records to disk.
+
+        Args:
+            None
+
+        Returns:
+            None
+
+        """
+        # Sync
+        with self._lock:
+            if self._fd is not None and bool(self._unsynced) is True:
+                os.fsync(self._fd)
+            self._unsynced = 0
+
+    def close(self):
+        """Sync and close the segment being appended to.
+
+        Args:
+            None
+
+        Returns:
+            None
+
+        """
+        # Close
+        with self._lock:
+            self._close()
+
+    def _close(self):
+        """Sync and close the segment being appended to.
+
+        Args:
+            None
+
+        Returns:
+            None
+
+        """
+        # Close
+        if self._fd is not None:
+            self.sync()
+            os.close(self._fd)
+            self._fd = None
+
+    def _segment(self, timestamp):
+        """Open the segment to append to, rotating it if it is full.
+
+        Args:
+            timestamp: Timestamp of the data to append
+
+        Returns:
+            filepath: Segment file
+
+        """
+        # Use the active segment until it is full
+        filename = self.index['active']
+        if filename is not None:
+            filepath = os.path.join(self.directory, filename)
+            if self._fd is None and os.path.isfile(filepath) is True:
+                self._fd = os.open(filepath, os.O_WRONLY | os.O_APPEND)
+            if self._fd is not None:
+                if os.fstat(self._fd).st_size < self.segment_size:
+                    return filepath
+                self._close()
+
+        # Start a new segment
+        filename = ('%s_%s_%s%s') % (
+            timestamp, self.id_agent, self.devicehash, SUFFIX)
+        filepath = os.path.join(self.directory, filename)
+        self._fd = os.open(
+            filepath, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        self.index['active'] = filename
+        self._save()
+
+        # Return
+        return filepath
+
+    def _save(self):
+        """Save the index.
+
+        Args:
+            None
+
+        Returns:
+            None
+
+        """
+        # Save
+        compression.write_json(self.index_file, self.index, 'identity')
+
+
+def records(filepath, offset=0):
+    """Read the records of a segment file.
+
+    Args:
+        filepath: Segment file
+        offset: Offset from which to read
+
+    Returns:
+        None
+
+    Yields:
+        (offset, data): Offset of the end of each record and its data dict.
+            data is None for damaged records, which are skipped
+
+    """
+    # Read
+    with open(filepath, 'rb') as f_handle:
+        f_handle.seek(offset)
+        buffer = f_handle.read()
+
+    # Get records
+    position = 0
+    while position < len(buffer):
+        # Check the record
+        start = position + _HEADER.size
+        valid = False
+        if start <= len(buffer):
+            (marker, length, crc) = _HEADER.unpack_from(buffer, position)
+            end = start + length
+            valid = (
+                marker == _MARKER and end <= len(buffer) and
+                zlib.crc32(buffer[start:end]) == crc)
+
+        # Skip damaged records
+        if valid is False:
+            end = buffer.find(_MARKER, position + 1)
+            if end == -1:
+                end = len(buffer)
+            log_message = (
+                'Skipping %s damaged bytes at offset %s of spool segment %s.'
+                '') % (end - position, offset + position, filepath)
+            log.log2warning(1185, log_message)
+            position = end
+            yield (offset + position, None)
+            continue
+
+        # Decode the data
+        try:
+            data = codec.decode(buffer[start:end])
+        except ValueError as exception_error:
+            log_message = (
+                'Skipping undecodable record at offset %s of spool '
+                'segment %s: %s') % (
+                    offset + position, filepath, exception_error)
+            log.log2warning(1186, log_message)
+            data = None
+        position = end
+        yield (offset + position, data)
+
+
+def spool(config, id_agent, devicehash):
+    """Get the spool of a device in the agent cache directory.
+
+    Args:
+        config: Configuration object
+        id_agent: Identifier of the agent
+        devicehash: Hash of the devicename
+
+    Returns:
+        result: Spool object
+
+    """
+    # Initialize key variables
+    directory = config.agent_cache_directory()
+    key = (directory, id_agent, devicehash)
+
+    # Return
+    with _SPOOLS_LOCK:
+        if key not in _SPOOLS:
+            compress = compression.content_encoding(
+                config.agent_compression()) != 'identity'
+            _SPOOLS[key] = Spool(
+                directory, id_agent, devicehash,
+                segment_size=config.agent_spool_segment_size(),
+                sync_records=config.agent_spool_sync_records(),
+                compress=compress)
+        result = _SPOOLS[key]
+    return result
+
+
+def _close():
+    """Close the spools of this process.
+
+    Args:
+        None
+
+    Returns:
+        None
+
+    """
+    # Close
+    with _SPOOLS_LOCK:
+        for item in _SPOOLS.values():
+            item.close()
+
+
+atexit.register(_close)